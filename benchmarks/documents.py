@@ -0,0 +1,75 @@
+"""
+Crawl records at corpus scale: Documents serialized by goviq.utils.dumps/loads (orjson if installed) against the
+single-key {url: payload} dicts and json module they replace. Times writing and reading every record and reports
+the memory each representation holds on top of the document text, which both share.
+
+    python -m benchmarks.documents --acts 900 --bills 5000
+"""
+import argparse
+import json
+import random
+import tracemalloc
+
+from benchmarks.harness import add_arguments, best_of, report
+from goviq.entities.document import Document
+from goviq.tests.fixtures import synthetic_acts, synthetic_bills
+from goviq.utils import dumps, loads, orjson
+
+
+def legacy_record(document: Document) -> dict:
+    if document.segments is not None:
+        return {document.url: {'segments': document.segments, 'sections': document.metadata.get('sections')}}
+    return {document.url: {'html': document.body, 'status': document.metadata.get('status')}}
+
+
+def legacy_read(line: str) -> tuple:
+    # How the preprocessors unpacked records before Document
+    url, value = next(iter(json.loads(line).items()))
+    return url, value
+
+
+def overhead(build) -> int:
+    """
+    Bytes allocated by build() and still held by its result.
+    """
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--acts', type=int, default=900)
+    parser.add_argument('--bills', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    titles, acts = synthetic_acts(args.acts, rng)
+    documents = [Document.from_record(record) for record in acts + synthetic_bills(args.bills, titles, rng)]
+    legacy = [legacy_record(document) for document in documents]
+    legacy_lines = [json.dumps(record, ensure_ascii=False) for record in legacy]
+    lines = [dumps(document) for document in documents]
+
+    results = {
+        'write[json, dict]': best_of(lambda: [json.dumps(record, ensure_ascii=False) for record in legacy], 3, 1),
+        'write[dumps, Document]': best_of(lambda: [dumps(document) for document in documents], 3, 1),
+        'read[json, dict]': best_of(lambda: [legacy_read(line) for line in legacy_lines], 3, 1),
+        'read[loads, Document]': best_of(lambda: [Document.from_record(loads(line)) for line in lines], 3, 1),
+    }
+    # Only the containers: the text objects are reused, so they do not count towards either
+    dict_bytes = overhead(lambda: [legacy_record(document) for document in documents])
+    document_bytes = overhead(lambda: [Document(d.url, d.source, d.body, d.segments, d.fetched_at, d.content_hash,
+                                                dict(d.metadata)) for d in documents])
+    print(f'{len(documents)} records, orjson {"installed" if orjson is not None else "not installed"}; '
+          f'per record: {dict_bytes / len(documents):.0f} bytes as dicts, '
+          f'{document_bytes / len(documents):.0f} bytes as Documents (excluding text)')
+    raise SystemExit(report(results, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Timing and regression checking shared by the benchmark scripts.
+Results are {name: seconds}, lower is better. A run can be saved with --json and later runs compared against it
+with --baseline; any benchmark slower than the baseline by more than the tolerance fails the run.
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from typing import Callable, Dict
+
+
+def best_of(func: Callable[[], object], repeat: int = 5, number: int = None) -> float:
+    """
+    Seconds per call of func, the minimum over repeat rounds of number calls each.
+    By default number is calibrated so that a round takes at least 0.2 seconds, which keeps fast functions from
+    being dominated by timer resolution and scheduling noise.
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--json', help='Write the results to this JSON file.')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to check for regressions against.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown relative to the baseline before a benchmark counts as a regression.')
+
+
+def report(results: Dict[str, float], args: argparse.Namespace) -> int:
+    """
+    Prints the results, compared with the baseline if one was given, and saves them if asked.
+    Returns the process exit code: 1 if anything regressed, else 0.
+    """
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    regressions = []
+    width = max(len(name) for name in results)
+    for name, seconds in results.items():
+        line = f'{name:<{width}} {seconds * 1000:>12.3f} ms'
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f' {ratio:>7.2f}x baseline'
+            if ratio > 1 + args.tolerance:
+                regressions.append(name)
+                line += '  REGRESSION'
+        print(line)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'machine': platform.machine(), 'results': results}, f,
+                      indent=2)
+    if regressions:
+        print(f'{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {", ".join(regressions)}')
+        return 1
+    return 0
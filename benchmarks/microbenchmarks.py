@@ -0,0 +1,53 @@
+"""
+Microbenchmarks of the CPU-bound hot spots of preprocessing, on synthetic documents.
+
+    python -m benchmarks.microbenchmarks --json baseline.json
+    python -m benchmarks.microbenchmarks --baseline baseline.json
+"""
+import argparse
+import tempfile
+
+from benchmarks.harness import add_arguments, best_of, report
+from goviq.parsing import PARSERS, get_parser
+from goviq.preprocessing.acts_ca import ActCAPreprocessor
+from goviq.scrapers.acts_ca import parse_act_text
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.utils import act_reference_count, extract_html_text, split_document_at_language_transition
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--acts', type=int, default=900, help='Number of act titles to match against.')
+    parser.add_argument('--repeat', type=int, default=5)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(acts=args.acts, bills=1, act_paragraphs=(300, 300), bill_paragraphs=(200, 200))
+    act_id = next(iter(corpus.acts))
+    act_page = corpus.act_fulltext_page(act_id)
+    bill_page = corpus.document_page('c-0')
+    act_body = get_parser().texts_by_class(act_page, 'div', 'docContents')[0]
+    bill_text = extract_html_text(bill_page)
+    titles = [act['title'] for act in corpus.acts.values()]
+    preprocessor = ActCAPreprocessor(local_cache=tempfile.gettempdir())
+
+    results = {}
+    for name in PARSERS:
+        try:
+            get_parser(name).visible_text('<p>warm up</p>')
+        except ImportError:
+            continue
+        results[f'extract_html_text[{name}]'] = best_of(lambda: extract_html_text(bill_page, name), args.repeat)
+        results[f'act_text[{name}]'] = best_of(
+            lambda: get_parser(name).texts_by_class(act_page, 'div', 'docContents'), args.repeat)
+        results[f'parse_act[{name}]'] = best_of(lambda: parse_act_text(act_page, name), args.repeat)
+    results['act_reference_count'] = best_of(lambda: act_reference_count(bill_text, titles), args.repeat)
+    results['split_language'] = best_of(lambda: split_document_at_language_transition(act_body), args.repeat)
+    english, _ = split_document_at_language_transition(act_body)
+    results['parse_title'] = best_of(lambda: preprocessor._parse_title(english), args.repeat)
+    print(f'act body {len(act_body)} chars, bill text {len(bill_text)} chars, {len(titles)} act titles')
+    raise SystemExit(report(results, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Title and status extraction over a whole corpus: the compiled, prefix-bounded PatternSets against the per-document
+re.findall / sequential re.search they replace. Checks that both give the same results and reports which rule
+matched how often.
+
+    python -m benchmarks.patterns --acts 900
+    python -m benchmarks.patterns --acts-path act_text_latest.jsonl  # a real crawl
+"""
+import argparse
+import collections
+import tempfile
+import time
+
+import regex as re
+
+from benchmarks.harness import add_arguments, report
+from goviq.config.scrapers.parl_ca import STATUS_PATTERNS, match_bill_status
+from goviq.entities.document import Document
+from goviq.parsing import get_parser
+from goviq.preprocessing.acts_ca import ActCAPreprocessor, parse_title
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.utils import iter_json_docs, split_document_at_language_transition
+
+
+def legacy_title(body: str, regex: str) -> str | None:
+    title = re.findall(regex, body, re.MULTILINE)
+    return title[0].strip() if title else None
+
+
+def legacy_status(html: str) -> str:
+    for status, pattern in STATUS_PATTERNS:
+        if re.search(pattern, html):
+            return status
+    return 'in_progress'
+
+
+def best_pass(func, items, repeat: int) -> float:
+    """
+    Seconds for the fastest of repeat passes of func over every item.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--acts', type=int, default=900, help='Number of synthetic acts (about the federal corpus).')
+    parser.add_argument('--bills', type=int, default=400, help='Number of synthetic bill pages.')
+    parser.add_argument('--acts-path', help='Crawled act_text JSONL file to use instead of synthetic acts.')
+    parser.add_argument('--repeat', type=int, default=3)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = SyntheticCorpus(acts=args.acts, bills=args.bills, act_paragraphs=(50, 300), bill_paragraphs=(5, 10))
+    if args.acts_path:
+        texts = [Document.from_record(doc).segments[0] for doc in iter_json_docs(args.acts_path)]
+    else:
+        html_parser = get_parser()
+        texts = [html_parser.texts_by_class(corpus.act_fulltext_page(act_id), 'div', 'docContents')[0]
+                 for act_id in corpus.acts]
+    bodies = [split_document_at_language_transition(text)[0] for text in texts]
+    pages = [corpus.bill_page(bill_id) for bill_id in corpus.bills]
+    preprocessor = ActCAPreprocessor(local_cache=tempfile.gettempdir())
+    rules = preprocessor.title_rules()
+
+    mismatches = sum(legacy_title(body, preprocessor.act_title_regex) != parse_title(body, rules) for body in bodies)
+    mismatches += sum(legacy_status(page) != (getattr(match_bill_status(page), 'rule', None) or 'in_progress')
+                      for page in pages)
+    if mismatches:
+        raise SystemExit(f'{mismatches} documents differ between the legacy and compiled patterns')
+    titles = collections.Counter('none' if m is None else 'prefix' if m.in_prefix else 'full'
+                                 for m in map(rules.search, bodies))
+    statuses = collections.Counter(getattr(match_bill_status(page), 'rule', 'in_progress') for page in pages)
+
+    results = {
+        'title[findall]': best_pass(lambda body: legacy_title(body, preprocessor.act_title_regex), bodies, args.repeat),
+        'title[pattern_set]': best_pass(lambda body: parse_title(body, rules), bodies, args.repeat),
+        'status[sequential]': best_pass(legacy_status, pages, args.repeat),
+        'status[pattern_set]': best_pass(match_bill_status, pages, args.repeat),
+    }
+    print(f'{len(bodies)} acts ({sum(map(len, bodies)) / len(bodies):.0f} chars on average), titles found: '
+          f'{dict(titles)}; {len(pages)} bill pages, statuses: {dict(statuses)}')
+    raise SystemExit(report(results, args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+End-to-end crawl -> preprocess benchmark against a local mock of the government sites, so no network is needed.
+Runs BillCrawler and ActCrawler against MockGovServer, then ActCAPreprocessor and ParlCAPreprocessor on their
+output, and reports the time of each stage. Then times the same work done by the streaming LegislationPipeline,
+whose stages overlap.
+
+    python -m benchmarks.pipeline --acts 200 --bills 200 --latency 0.05 --error-rate 0.05
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.harness import add_arguments, report
+from goviq.entities.http_cache import HttpCache
+from goviq.pipeline import LegislationPipeline
+from goviq.preprocessing.acts_ca import ActCAPreprocessor
+from goviq.preprocessing.parl_ca import ParlCAPreprocessor
+from goviq.scrapers.acts_ca import ActCrawler
+from goviq.scrapers.parl_ca import BillCrawler
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.tests.mock_server import MockGovServer, local_crawler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--acts', type=int, default=200)
+    parser.add_argument('--bills', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02, help='Mean server response delay in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with a 503.')
+    parser.add_argument('--parse-workers', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None, help='Preprocessor worker processes.')
+    parser.add_argument('--html-parser', choices=['html.parser', 'lxml'], default='html.parser')
+    parser.add_argument('--http-cache', action='store_true',
+                        help='Crawl twice through an HTTP cache and also time the second, conditional crawl.')
+    add_arguments(parser)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    corpus = SyntheticCorpus(acts=args.acts, bills=args.bills)
+    server = MockGovServer(corpus, latency=args.latency, error_rate=args.error_rate)
+    results = {}
+    with server as base_url, tempfile.TemporaryDirectory() as tmp:
+        http_cache = HttpCache(os.path.join(tmp, 'http_cache')) if args.http_cache else None
+        options = dict(local_cache=tmp, http_cache=http_cache, parse_workers=args.parse_workers,
+                       html_parser=args.html_parser)
+
+        def crawl(suffix=''):
+            start = time.perf_counter()
+            bills_path = local_crawler(BillCrawler, base_url)(**options).crawl()
+            results[f'crawl_bills{suffix}'] = time.perf_counter() - start
+            start = time.perf_counter()
+            acts_path = local_crawler(ActCrawler, base_url)(**options).crawl()
+            results[f'crawl_acts{suffix}'] = time.perf_counter() - start
+            return bills_path, acts_path
+
+        bills_path, acts_path = crawl()
+        if args.http_cache:
+            crawl('[cached]')
+
+        start = time.perf_counter()
+        with ActCAPreprocessor(local_cache=tmp, num_processes=args.processes) as act_preprocessor:
+            acts = act_preprocessor.preprocess(acts_path)
+        results['preprocess_acts'] = time.perf_counter() - start
+        start = time.perf_counter()
+        with ParlCAPreprocessor(local_cache=tmp, num_processes=args.processes,
+                                html_parser=args.html_parser) as bill_preprocessor:
+            bills = bill_preprocessor.preprocess(bills_path, os.path.join(tmp, 'processed_' + os.path.basename(acts_path)))
+        results['preprocess_bills'] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        options = dict(local_cache=tmp, parse_workers=args.parse_workers, html_parser=args.html_parser)
+        with MockGovServer(corpus, latency=args.latency, error_rate=args.error_rate) as base_url:
+            pipeline = LegislationPipeline(local_cache=tmp, num_processes=args.processes, html_parser=args.html_parser,
+                                           act_crawler=local_crawler(ActCrawler, base_url)(**options),
+                                           bill_crawler=local_crawler(BillCrawler, base_url)(**options), index=False)
+            start = time.perf_counter()
+            pipeline.run()
+            results['streaming_pipeline'] = time.perf_counter() - start
+
+    print(f'{len(acts)}/{args.acts} acts, {len(bills)}/{args.bills} bills; server saw {server.requests} requests, '
+          f'injected {server.errors} errors, answered {server.not_modified} with 304')
+    raise SystemExit(report(results, args))
+
+
+if __name__ == '__main__':
+    main()
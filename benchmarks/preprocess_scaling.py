@@ -0,0 +1,48 @@
+"""
+Throughput of ActCAPreprocessor and ParlCAPreprocessor across worker process counts, on synthetic documents.
+
+    python -m benchmarks.preprocess_scaling --acts 400 --bills 400
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from goviq.preprocessing.acts_ca import ActCAPreprocessor
+from goviq.preprocessing.parl_ca import ParlCAPreprocessor
+from goviq.tests.fixtures import synthetic_acts, synthetic_bills, write_jsonl
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--acts', type=int, default=400)
+    parser.add_argument('--bills', type=int, default=400)
+    parser.add_argument('--processes', type=int, nargs='+', help='Process counts to run. Defaults to 1, 2, 4 ... CPUs.')
+    args = parser.parse_args()
+    cpus = os.cpu_count()
+    counts = args.processes or sorted({1, cpus} | {2 ** k for k in range(1, 8) if 2 ** k < cpus})
+    rng = random.Random(0)
+    titles, acts = synthetic_acts(args.acts, rng)
+    bills = synthetic_bills(args.bills, titles, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        acts_path = os.path.join(tmp, 'act_text.jsonl')
+        bills_path = os.path.join(tmp, 'bill_text.jsonl')
+        write_jsonl(acts_path, acts)
+        write_jsonl(bills_path, bills)
+        print(f'{cpus} CPUs, {args.acts} acts, {args.bills} bills')
+        print(f"{'processes':>9} {'acts/s':>10} {'bills/s':>10}")
+        for processes in counts:
+            with ActCAPreprocessor(local_cache=tmp, num_processes=processes) as act_preprocessor:
+                start = time.perf_counter()
+                act_preprocessor.preprocess(acts_path)
+                act_rate = args.acts / (time.perf_counter() - start)
+            with ParlCAPreprocessor(local_cache=tmp, num_processes=processes) as bill_preprocessor:
+                start = time.perf_counter()
+                bill_preprocessor.preprocess(bills_path, os.path.join(tmp, 'processed_act_text.jsonl'))
+                bill_rate = args.bills / (time.perf_counter() - start)
+            print(f'{processes:>9} {act_rate:>10.1f} {bill_rate:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,49 @@ import logging
 def get_local_cache_path():
     path = os.getenv('GOVIQ_LOCAL_PATH', '')
     if not path:
-        raise RuntimeWarning('GOVIQ_LOCAL_PATH ENV variable not set. Using working directory as default path.')
-    else:
-        if not os.path.exists(path):
-            logging.info(f'Directory not found at {path}. Creating directory.')
-            os.makedirs(path)
+        path = os.getcwd()
+        logging.warning(f'GOVIQ_LOCAL_PATH ENV variable not set. Using working directory {path} as default path.')
+    elif not os.path.exists(path):
+        logging.info(f'Directory not found at {path}. Creating directory.')
+        os.makedirs(path)
     return path
 
 
-LOCAL_CACHE = get_local_cache_path()
+class Settings:
+    """
+    Package settings, resolved from the environment the first time they are read rather than at import, so importing
+    goviq (e.g. in a pool worker or a short-lived job) has no side effects and cannot fail on configuration.
+    """
+
+    def __init__(self):
+        self._local_cache = None
+
+    @property
+    def local_cache(self) -> str:
+        """
+        Default directory for crawler and preprocessor output: $GOVIQ_LOCAL_PATH, created if missing, or the
+        working directory if unset.
+        """
+        if self._local_cache is None:
+            self._local_cache = get_local_cache_path()
+        return self._local_cache
+
+    @local_cache.setter
+    def local_cache(self, path: str) -> None:
+        self._local_cache = path
+
+    def reset(self) -> None:
+        """
+        Forgets resolved settings, so they are read from the environment again on next access.
+        """
+        self._local_cache = None
+
+
+settings = Settings()
+
+
+def __getattr__(name: str):
+    # LOCAL_CACHE used to be computed at import. Resolve it on access instead, for code still importing it.
+    if name == 'LOCAL_CACHE':
+        return settings.local_cache
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,35 @@
+"""
+Configuration for the laws-lois.justice.gc.ca scraper: the markup of the provision structure on FullText.html pages.
+Class names are compared case-insensitively, the site is not consistent about e.g. lawLabel / lawlabel.
+"""
+import regex as re
+
+# Element classes that open a provision, and the provision kind. Listed from the outermost level in.
+STRUCTURE_CLASSES = {
+    'part': 'part',
+    'section': 'section',
+    'subsection': 'subsection',
+    'paragraph': 'paragraph',
+}
+# A provision runs until the next one of the same or a higher level, since its paragraphs and subsections follow
+# it as sibling lists rather than nested inside it. Headings with these classes also end the open sections.
+BOUNDARY_CLASSES = frozenset(['subheading', 'division', 'scheduleheading'])
+# Elements whose text is the label of the provision: PART I, 12, (3), (a)
+LABEL_CLASSES = {
+    'hpartlabel': 'part',
+    'sectionlabel': 'section',
+    'lawlabel': None,  # The innermost open subsection or paragraph
+}
+# Marginal notes precede the provision they describe and are included in its span
+MARGINAL_NOTE_CLASS = 'marginalnote'
+
+PART_LABEL_PATTERN = re.compile(r'^\s*PART\s+', re.IGNORECASE)
+
+# "Bank Act, s. 12(3)", "Bank Act section 12(3)(a)", "Bank Act, Part I"
+CITATION_PATTERN = re.compile(
+    r'^\s*(?P<act>.+?),?\s+(?:'
+    r'(?:s\.|ss\.|sec\.|section)\s*(?P<section>\d+(?:\.\d+)*(?:\([0-9a-zA-Z.]+\))*)'
+    r'|part\s+(?P<part>[0-9IVXLC.]+)'
+    r')\s*$',
+    re.IGNORECASE,
+)
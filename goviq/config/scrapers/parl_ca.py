@@ -1,13 +1,75 @@
 """
-Configuration for the parl.ca scraper. This scraper is used to scrape bills in current session of parliament.
+Configuration for the parl.ca scraper: the paginated LegisInfo bill listings and the bill page markup.
 """
-from bs4 import BeautifulSoup
-ROOT_URL = 'https://www.parl.ca/legisinfo/en/bills?page={}'  # String format in page number
+from typing import Iterable, List
 
-# Write a functon that returns each bill link: /legisinfo/en/bill/44-1/s-1 where the final number in the url is the bill number which is variable. The function must accept the raw htlm for the entire webpage.
-def get_bill_links(html):
-    soup = BeautifulSoup(html, 'html.parser')
-    links = soup.find_all('a', class_='title')
-    return [link['href'] for link in links if link['href'].startswith('/legisinfo/en/bill')]
+import regex as re
 
+from goviq.parsing import get_parser
+from goviq.patterns import RuleMatch, compile_rules
 
+# Paginated LegisInfo listing of the bills of one parliament session (e.g. 44-1), pages numbered from 1
+BILL_LIST_PATH = '/legisinfo/en/bills?parlsession={session}&page={page}'
+# Without a session LegisInfo lists the bills of the current session
+CURRENT_BILL_LIST_PATH = '/legisinfo/en/bills?page={page}'
+# Session ranges are expanded to sessions 1..MAX_SESSIONS_PER_PARLIAMENT of every parliament in the range.
+# Sessions that did not happen have empty listings and cost a single request.
+MAX_SESSIONS_PER_PARLIAMENT = 3
+SESSION_PATTERN = re.compile(r'^(\d+)-(\d+)$')
+
+
+def get_bill_links(html, parser='html.parser'):
+    """Return the bill links on a listing page, e.g. /legisinfo/en/bill/44-1/s-1, in page order without repeats."""
+    links = get_parser(parser).attrs_by_class(html, 'a', 'title', 'href')
+    return list(dict.fromkeys(link for link in links if link.startswith('/legisinfo/en/bill')))
+
+
+def _parse_session(session: str):
+    match = SESSION_PATTERN.match(session.strip())
+    if match is None:
+        raise ValueError(f'Invalid parliament session {session!r}, expected <parliament>-<session> such as 44-1')
+    return int(match[1]), int(match[2])
+
+
+def parse_sessions(sessions: str | Iterable[str]) -> List[str]:
+    """
+    Expand a session specification into a list of sessions, in order and without repeats.
+    Accepts a list of sessions or a comma separated string of sessions and inclusive ranges: '43-2,44-1' or
+    '42-1:44-1'.
+    """
+    items = sessions.split(',') if isinstance(sessions, str) else sessions
+    expanded = []
+    for item in items:
+        if ':' not in item:
+            expanded.append('{}-{}'.format(*_parse_session(item)))
+            continue
+        first, last = (_parse_session(part) for part in item.split(':', 1))
+        if first > last:
+            raise ValueError(f'Empty session range {item!r}')
+        for parliament in range(first[0], last[0] + 1):
+            for session in range(1, MAX_SESSIONS_PER_PARLIAMENT + 1):
+                if first <= (parliament, session) <= last:
+                    expanded.append(f'{parliament}-{session}')
+    return list(dict.fromkeys(expanded))
+
+
+# Final status of a bill as stated on its LegisInfo page, by priority.
+DROPPED_PATTERN = r'This bill was not proceeded with on | This bill was dropped from the'
+DEFEATED_PATTERN = r'This bill was defeated on'
+ROYAL_ASSENT_PATTERN = r'This bill received royal assent on'
+STATUS_PATTERNS = (
+    ('dropped', DROPPED_PATTERN),
+    ('defeated', DEFEATED_PATTERN),
+    ('royal_assent', ROYAL_ASSENT_PATTERN),
+)
+
+
+def match_bill_status(html) -> RuleMatch | None:
+    """Return the status rule matching the raw html of a LegisInfo bill page, found in a single scan, or None."""
+    return compile_rules(STATUS_PATTERNS).search(html)
+
+
+def parse_bill_status(html):
+    """Return the final status of a bill from the raw html of its LegisInfo page."""
+    matched = match_bill_status(html)
+    return matched.rule if matched is not None else 'in_progress'
@@ -0,0 +1,105 @@
+"""
+Near-duplicate detection for chunks of text. Signatures are MinHash sketches computed with one-permutation hashing:
+each word shingle is hashed once and the minimum is kept per bin, which costs one hash per shingle instead of one
+per shingle and permutation. Signatures are bucketed by LSH bands so a new text is only compared with candidates.
+"""
+import hashlib
+import re
+from typing import Dict, Hashable, List, Tuple
+
+_WORD_RE = re.compile(r'\w+')
+_MASK = (1 << 64) - 1
+
+
+def _hash(text: str) -> int:
+    # Stable across processes, unlike hash(), so signatures computed in pool workers are comparable
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def normalize(text: str) -> str:
+    """Lowercased words separated by single spaces, so formatting and punctuation differences do not matter"""
+    return ' '.join(_WORD_RE.findall(text.lower()))
+
+
+def minhash(text: str, num_perm: int = 64, shingle_size: int = 5) -> Tuple[int, ...]:
+    """
+    Returns the num_perm value MinHash signature of the text's word shingles. The fraction of equal positions of two
+    signatures estimates the Jaccard similarity of their shingle sets.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= shingle_size:
+        shingles = [' '.join(words)]
+    else:
+        shingles = (' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1))
+    bins: List[int | None] = [None] * num_perm
+    for shingle in shingles:
+        h = _hash(shingle)
+        b = h % num_perm
+        value = h // num_perm
+        if bins[b] is None or value < bins[b]:
+            bins[b] = value
+    # Densify: an empty bin borrows the value of the next non-empty bin, offset by the distance to it
+    filled = [i for i, value in enumerate(bins) if value is not None]
+    if len(filled) < num_perm:
+        for i in range(num_perm):
+            if bins[i] is None:
+                distance = next(d for d in range(1, num_perm + 1) if bins[(i + d) % num_perm] is not None)
+                bins[i] = (bins[(i + distance) % num_perm] + distance * 0x9E3779B97F4A7C15) & _MASK
+    return tuple(bins)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over MinHash signatures. With 64 values in 16 bands of 4 rows, texts with a Jaccard similarity of 0.8
+    are candidates with probability > 0.999, while unrelated texts rarely share a band.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8):
+        """
+        :param num_perm: Signature length. Must be divisible by bands.
+        :param bands: Number of LSH bands.
+        :param threshold: Minimum estimated Jaccard similarity for two texts to count as duplicates.
+        """
+        if num_perm % bands:
+            raise ValueError(f'num_perm {num_perm} is not divisible by bands {bands}')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[Hashable]] = {}
+        self._signatures: Dict[Hashable, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def find(self, signature: Tuple[int, ...]) -> Hashable | None:
+        """
+        Returns the key of an indexed near duplicate of the signature, or None.
+        """
+        seen = set()
+        for band in range(self.bands):
+            band_key = (band, signature[band * self.rows:(band + 1) * self.rows])
+            for key in self._buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if similarity(signature, self._signatures[key]) >= self.threshold:
+                    return key
+        return None
+
+    def add(self, key: Hashable, signature: Tuple[int, ...]) -> Hashable | None:
+        """
+        Indexes the signature under key, unless it is a near duplicate of an indexed one. Returns the key of that
+        near duplicate, or None if the signature was added.
+        """
+        duplicate = self.find(signature)
+        if duplicate is not None:
+            return duplicate
+        self._signatures[key] = signature
+        for band in range(self.bands):
+            self._buckets.setdefault((band, signature[band * self.rows:(band + 1) * self.rows]), []).append(key)
+        return None
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict
+
+
+class CrawlCheckpoint:
+    """
+    Progress of a crawl streaming to a JSONL file, saved periodically so that a crawl that dies partway (crash, OOM,
+    network loss, Ctrl-C) can be resumed instead of restarted: the output file, its size and record count as of the
+    save, and the URLs completed by then. Each completed URL maps to the line of its record in the output, or to None
+    if it produced no record because it was unchanged since the last incremental crawl.
+    """
+
+    def __init__(self, path: str, every: int = 100, interval: float = 30.0):
+        """
+        :param path: JSON file the checkpoint is read from and saved to.
+        :param every: A save is due after this many URLs completed since the last one.
+        :param interval: A save is due this many seconds after the last one, if any URL completed since.
+        """
+        self.path = path
+        self.every = every
+        self.interval = interval
+        self.output = None
+        self.offset = 0
+        self.count = 0
+        self.completed: Dict[str, int | None] = {}
+        # Content hashes of the completed URLs, for the manifest of an incremental crawl
+        self.hashes: Dict[str, str] = {}
+        self._pending = 0
+        self._saved_at = time.monotonic()
+
+    def load(self) -> bool:
+        """
+        Reads a saved checkpoint. Returns False if there is none, it is unreadable, or its output file is gone.
+        """
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (IOError, ValueError) as e:
+            logging.warning(f'Could not read crawl checkpoint {self.path}, starting over: {e}')
+            return False
+        if not os.path.exists(state['output'] + '.part'):
+            logging.warning(f"Output {state['output']}.part of crawl checkpoint {self.path} is missing, starting over")
+            return False
+        self.output = state['output']
+        self.offset = state['offset']
+        self.count = state['count']
+        self.completed = state['completed']
+        self.hashes = state['hashes']
+        return True
+
+    def complete(self, url: str, line: int = None, content_hash: str = None) -> None:
+        """
+        Marks a URL as done, with the line of its record in the output if it produced one.
+        """
+        self.completed[url] = line
+        if content_hash is not None:
+            self.hashes[url] = content_hash
+        self._pending += 1
+
+    def due(self) -> bool:
+        return self._pending >= self.every or (self._pending and time.monotonic() - self._saved_at >= self.interval)
+
+    def save(self, output: str, offset: int, count: int) -> None:
+        """
+        Records that the first offset bytes of output + '.part', holding count records, are final.
+        """
+        self.output, self.offset, self.count = output, offset, count
+        state: Dict[str, Any] = {'output': output, 'offset': offset, 'count': count, 'saved_at': time.time(),
+                                 'completed': self.completed, 'hashes': self.hashes}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+        self._saved_at = time.monotonic()
+
+    def discard(self) -> None:
+        """
+        Deletes the saved checkpoint once the crawl it tracks has finished.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,223 @@
+import json
+import logging
+import mmap
+import os
+import shutil
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List
+
+COLUMNAR_SUFFIX = '.corpus'
+FORMAT_VERSION = 1
+_ABSENT = object()
+
+
+def is_columnar(path: str) -> bool:
+    """Return True if the path is a columnar corpus directory written by ColumnarWriter"""
+    return path.rstrip('/\\').endswith(COLUMNAR_SUFFIX)
+
+
+class ColumnarWriter:
+    """
+    Writes documents as a columnar corpus: a directory holding the body of every document back to back in one
+    UTF-8 blob (bodies.bin), the byte offset of each body (offsets.bin, n + 1 unsigned 64 bit integers) and one JSON
+    file per metadata field (columns/<field>.json). A document without a body, or whose body is None, is recorded
+    as such in meta.json and read back the same way. Bodies are streamed to disk as they are written; only the
+    metadata is held in memory until close.
+    Like JsonlWriter, the corpus is written to <path>.part and moved into place on close.
+    """
+
+    def __init__(self, path: str, body_field: str = 'body'):
+        """
+        :param path: Output directory, e.g. processed_act_text_20240101000000.corpus. Replaced if it exists.
+        :param body_field: Document field stored in the memory-mapped blob. Every other field becomes a column.
+        """
+        self.path = path.rstrip('/\\')
+        self.tmp_path = self.path + '.part'
+        self.body_field = body_field
+        self.count = 0
+        self._columns: Dict[str, List[Any]] = {}
+        self._offsets = array('Q', [0])
+        # Documents lacking a body, and documents whose body is None
+        self._no_body: List[int] = []
+        self._null_bodies: List[int] = []
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(os.path.join(self.tmp_path, 'columns'))
+        self._bodies = open(os.path.join(self.tmp_path, 'bodies.bin'), 'wb')
+
+    def write(self, doc: dict) -> None:
+        body = doc.get(self.body_field, _ABSENT)
+        if body is _ABSENT:
+            self._no_body.append(self.count)
+        elif body is None:
+            self._null_bodies.append(self.count)
+        else:
+            self._bodies.write(body.encode('utf-8'))
+        self._offsets.append(self._bodies.tell())
+        for field, value in doc.items():
+            if field == self.body_field:
+                continue
+            if field not in self._columns:
+                self._columns[field] = [_ABSENT] * self.count
+            self._columns[field].append(value)
+        self.count += 1
+        for values in self._columns.values():
+            if len(values) < self.count:
+                values.append(_ABSENT)
+
+    def close(self) -> str:
+        """
+        Writes the offsets and columns and atomically moves the corpus into place. Returns the final path.
+        """
+        if self._bodies.closed:
+            return self.path
+        self._bodies.close()
+        with open(os.path.join(self.tmp_path, 'offsets.bin'), 'wb') as f:
+            self._offsets.tofile(f)
+        absent = {}
+        for field, values in self._columns.items():
+            missing = [i for i, value in enumerate(values) if value is _ABSENT]
+            if missing:
+                absent[field] = missing
+            with open(os.path.join(self.tmp_path, 'columns', field + '.json'), 'w', encoding='utf-8') as f:
+                json.dump([None if value is _ABSENT else value for value in values], f, ensure_ascii=False)
+        if self._no_body:
+            absent[self.body_field] = self._no_body
+        meta = {'version': FORMAT_VERSION, 'count': self.count, 'body_field': self.body_field,
+                'byteorder': sys.byteorder, 'columns': list(self._columns), 'absent': absent,
+                'null_bodies': self._null_bodies}
+        with open(os.path.join(self.tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+        logging.info(f'Wrote {self.count} records to {self.path}')
+        return self.path
+
+    def abort(self) -> None:
+        if not self._bodies.closed:
+            self._bodies.close()
+            logging.warning(f'Left {self.count} unfinished records in {self.tmp_path}')
+
+    def __enter__(self) -> 'ColumnarWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ColumnarCorpus:
+    """
+    Read-only view of a corpus written by ColumnarWriter. Opening it only reads meta.json and maps the body blob
+    and offsets, so it is instant regardless of corpus size. Bodies are sliced from the mapping on access, and
+    metadata columns are loaded on first use. The mapping is backed by the OS page cache, so worker processes
+    that open the same corpus share its pages rather than each holding a copy. Pickles as its path, so it can be
+    handed to pool workers, which map it again on their side.
+    """
+
+    def __init__(self, path: str):
+        self.path = path.rstrip('/\\')
+        with open(os.path.join(self.path, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar corpus version {meta['version']} in {self.path}")
+        self.body_field = meta['body_field']
+        self.fields = meta['columns']
+        self._count = meta['count']
+        self._absent = {field: frozenset(rows) for field, rows in meta['absent'].items()}
+        self._null_bodies = frozenset(meta.get('null_bodies', ()))
+        self._columns: Dict[str, List[Any]] = {}
+        self._files = []
+        self._bodies = self._map('bodies.bin')
+        offsets = self._map('offsets.bin')
+        if meta['byteorder'] == sys.byteorder:
+            self._offsets = memoryview(offsets).cast('Q')
+        else:
+            self._offsets = array('Q', offsets)
+            self._offsets.byteswap()
+
+    def _map(self, name: str) -> mmap.mmap | bytes:
+        f = open(os.path.join(self.path, name), 'rb')
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped
+            return b''
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files.append(mapping)
+        return mapping
+
+    def __len__(self) -> int:
+        return self._count
+
+    def body_bytes(self, i: int) -> memoryview:
+        """
+        Returns the UTF-8 body of document i as a zero-copy view into the mapping.
+        """
+        return memoryview(self._bodies)[self._offsets[i]:self._offsets[i + 1]]
+
+    def body(self, i: int) -> str:
+        return str(self._bodies[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def column(self, field: str) -> List[Any]:
+        """
+        Returns the values of a metadata field for all documents, None where a document lacks it.
+        """
+        if field not in self._columns:
+            if field not in self.fields:
+                raise KeyError(field)
+            with open(os.path.join(self.path, 'columns', field + '.json'), 'r', encoding='utf-8') as f:
+                self._columns[field] = json.load(f)
+        return self._columns[field]
+
+    def absent(self, field: str) -> frozenset:
+        """
+        Returns the indices of the documents that lack a metadata field, or the body field.
+        """
+        return self._absent.get(field, frozenset())
+
+    def __getitem__(self, i: int) -> dict:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        doc = {}
+        for field in self.fields:
+            if i not in self.absent(field):
+                doc[field] = self.column(field)[i]
+        if i in self._null_bodies:
+            doc[self.body_field] = None
+        elif i not in self.absent(self.body_field):
+            doc[self.body_field] = self.body(i)
+        return doc
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self) -> None:
+        """
+        Unmaps the corpus. Views returned by body_bytes must have been released first.
+        """
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._offsets = None
+        self._bodies = None
+        for f in reversed(self._files):
+            f.close()
+        self._files = []
+
+    def __enter__(self) -> 'ColumnarCorpus':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['path'])
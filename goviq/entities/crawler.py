@@ -1,43 +1,263 @@
 import asyncio
-import aiohttp
 import logging
+import os
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Callable, Iterable, List
+from urllib.parse import urlsplit
+
+from goviq.config.local_cache import settings
+from goviq.entities.checkpoint import CrawlCheckpoint
+from goviq.entities.document import Document
+from goviq.entities.http_cache import HttpCache
+from goviq.entities.manifest import CrawlManifest
+from goviq.entities.metrics import Metrics
+from goviq.entities.rate_limit import ConcurrencyBudget, RateLimiter, parse_retry_after
+from goviq.entities.writer import JsonlWriter
+from goviq.utils import content_hash, datestamp, iter_json_docs
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logging.getLogger().setLevel(logging.INFO)
 
 class Crawler(ABC):
     """
     Base crawler providing asynchronous fetching and parsing.
-    Subclasses must implement _parse (async) and _cache.
+    Subclasses must implement _parse (async) and crawl. A source crawled by the pipeline (see goviq.scrapers for the
+    registry) also sets name and output_name and implements discover; crawl_async then crawls it to a file.
     """
     user_agent = (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_14_5) "
         "AppleWebKit/605.1.15 (KHTML, like Gecko) "
         "Version/12.1.1 Safari/605.1.15"
     )
+    local_cache = None
+    retry_statuses = frozenset({429, 500, 502, 503, 504})
+    # Statuses by which a server asks clients to slow down
+    throttle_statuses = frozenset({429, 503})
+    # Bump when _parse changes its output so parse results cached by the HTTP cache are recomputed
+    parse_version = 1
+    # True if _parse fetches further pages the document is built from. Such a crawler's parse results are not cached
+    # by page body, and in incremental mode it is checked for changes after parsing, against _document_digest
+    parse_fetches_pages = False
+    # Document.source of the pages this crawler emits
+    source = None
+    # Registry name of the source, and the name of its crawl output files, {output_name}_<datestamp>.jsonl
+    name = None
+    output_name = None
+    # Crawls streaming to a file save a resumable checkpoint after this many completed URLs or seconds
+    checkpoint_every = 100
+    checkpoint_interval = 30.0
 
-    def __init__(self, max_concurrent_tasks: int = 50):
+    def __init__(self, max_concurrent_tasks: int = 50, http_cache: HttpCache = None, limit_per_host: int = 50,
+                 keepalive_timeout: float = 30.0, parse_workers: int = 0, parse_concurrency: int = None,
+                 parse_queue_size: int = None, max_retries: int = 4, retry_backoff: float = 1.0,
+                 max_backoff: float = 60.0, rate_limiter: RateLimiter = None, html_parser: str = 'html.parser',
+                 metrics: Metrics = None, budget: ConcurrencyBudget = None, local_cache: str = None):
         """
-        :param max_concurrent_tasks: Limits the number of concurrent fetches.
+        :param max_concurrent_tasks: Number of crawl workers and total size of the connection pool. Also limits the
+            number of concurrent fetches unless a shared budget is given.
+        :param http_cache: Optional on-disk response cache. When set, fetches are conditional GETs and
+            unchanged pages are served from disk without being parsed again.
+        :param limit_per_host: Maximum number of pooled connections to any single host, and the ceiling of the
+            default rate limiter's per-host concurrency.
+        :param keepalive_timeout: Seconds an idle pooled connection is kept open for reuse.
+        :param parse_workers: Number of processes to parse pages in. 0 parses inline on the event loop.
+            When > 0, _crawl runs as a two-stage pipeline: fetch workers feed a bounded queue drained by parse tasks
+            that hand CPU-bound parsing to a process pool.
+        :param parse_concurrency: Number of parse tasks draining the queue. Defaults to twice parse_workers so the
+            pool is never idle waiting on the event loop.
+        :param parse_queue_size: Capacity of the fetch -> parse queue. Fetching blocks when it is full.
+            Defaults to twice parse_concurrency.
+        :param max_retries: How many times a failed fetch is retried.
+        :param retry_backoff: Base of the exponential backoff between retries. Each wait is drawn uniformly from
+            [0, retry_backoff * 2 ** attempt] so that throttled workers do not retry in lockstep.
+        :param max_backoff: Upper bound on a single backoff wait, including one requested through Retry-After.
+        :param rate_limiter: Per-host adaptive concurrency limiter and circuit breaker. Defaults to one whose
+            per-host limit starts low and grows up to limit_per_host while the server keeps up.
+        :param html_parser: Parser backend used by _parse, 'html.parser' or 'lxml'. See goviq.parsing.
+        :param metrics: Registry the crawl's timings, sizes and counters are recorded in. A fresh one by default.
+        :param budget: Global limit on concurrent fetches, shared with other crawlers running on the same event loop
+            so that together they stay within it. Defaults to one of max_concurrent_tasks for this crawler alone.
+            Share rate_limiter too so that crawlers fetching from the same host are limited together.
+        :param local_cache: Directory path for cached output. Defaults to settings.local_cache when a crawl starts.
         """
-        self.semaphore = asyncio.Semaphore(max_concurrent_tasks)
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter(max_limit=limit_per_host)
+        self.html_parser = html_parser
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.budget = budget if budget is not None else ConcurrencyBudget(max_concurrent_tasks)
+        if local_cache:
+            self.local_cache = local_cache
+        self.http_cache = http_cache
+        # Long-lived pooled session, open for the duration of _session_scope
+        self.session = None
+        self.parse_workers = parse_workers
+        self.parse_concurrency = parse_concurrency or 2 * parse_workers
+        self.parse_queue_size = parse_queue_size or 2 * self.parse_concurrency
+        # Process pool used by _offload, open for the duration of _executor_scope
+        self._executor = None
+        # Set by _open_manifest for incremental crawls
+        self.manifest = None
+        self._content_hashes = {}
+        self._emitted_urls = []
+        # Set by _crawl_to_file while a crawl streams to a file
+        self.checkpoint = None
+        # Optional callable each emitted record is also handed to, e.g. to stream records to a downstream stage
+        self.on_record = None
 
-    async def _fetch(self, url: str, session: aiohttp.ClientSession) -> str | None:
+    def _make_session(self) -> 'aiohttp.ClientSession':
+        # aiohttp is imported when a crawl starts, not with the module, to keep importing goviq cheap
+        import aiohttp
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrent_tasks,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+
+    def _trace_config(self) -> 'aiohttp.TraceConfig':
         """
-        Asynchronously fetches the text content of a URL.
-        Returns None if any network error or non-200 status occurs.
+        Hooks aiohttp's request tracing into the crawler's metrics: DNS resolution, waiting for a pooled connection,
+        connection setup and time to first byte (response headers received), per request.
         """
+        import aiohttp
+        metrics = self.metrics
+        trace_config = aiohttp.TraceConfig()
+
+        def timing(start_attr: str, metric: str):
+            async def on_start(session, ctx, params):
+                setattr(ctx, start_attr, time.perf_counter())
+
+            async def on_end(session, ctx, params):
+                metrics.observe(metric, time.perf_counter() - getattr(ctx, start_attr))
+            return on_start, on_end
+
+        async def on_request_end(session, ctx, params):
+            metrics.inc('http_responses_total', status=params.response.status)
+
+        async def on_request_exception(session, ctx, params):
+            metrics.inc('http_request_errors_total', error=type(params.exception).__name__)
+
+        async def on_connection_reuseconn(session, ctx, params):
+            metrics.inc('http_connections_reused_total')
+
+        for signal, metric in (('request', 'http_ttfb_seconds'), ('dns_resolvehost', 'http_dns_seconds'),
+                               ('connection_queued', 'http_pool_wait_seconds'),
+                               ('connection_create', 'http_connect_seconds')):
+            on_start, on_end = timing(f'{signal}_start', metric)
+            getattr(trace_config, f'on_{signal}_start').append(on_start)
+            getattr(trace_config, f'on_{signal}_end').append(on_end)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    @asynccontextmanager
+    async def _session_scope(self) -> AsyncIterator['aiohttp.ClientSession']:
+        """
+        Yields the crawler's shared pooled session, opening it if needed.
+        Nested scopes reuse the open session; the outermost scope closes it.
+        """
+        if self.session is not None and not self.session.closed:
+            yield self.session
+            return
+        self.session = self._make_session()
         try:
-            async with session.get(url, headers={"User-Agent": self.user_agent}) as resp:
-                if resp.status == 200:
-                    return await resp.text()
-                else:
-                    logging.warning(f"Fetch failed ({resp.status}) for {url}")
+            yield self.session
+        finally:
+            await self.session.close()
+            self.session = None
+
+    def _backoff(self, attempt: int, retry_after: float = None) -> float:
+        """
+        Seconds to wait before the given retry attempt: the server's Retry-After if it sent one, otherwise
+        exponential backoff with full jitter. Capped at max_backoff.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.retry_backoff * 2 ** attempt, self.max_backoff))
+
+    async def _fetch(self, url: str, session: 'aiohttp.ClientSession', conditional: bool = True) -> str | None:
+        """
+        Asynchronously fetches the text content of a URL.
+        If an HTTP cache is configured, sends the cached validators and serves 304 responses from disk. If the cached
+        body has gone missing, the URL is requested again without validators; that request is not a retry.
+        Each request holds a slot of the host's adaptive limit and of the global budget; 429/503 responses and
+        failures shrink the host's limit and Retry-After pauses the host. Retries network errors and retryable
+        statuses (429, 5xx) up to max_retries times with jittered exponential backoff, without holding any slot
+        while waiting. Returns None if any network error or non-200 status persists.
+        """
+        import aiohttp
+        headers = {"User-Agent": self.user_agent}
+        if self.http_cache is not None and conditional:
+            headers.update(self.http_cache.validators(url))
+        host = urlsplit(url).netloc
+        attempt = 0
+        while attempt <= self.max_retries:
+            can_retry = attempt < self.max_retries
+            retry_after = None
+            wait_start = time.perf_counter()
+            try:
+                async with self.rate_limiter.slot(host):
+                    slot_acquired = time.perf_counter()
+                    self.metrics.observe('host_slot_wait_seconds', slot_acquired - wait_start)
+                    async with self.budget.slot(host):
+                        self.metrics.observe('budget_wait_seconds', time.perf_counter() - slot_acquired)
+                        async with session.get(url, headers=headers) as resp:
+                            if resp.status in self.throttle_statuses:
+                                retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                                self.rate_limiter.throttled(host, retry_after)
+                            elif resp.status >= 500:
+                                self.rate_limiter.failure(host)
+                            else:
+                                self.rate_limiter.success(host)
+                            if resp.status == 304 and self.http_cache is not None and conditional:
+                                body = self.http_cache.not_modified(url)
+                                if body is not None:
+                                    self.metrics.inc('http_cache_hits_total')
+                                    return body
+                                logging.warning(f"Cached body missing for {url}, refetching")
+                                # Nothing failed, so request the full page again without using up a retry
+                                conditional = False
+                                headers = {"User-Agent": self.user_agent}
+                                continue
+                            if resp.status == 200:
+                                download_start = time.perf_counter()
+                                # text() decodes the body read here rather than reading it again
+                                data = await resp.read()
+                                text = await resp.text()
+                                self.metrics.observe('http_download_seconds', time.perf_counter() - download_start)
+                                self.metrics.observe('response_bytes', len(data))
+                                if self.http_cache is not None:
+                                    self.http_cache.store(url, text, resp.headers)
+                                return text
+                            if resp.status not in self.retry_statuses or not can_retry:
+                                logging.warning(f"Fetch failed ({resp.status}) for {url}")
+                                self.metrics.inc('fetch_failures_total')
+                                return None
+                            logging.warning(f"Fetch failed ({resp.status}) for {url}, retrying")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.rate_limiter.failure(host)
+                if not can_retry:
+                    logging.warning(f"Client error fetching {url}: {e!r}")
+                    self.metrics.inc('fetch_failures_total')
                     return None
-        except aiohttp.ClientError as e:
-            logging.warning(f"Client error fetching {url}: {e}")
-            return None
+                logging.warning(f"Client error fetching {url}, retrying: {e!r}")
+            self.metrics.inc('fetch_retries_total')
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+        return None
 
     @abstractmethod
     async def _parse(self, html: str) -> Any:
@@ -47,47 +267,428 @@ class Crawler(ABC):
         """
         raise NotImplementedError()
 
-    async def _fetch_and_parse(self, url: str, session: aiohttp.ClientSession) -> Dict[str, Any] | None:
+    async def _offload(self, func: Callable, *args) -> Any:
         """
-        Fetches the given URL and then calls the subclass's _parse method on the HTML.
-        Returns a dict {url: parsed_data} or None if something failed.
+        Runs a CPU-bound, picklable function in the parse process pool if one is open, otherwise inline.
+        Subclasses call this from _parse so that HTML parsing does not stall in-flight downloads.
+        Its duration is recorded as parse_seconds; anything else _parse awaits, such as fetching a linked page, is
+        not parse time and reports through the fetch metrics.
+        """
+        with self.metrics.timer('parse_seconds'):
+            if self._executor is None:
+                return func(*args)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @asynccontextmanager
+    async def _executor_scope(self) -> AsyncIterator[None]:
+        """
+        Opens the parse process pool if parse_workers is set. Nested scopes reuse the open pool.
+        """
+        if self.parse_workers <= 0 or self._executor is not None:
+            yield
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            yield
+        finally:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def _fetch_page(self, url: str, session: 'aiohttp.ClientSession') -> str | None:
+        """
+        Fetch stage: downloads the URL, returning None if it failed or is unchanged since the last incremental crawl.
         """
-        async with self.semaphore:
-            logging.info(f"Crawling: {url}")
+        logging.info(f"Crawling: {url}")
+        with self.metrics.timer('fetch_seconds'):
             html = await self._fetch(url, session)
-            if html is None:
-                return None
-            parsed_data = await self._parse(html)
-            return {url: parsed_data}
+        if html is None:
+            return None
+        if self.manifest is not None and not self.parse_fetches_pages:
+            if self._is_unchanged(url, self._digest(url, html)):
+                return self._skip_unchanged(url)
+        return html
+
+    def _skip_unchanged(self, url: str) -> None:
+        logging.info(f"Unchanged since last crawl: {url}")
+        self.metrics.inc('unchanged_pages_total')
+        if self.checkpoint is not None:
+            self.checkpoint.complete(url)
 
-    async def _crawl(self, links: List[str]) -> List[Dict[str, Any]]:
+    async def _fetch_and_parse(self, url: str, session: 'aiohttp.ClientSession') -> Document | None:
         """
-        Crawls all given links (fetch + parse), returning a list of {url: parsed_data} dicts.
-        Skips any link that fails.
+        Fetches the given URL and then calls the subclass's _parse method on the HTML.
+        Returns the Document or None if something failed.
         """
-        results = []
-        connector = aiohttp.TCPConnector(limit=50)  # Adjust limit as needed
-        async with aiohttp.ClientSession(connector=connector) as session:
-            tasks = [self._fetch_and_parse(link, session) for link in links]
-            raw_results = await asyncio.gather(*tasks, return_exceptions=True)
+        html = await self._fetch_page(url, session)
+        if html is None:
+            return None
+        return self._to_document(url, html, await self._parse_cached(url, html))
+
+    def _document(self, url: str, parsed_data: Any) -> Document:
+        """
+        Maps the output of _parse onto a Document. Subclasses override this to fill in its body, segments and
+        metadata; by default the output is kept in metadata['parsed'].
+        """
+        return Document(url, self.source, metadata={'parsed': parsed_data})
+
+    def _to_document(self, url: str, html: str, parsed_data: Any) -> Document | None:
+        """
+        Builds the Document of a parsed page, or returns None if parse_fetches_pages is set and neither the page nor
+        the pages _parse fetched changed since the last incremental crawl.
+        """
+        if self.manifest is not None and self.parse_fetches_pages:
+            if self._is_unchanged(url, self._document_digest(url, html, parsed_data)):
+                return self._skip_unchanged(url)
+        document = self._document(url, parsed_data)
+        document.fetched_at = time.time()
+        document.content_hash = self._content_hashes.get(url) or self._document_digest(url, html, parsed_data)
+        return document
+
+    def _digest(self, url: str, html: str) -> str:
+        """
+        Content hash of a fetched page, taken from the HTTP cache if it already hashed the body.
+        """
+        digest = self.http_cache.content_hash(url) if self.http_cache is not None else None
+        return digest if digest is not None else content_hash(html)
+
+    def _document_digest(self, url: str, html: str, parsed_data: Any) -> str:
+        """
+        Content hash of a document. The page's own hash unless parse_fetches_pages is set, in which case subclasses
+        override this to also cover the pages _parse fetched.
+        """
+        return self._digest(url, html)
+
+    def _is_unchanged(self, url: str, digest: str) -> bool:
+        """
+        Checks the content hash of a page against the crawl manifest.
+        """
+        if self.manifest.is_unchanged(url, digest):
+            return True
+        self._content_hashes[url] = digest
+        return False
 
-        for item in raw_results:
-            if isinstance(item, Exception):
+    def _parse_key(self) -> str:
+        """
+        Identifies the parse results of this crawler in the HTTP cache: the class defining _parse and its
+        parse_version, so crawlers parsing the same URL differently (BillCrawler and BillStatusCrawler) do not read
+        each other's results.
+        """
+        parser_class = next(cls for cls in type(self).__mro__ if '_parse' in vars(cls))
+        return f"{parser_class.__module__}.{parser_class.__qualname__}:{self.parse_version}"
+
+    async def _parse_cached(self, url: str, html: str) -> Any:
+        """
+        Parses the HTML, reusing the cached parse result if the page body has not changed since it was stored.
+        Results that depend on other pages (parse_fetches_pages) are not cached, as the page body does not date them.
+        """
+        if self.http_cache is None or self.parse_fetches_pages:
+            return await self._parse(html)
+        parsed_data = self.http_cache.get_parsed(url, self._parse_key())
+        if parsed_data is not None:
+            self.metrics.inc('parse_cache_hits_total')
+            return parsed_data
+        parsed_data = await self._parse(html)
+        self.http_cache.store_parsed(url, parsed_data, self._parse_key())
+        return parsed_data
+
+    async def _worker(self, queue: asyncio.Queue, session: 'aiohttp.ClientSession',
+                      sink: Callable[[Document], None]) -> None:
+        """
+        Pulls links off the queue until it receives the None sentinel, passing successful results to sink.
+        """
+        while True:
+            link = await queue.get()
+            try:
+                if link is None:
+                    return
+                item = await self._fetch_and_parse(link, session)
+                if item is not None:
+                    sink(item)
+            except Exception as e:
                 # Log the exception but continue
-                logging.error(f"Task raised an exception: {item}")
-            elif item is not None:
-                results.append(item)
+                logging.error(f"Task for {link} raised an exception: {e}")
+            finally:
+                queue.task_done()
+
+    async def _fetch_worker(self, queue: asyncio.Queue, parse_queue: asyncio.Queue,
+                            session: 'aiohttp.ClientSession') -> None:
+        """
+        Pipeline fetch stage: downloads links from the queue and hands (url, html) to the parse queue.
+        """
+        while True:
+            link = await queue.get()
+            try:
+                if link is None:
+                    return
+                html = await self._fetch_page(link, session)
+                if html is not None:
+                    self.metrics.observe('parse_queue_depth', parse_queue.qsize())
+                    await parse_queue.put((link, html))
+            except Exception as e:
+                logging.error(f"Fetch for {link} raised an exception: {e}")
+            finally:
+                queue.task_done()
+
+    async def _parse_worker(self, parse_queue: asyncio.Queue, sink: Callable[[Document], None]) -> None:
+        """
+        Pipeline parse stage: parses fetched pages until it receives the None sentinel.
+        """
+        while True:
+            item = await parse_queue.get()
+            try:
+                if item is None:
+                    return
+                url, html = item
+                document = self._to_document(url, html, await self._parse_cached(url, html))
+                if document is not None:
+                    sink(document)
+            except Exception as e:
+                logging.error(f"Parse for {item[0]} raised an exception: {e}")
+            finally:
+                parse_queue.task_done()
 
+    def _sink(self, results: List[Document], writer: JsonlWriter = None) -> Callable[[Document], None]:
+        """
+        Returns the callable each completed Document is handed to: the writer if streaming to disk,
+        otherwise the in-memory results list. Tracks emitted URLs for the manifest in incremental mode, and completed
+        URLs for the checkpoint, saving it when due.
+        """
+        emit = writer.write if writer is not None else results.append
+        if self.manifest is None and self.checkpoint is None and self.on_record is None:
+            return emit
+
+        def emit_and_track(document: Document) -> None:
+            emit(document)
+            if self.on_record is not None:
+                self.on_record(document)
+            if self.manifest is not None:
+                self._emitted_urls.append(document.url)
+            if self.checkpoint is not None:
+                self.checkpoint.complete(document.url, writer.count - 1, self._content_hashes.get(document.url))
+                if self.checkpoint.due():
+                    self._save_checkpoint(writer)
+        return emit_and_track
+
+    @staticmethod
+    async def _iterate(links: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+        if hasattr(links, '__aiter__'):
+            async for link in links:
+                yield link
+        else:
+            for link in links:
+                yield link
+
+    async def _crawl(self, links: Iterable[str] | AsyncIterable[str],
+                     writer: JsonlWriter = None) -> List[Document]:
+        """
+        Crawls all given links (fetch + parse), returning a list of Documents.
+        links may be an async iterable, such as a discovery stage that yields links while it is still running;
+        they are fetched as they arrive.
+        If a writer is given, each record is streamed to it as soon as it completes and nothing is kept in memory
+        (the returned list is empty).
+        Links are fed through a bounded queue to a fixed pool of workers sharing one pooled session, so the number
+        of in-flight requests and open sockets stays constant however many links there are.
+        With parse_workers set, fetching and parsing run as separate stages joined by a bounded queue.
+        Skips any link that fails.
+        """
+        results = []
+        sink = self._sink(results, writer)
+        async with self._session_scope() as session, self._executor_scope():
+            queue = asyncio.Queue(maxsize=self.max_concurrent_tasks * 2)
+            if self.parse_workers > 0:
+                parse_queue = asyncio.Queue(maxsize=self.parse_queue_size)
+                workers = [asyncio.create_task(self._fetch_worker(queue, parse_queue, session))
+                           for _ in range(self.max_concurrent_tasks)]
+                parsers = [asyncio.create_task(self._parse_worker(parse_queue, sink))
+                           for _ in range(self.parse_concurrency)]
+            else:
+                workers = [asyncio.create_task(self._worker(queue, session, sink))
+                           for _ in range(self.max_concurrent_tasks)]
+                parsers = []
+            try:
+                async for link in self._iterate(links):
+                    self.metrics.observe('fetch_queue_depth', queue.qsize())
+                    await queue.put(link)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+                for _ in parsers:
+                    await parse_queue.put(None)
+                await asyncio.gather(*parsers)
+            finally:
+                # Stops the workers if the crawl was interrupted; no-op once they have returned
+                for task in workers + parsers:
+                    task.cancel()
+                await asyncio.gather(*workers, *parsers, return_exceptions=True)
         return results
 
-    @abstractmethod
-    def _cache(self, data: List[Dict[str, Any]], filename: str = "data") -> None:
+    def _save_http_cache(self) -> None:
         """
-        Persists the crawler's results to local storage.
-        Must be implemented by subclass.
+        Flushes the HTTP cache index to disk and logs its hit/miss counters.
+        """
+        if self.http_cache is None:
+            return
+        self.http_cache.save()
+        logging.info(f"HTTP cache stats: {self.http_cache.stats()}")
+
+    def _report_metrics(self, name: str) -> str | None:
+        """
+        Adds end-of-run HTTP cache and rate limiter state to the metrics and writes the report under
+        {local_cache}/metrics. Returns the path of the JSON report.
+        """
+        if self.http_cache is not None:
+            for stat, value in self.http_cache.stats().items():
+                self.metrics.set(f'http_cache_{stat}', value)
+        for host, state in self.rate_limiter.stats().items():
+            self.metrics.set('host_concurrency_limit', state['limit'], host=host)
+            self.metrics.set('host_circuit_open', int(state['circuit'] != 'closed'), host=host)
+        try:
+            return self.metrics.dump(os.path.join(self.local_cache, 'metrics'), name)
+        except IOError as e:
+            logging.error(f"Error writing metrics report for {name}: {e}")
+            return None
+
+    def _open_writer(self, filename: str, compression: str = None) -> JsonlWriter:
+        """
+        Opens a streaming JSONL writer for {local_cache}/{filename}_{datestamp}.jsonl[.gz|.zst].
+        """
+        return JsonlWriter(os.path.join(self.local_cache, f"{filename}_{datestamp()}.jsonl"), compression=compression)
+
+    def _cache(self, data: Iterable[Document], filename: str = "data", compression: str = None) -> str | None:
+        """
+        Persists already collected results to a datestamped JSONL file. Returns the path written, or None on failure.
+        """
+        try:
+            with self._open_writer(filename, compression) as writer:
+                for item in data:
+                    writer.write(item)
+            return writer.path
+        except IOError as e:
+            logging.error(f"Error writing cache file for {filename}: {e}")
+            return None
+
+    def _open_manifest(self, filename: str) -> None:
+        """
+        Loads the crawl manifest for the given output name, enabling incremental mode.
+        """
+        self.manifest = CrawlManifest(os.path.join(self.local_cache, f"{filename}_manifest.json"))
+        self._emitted_urls = []
+        logging.info(f"Incremental crawl: {len(self.manifest)} URLs in manifest")
+
+    def _finish_incremental(self, delta_path: str, filename: str, compression: str = None) -> None:
+        """
+        Folds the records of a delta file into the merged {filename}_latest.jsonl view, streaming both files,
+        and records the hashes and output location of the delta's URLs in the manifest.
+        """
+        delta_urls = set(self._emitted_urls)
+        merged_path = os.path.join(self.local_cache, f"{filename}_latest.jsonl")
+        writer = JsonlWriter(merged_path, compression=compression)
+        with writer:
+            if os.path.exists(writer.path):
+                for item in iter_json_docs(writer.path):
+                    if Document.url_of(item) not in delta_urls:
+                        # Records of crawls before Document are rewritten in its format
+                        writer.write(Document.from_record(item))
+            for item in iter_json_docs(delta_path):
+                writer.write(item)
+        logging.info(f"Merged {len(delta_urls)} changed items into {writer.path} ({writer.count} total)")
+        self.manifest.record_all(self._content_hashes, delta_urls, delta_path)
+        self.manifest.save()
+
+    def _save_checkpoint(self, writer: JsonlWriter) -> None:
+        self.checkpoint.save(writer.path, writer.checkpoint(), writer.count)
+        self.metrics.inc('checkpoints_total')
+
+    def _resume_writer(self) -> JsonlWriter:
+        """
+        Reopens the unfinished output of the loaded checkpoint, dropping records written after it was saved, and
+        restores the incremental crawl state of the URLs it completed.
+        """
+        checkpoint = self.checkpoint
+        writer = JsonlWriter.for_path(checkpoint.output, offset=checkpoint.offset, count=checkpoint.count)
+        if self.manifest is not None:
+            self._content_hashes.update(checkpoint.hashes)
+            self._emitted_urls.extend(url for url, line in checkpoint.completed.items() if line is not None)
+        logging.info(f"Resuming crawl into {writer.tmp_path}: {len(checkpoint.completed)} URLs done, "
+                     f"{writer.count} records kept")
+        return writer
+
+    async def _pending(self, links: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+        """
+        Yields the links the checkpoint has not completed yet.
+        """
+        async for link in self._iterate(links):
+            if link in self.checkpoint.completed:
+                self.metrics.inc('resumed_skips_total')
+                continue
+            yield link
+
+    async def _crawl_to_file(self, links: Iterable[str] | AsyncIterable[str], filename: str, incremental: bool = False,
+                             compression: str = None, resume: bool = False) -> str:
+        """
+        Crawls the links, streaming records to a datestamped JSONL file as they complete.
+        In incremental mode the file is a delta of new or changed records, merged into {filename}_latest.jsonl.
+        Progress is checkpointed to {output name}_checkpoint.json every checkpoint_every completed URLs or
+        checkpoint_interval seconds, and when the crawl fails or is interrupted. With resume, a crawl that did not
+        finish is continued in its original output file and only the links it had not completed are fetched.
+        Returns the path written.
+        """
+        output_name = f"{filename}_delta" if incremental else filename
+        self.checkpoint = CrawlCheckpoint(os.path.join(self.local_cache, f"{output_name}_checkpoint.json"),
+                                          every=self.checkpoint_every, interval=self.checkpoint_interval)
+        try:
+            if resume and self.checkpoint.load():
+                writer = self._resume_writer()
+            else:
+                writer = self._open_writer(output_name, compression)
+            with writer:
+                try:
+                    await self._crawl(self._pending(links), writer=writer)
+                except BaseException:
+                    self._save_checkpoint(writer)
+                    logging.warning(f"Crawl interrupted after {len(self.checkpoint.completed)} URLs, "
+                                    f"resume it from {self.checkpoint.path}")
+                    raise
+            if incremental:
+                self._finish_incremental(writer.path, filename, compression)
+            self.checkpoint.discard()
+            return writer.path
+        finally:
+            self.checkpoint = None
+
+    def discover(self) -> Iterable[str] | AsyncIterable[str]:
+        """
+        Returns the links of the pages to crawl, e.g. an async generator walking the source's index or listing
+        pages. Links are fetched as they are yielded. Must be implemented by sources crawled with crawl_async.
         """
         raise NotImplementedError()
 
+    async def crawl_async(self, incremental: bool = False, compression: str = None, resume: bool = False) -> str:
+        """
+        Crawls the discovered links to {output_name}_<datestamp>.jsonl, one Document per line, on the running event
+        loop, so several sources can be crawled concurrently within a shared budget. Returns the path written.
+
+        :param incremental: Only parse and write pages that are new or changed since the last incremental crawl.
+            Writes an {output_name}_delta_<datestamp>.jsonl file and updates {output_name}_latest.jsonl.
+        :param compression: None, 'gzip' or 'zstd'.
+        :param resume: Continue the last crawl if it did not finish, fetching only the pages it had not completed.
+        """
+        if self.local_cache is None:
+            self.local_cache = settings.local_cache
+        if incremental:
+            self._open_manifest(self.output_name)
+        logging.info(f"Beginning crawl of {self.name or type(self).__name__}")
+        try:
+            # Discovery and the crawl share one pooled session
+            async with self._session_scope():
+                path = await self._crawl_to_file(self.discover(), self.output_name, incremental=incremental,
+                                                 compression=compression, resume=resume)
+            logging.info(f"Completed crawl of {self.name or type(self).__name__}")
+            return path
+        finally:
+            self._save_http_cache()
+            self._report_metrics(self.output_name)
+
     @abstractmethod
     def crawl(self) -> None:
         """
@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List
+
+ACT = 'act'
+BILL = 'bill'
+
+
+@dataclass(slots=True)
+class Document:
+    """
+    A crawled page as emitted by the crawlers, written to their JSONL output and read by the preprocessors.
+    Serialized flat, one JSON object per document, by goviq.utils.dumps (orjson if installed).
+    Replaces the single-key {url: payload} records of earlier crawls, which from_record still reads.
+    """
+    url: str
+    # ACT or BILL
+    source: str
+    # Bills: the HTML of the bill's text
+    body: str | None = None
+    # Acts: the text of each <div class="docContents">
+    segments: List[str] | None = None
+    fetched_at: float | None = None
+    content_hash: str | None = None
+    # Acts: {'sections': provision tree per segment}. Bills: {'status': final status}
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @staticmethod
+    def is_record(record: dict) -> bool:
+        """
+        True for a serialized Document, False for a legacy {url: payload} record.
+        """
+        return 'url' in record and 'source' in record
+
+    @staticmethod
+    def url_of(record: 'Document | dict') -> str:
+        if isinstance(record, Document):
+            return record.url
+        return record['url'] if Document.is_record(record) else next(iter(record))
+
+    @classmethod
+    def from_record(cls, record: 'Document | dict') -> 'Document':
+        """
+        Reads a serialized Document or a legacy crawl record: an act as {url: [segments]} or
+        {url: {'segments', 'sections'}}, a bill as {url: html} or {url: {'html', 'status'}}.
+        """
+        if isinstance(record, Document):
+            return record
+        if cls.is_record(record):
+            return cls(**record)
+        url, value = next(iter(record.items()))
+        if isinstance(value, list):
+            return cls(url, ACT, segments=value)
+        if isinstance(value, str) or value is None:
+            return cls(url, BILL, body=value)
+        if 'segments' in value:
+            return cls(url, ACT, segments=value['segments'], metadata={'sections': value.get('sections')})
+        return cls(url, BILL, body=value.get('html'), metadata={'status': value.get('status')})
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Mapping
+
+from goviq.utils import content_hash
+
+
+class HttpCache:
+    """
+    Persistent on-disk HTTP response cache used by Crawler._fetch.
+    Stores each response body together with its validators (ETag, Last-Modified and a content hash) so that
+    subsequent crawls can issue conditional GETs and skip both the download and the re-parse on a 304.
+    Entries are evicted least-recently-used first once the cache grows beyond max_bytes.
+    """
+    index_filename = 'index.json'
+
+    def __init__(self, path: str, max_bytes: int = 2 * 1024 ** 3):
+        """
+        :param path: Directory the cache lives in. Created if missing.
+        :param max_bytes: Upper bound on the total size of cached bodies and parsed results.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        if not os.path.exists(path):
+            logging.info(f'Directory not found at {path}. Creating directory.')
+            os.makedirs(path)
+        self._entries = self._load_index()
+        self._size = sum(entry['size'] for entry in self._entries.values())
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index_path = os.path.join(self.path, self.index_filename)
+        if not os.path.exists(index_path):
+            return {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            logging.warning(f'Could not read HTTP cache index {index_path}, starting empty: {e}')
+            return {}
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, url: str) -> str:
+        return os.path.join(self.path, self._key(url) + '.body')
+
+    def _parsed_path(self, url: str) -> str:
+        return os.path.join(self.path, self._key(url) + '.parsed.json')
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """
+        Returns the conditional request headers (If-None-Match / If-Modified-Since) for a cached URL.
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def content_hash(self, url: str) -> str | None:
+        entry = self._entries.get(url)
+        return entry['hash'] if entry else None
+
+    def get(self, url: str) -> str | None:
+        """
+        Returns the cached body for a URL, or None if it is not cached (or the body file has gone missing).
+        """
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        try:
+            with open(self._body_path(url), 'r', encoding='utf-8') as f:
+                body = f.read()
+        except IOError:
+            self._drop(url)
+            return None
+        entry['last_access'] = time.time()
+        return body
+
+    def not_modified(self, url: str) -> str | None:
+        """
+        Records a 304 response for the URL and returns the cached body.
+        """
+        body = self.get(url)
+        if body is not None:
+            self.hits += 1
+            self.bytes_saved += self._entries[url]['body_size']
+        return body
+
+    def store(self, url: str, body: str, headers: Mapping[str, str]) -> str:
+        """
+        Stores a fresh 200 response. Returns the content hash of the body.
+        A previously parsed result is kept only if the body is unchanged.
+        """
+        self.misses += 1
+        digest = content_hash(body)
+        entry = self._entries.get(url)
+        if entry is not None and entry['hash'] == digest:
+            entry.update(etag=headers.get('ETag'), last_modified=headers.get('Last-Modified'), last_access=time.time())
+            return digest
+        data = body.encode('utf-8')
+        with open(self._body_path(url), 'wb') as f:
+            f.write(data)
+        if entry is not None:
+            self._size -= entry['size']
+            if entry.get('parsed_hash') is not None and os.path.exists(self._parsed_path(url)):
+                os.remove(self._parsed_path(url))
+        self._entries[url] = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'hash': digest,
+            'body_size': len(data),
+            'size': len(data),
+            'parsed_hash': None,
+            'last_access': time.time(),
+        }
+        self._size += len(data)
+        self._evict(keep=url)
+        return digest
+
+    def get_parsed(self, url: str, version: int | str = 1) -> Any:
+        """
+        Returns the parsed result stored for the current body of the URL by the given parser version, or None.
+        Crawlers pass a version naming both the parser and its version, as one URL may be parsed by several.
+        """
+        entry = self._entries.get(url)
+        if entry is None or entry.get('parsed_hash') != entry['hash'] or entry.get('parsed_version', 1) != version:
+            return None
+        try:
+            with open(self._parsed_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            entry['parsed_hash'] = None
+            return None
+
+    def store_parsed(self, url: str, data: Any, version: int | str = 1) -> None:
+        """
+        Stores the parsed result for the current body of the URL so that an unchanged page is not parsed again.
+        The version identifies the parser that produced it; results of other versions are ignored by get_parsed.
+        """
+        entry = self._entries.get(url)
+        if entry is None or data is None:
+            return
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        with open(self._parsed_path(url), 'wb') as f:
+            f.write(payload)
+        self._size += len(payload) - (entry['size'] - entry['body_size'])
+        entry['size'] = entry['body_size'] + len(payload)
+        entry['parsed_hash'] = entry['hash']
+        entry['parsed_version'] = version
+        self._evict(keep=url)
+
+    def _drop(self, url: str) -> None:
+        entry = self._entries.pop(url, None)
+        if entry is None:
+            return
+        self._size -= entry['size']
+        for path in (self._body_path(url), self._parsed_path(url)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _evict(self, keep: str = None) -> None:
+        if self._size <= self.max_bytes:
+            return
+        for url in sorted(self._entries, key=lambda u: self._entries[u]['last_access']):
+            if self._size <= self.max_bytes:
+                break
+            if url == keep:
+                continue
+            self._drop(url)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'size': self._size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes_saved': self.bytes_saved,
+            'evictions': self.evictions,
+        }
+
+    def save(self) -> None:
+        """
+        Writes the cache index to disk. Bodies are written eagerly, so only the index needs flushing.
+        """
+        index_path = os.path.join(self.path, self.index_filename)
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, index_path)
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator
+
+
+class CrawlManifest:
+    """
+    Persistent record of crawl state: URL -> last fetched time, content hash and the output file holding its record.
+    Used by incremental crawls to skip pages whose content has not changed since the previous run.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: JSON file the manifest is read from and saved to.
+        """
+        self.path = path
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            logging.warning(f'Could not read crawl manifest {self.path}, treating all URLs as new: {e}')
+            return {}
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def get(self, url: str) -> Dict[str, Any] | None:
+        return self._entries.get(url)
+
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        """
+        Returns True if the URL was crawled before with the same content hash. Refreshes its fetch time if so.
+        """
+        entry = self._entries.get(url)
+        if entry is None or entry['hash'] != content_hash:
+            return False
+        entry['fetched_at'] = time.time()
+        return True
+
+    def record(self, url: str, content_hash: str, output: str) -> None:
+        self._entries[url] = {'fetched_at': time.time(), 'hash': content_hash, 'output': output}
+
+    def remove(self, url: str) -> None:
+        self._entries.pop(url, None)
+
+    def record_all(self, hashes: Dict[str, str], urls: Iterable[str], output: str) -> None:
+        """
+        Records every URL in urls with its hash from hashes as living in the given output file.
+        """
+        for url in urls:
+            if url in hashes:
+                self.record(url, hashes[url], output)
+
+    def save(self) -> None:
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+        logging.info(f'Saved crawl manifest with {len(self._entries)} entries to {self.path}')
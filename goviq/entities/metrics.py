@@ -0,0 +1,197 @@
+import bisect
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from goviq.utils import datestamp
+
+# Upper bounds of the default histogram buckets, by the unit the metric name ends in
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus style, plus exact count, sum, min and max.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Estimates the q-quantile by linear interpolation within the bucket it falls in.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else min(self.min, self.buckets[0])
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+def _default_buckets(name: str) -> Sequence[float]:
+    if name.endswith('_seconds'):
+        return SECONDS_BUCKETS
+    if name.endswith('_bytes'):
+        return BYTES_BUCKETS
+    return COUNT_BUCKETS
+
+
+def _label_str(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and histograms for one crawl or preprocessing run.
+    Recording is a dict update, cheap enough to do per URL and per document.
+    Reported at the end of a run as JSON and as Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self.counters: Dict[LabelKey, float] = {}
+        self.gauges: Dict[LabelKey, float] = {}
+        self.histograms: Dict[LabelKey, Histogram] = {}
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        self.gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Records a value in the named histogram. Buckets are chosen by the name's unit suffix (_seconds, _bytes).
+        """
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(_default_buckets(name))
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def total(self, name: str) -> float:
+        """
+        Sum of a counter, or of a histogram's observations, across all label sets.
+        """
+        counted = sum(value for (key, _), value in self.counters.items() if key == name)
+        observed = sum(h.sum for (key, _), h in self.histograms.items() if key == name)
+        return counted + observed
+
+    def to_dict(self) -> Dict[str, Any]:
+        def flatten(values: Dict[LabelKey, Any]) -> Dict[str, Any]:
+            return {name + _label_str(labels): value for (name, labels), value in sorted(values.items())}
+        return {
+            'started': self.started,
+            'elapsed_seconds': time.time() - self.started,
+            'counters': flatten(self.counters),
+            'gauges': flatten(self.gauges),
+            'histograms': {k: h.to_dict() for k, h in flatten(self.histograms).items()},
+        }
+
+    def to_prometheus(self, prefix: str = 'goviq_') -> str:
+        lines: List[str] = []
+        typed = set()
+
+        def type_line(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {prefix}{name} {kind}')
+
+        for (name, labels), value in sorted(self.counters.items()):
+            type_line(name, 'counter')
+            lines.append(f'{prefix}{name}{_label_str(labels)} {value}')
+        for (name, labels), value in sorted(self.gauges.items()):
+            type_line(name, 'gauge')
+            lines.append(f'{prefix}{name}{_label_str(labels)} {value}')
+        for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+            type_line(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                lines.append(f'{prefix}{name}_bucket{_label_str(labels, (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{prefix}{name}_sum{_label_str(labels)} {histogram.sum}')
+            lines.append(f'{prefix}{name}_count{_label_str(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> str:
+        """
+        One line comparing time spent on the network with time spent parsing, with latency percentiles.
+        """
+        parts = [f'elapsed {time.time() - self.started:.1f}s']
+        for name in ('fetch_seconds', 'http_ttfb_seconds', 'parse_seconds', 'preprocess_item_seconds'):
+            histograms = [h for (key, _), h in self.histograms.items() if key == name]
+            if not histograms:
+                continue
+            merged = histograms[0] if len(histograms) == 1 else None
+            total = sum(h.sum for h in histograms)
+            count = sum(h.count for h in histograms)
+            detail = f' p50 {merged.quantile(0.5):.3f}s p95 {merged.quantile(0.95):.3f}s' if merged else ''
+            parts.append(f'{name} n={count} total {total:.1f}s{detail}')
+        return '; '.join(parts)
+
+    def dump(self, directory: str, name: str) -> str:
+        """
+        Writes {directory}/{name}_metrics_{datestamp}.json and a .prom file next to it. Returns the JSON path.
+        """
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        base = os.path.join(directory, f'{name}_metrics_{datestamp()}')
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        with open(base + '.prom', 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        logging.info(f'{name} metrics: {self.summary()}. Report written to {base}.json')
+        return base + '.json'
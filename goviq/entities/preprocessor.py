@@ -1,20 +1,149 @@
 from abc import ABC, abstractmethod
 import json
 import logging
+import multiprocessing
 import os
-from typing import List
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
 
-from goviq.utils import load_json_docs
+from goviq.entities.columnar import COLUMNAR_SUFFIX, ColumnarCorpus, ColumnarWriter, is_columnar
+from goviq.entities.metrics import Metrics
+from goviq.entities.writer import JsonlWriter
+from goviq.utils import is_jsonl, iter_json_docs, load_json_docs
+
+
+def _timed_call(func: Callable[[Any], Any], item: Any) -> Tuple[Any, float]:
+    # Timed inside the worker so queueing and result transfer are not counted as processing time
+    start = time.perf_counter()
+    result = func(item)
+    return result, time.perf_counter() - start
 
 
 class Preprocessor(ABC):
     _version = 1
     local_cache = None
+    # Worker processes used by parallel_map. None means one per CPU; 1 runs inline without a pool.
+    num_processes = None
+    # Documents sent to a worker per round trip
+    chunksize = 8
+    # Write output as a memory-mapped columnar corpus (see goviq.entities.columnar) instead of JSON
+    columnar = False
+    _pool = None
+    _pool_key = None
+    # Depth of with blocks the preprocessor is used in; the pool outlives a call only inside one
+    _entered = 0
+    _metrics = None
+
+    @property
+    def metrics(self) -> Metrics:
+        """
+        Registry the per-document processing times and stage timings of a run are recorded in.
+        """
+        if self._metrics is None:
+            self._metrics = Metrics()
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: Metrics) -> None:
+        self._metrics = metrics
+
+    def parallel_map(self, func: Callable[[Any], Any], items: Iterable[Any], initializer: Callable = None,
+                     initargs: tuple = ()) -> Iterator[Any]:
+        """
+        Applies a picklable module-level func to each item across a reusable worker pool, yielding results as they
+        complete (not in input order). The initializer runs once per worker, so expensive per-run state such as
+        compiled regexes or act matchers is built once per process instead of once per document.
+        The pool is kept for later calls with the same initializer and initargs; call close() when done, or use
+        the preprocessor as a context manager.
+        The time each item takes is recorded in the preprocess_item_seconds histogram, labelled by func.
+        """
+        processes = self.num_processes or os.cpu_count()
+        timed = partial(_timed_call, func)
+        if processes <= 1:
+            if initializer is not None:
+                initializer(*initargs)
+            results = map(timed, items)
+        else:
+            key = (initializer, initargs, processes)
+            if self._pool is None or self._pool_key != key:
+                self.close()
+                self._pool = multiprocessing.Pool(processes=processes, initializer=initializer, initargs=initargs)
+                self._pool_key = key
+            results = self._pool.imap_unordered(timed, items, chunksize=self.chunksize)
+        stage = func.__name__.lstrip('_')
+        for result, seconds in results:
+            self.metrics.observe('preprocess_item_seconds', seconds, stage=stage)
+            yield result
+
+    def close(self) -> None:
+        """
+        Shuts down the worker pool, if one was started.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_key = None
+
+    @contextmanager
+    def _pool_scope(self) -> Iterator[None]:
+        """
+        Wraps a one-shot use of parallel_map, such as preprocess, and shuts the pool down after it unless the
+        preprocessor is used as a context manager, which keeps the pool for later calls.
+        """
+        try:
+            yield
+        finally:
+            if not self._entered:
+                self.close()
+
+    def __enter__(self):
+        self._entered += 1
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._entered -= 1
+        if not self._entered:
+            self.close()
 
     @staticmethod
     def load(path: str) -> List[dict]:
         return load_json_docs(path)
 
+    @staticmethod
+    def iter_load(path: str) -> Iterator[dict]:
+        """
+        Lazily yields documents one at a time, so a stage never has to hold the whole input file in memory.
+        """
+        return iter_json_docs(path)
+
+    @staticmethod
+    def load_column(path: str, field: str) -> List[Any]:
+        """
+        Returns one field of every document that has it. Reads a single column of a columnar corpus without
+        touching the bodies.
+        """
+        if is_columnar(path):
+            with ColumnarCorpus(path) as corpus:
+                if field not in corpus.fields:
+                    return []
+                values = corpus.column(field)
+                absent = corpus.absent(field)
+                return [value for i, value in enumerate(values) if i not in absent]
+        return [doc[field] for doc in iter_json_docs(path) if field in doc]
+
+    def output_path(self, input_path: str) -> str:
+        """
+        Name of the output written for an input file: processed_<input name>, or processed_<input stem>.corpus
+        when writing columnar output.
+        """
+        name = os.path.basename(input_path.rstrip('/\\'))
+        if self.columnar:
+            name = name.split('.')[0] + COLUMNAR_SUFFIX
+        return 'processed_' + name
+
     @abstractmethod
     def preprocess(self, **kwargs) -> List[dict]:
         """
@@ -22,8 +151,33 @@ class Preprocessor(ABC):
         """
         raise NotImplementedError()
 
-    def cache(self, docs: List[dict], path) -> None:
+    def cache(self, docs: Iterable[dict], path) -> None:
+        """
+        Writes docs to path under local_cache, as JSON Lines if the path is a .jsonl[.gz|.zst] file
+        (e.g. when processing JSONL crawler output), as a columnar corpus if it is a .corpus directory and as a
+        JSON array otherwise.
+        """
         out_path = os.path.join(self.local_cache, path)
+        logging.info(f'Writing {type(self)} output to {out_path}')
+        if is_columnar(out_path):
+            with ColumnarWriter(out_path) as writer:
+                for doc in docs:
+                    writer.write(doc)
+            return
+        if is_jsonl(out_path):
+            with JsonlWriter.for_path(out_path) as writer:
+                for doc in docs:
+                    writer.write(doc)
+            return
         with open(out_path, 'w') as f:
-            logging.info(f'Writing {type(self)} output to {out_path}')
             json.dump(docs, f)
+
+    def _report_metrics(self, name: str) -> str | None:
+        """
+        Writes the run's metrics report under {local_cache}/metrics. Returns the path of the JSON report.
+        """
+        try:
+            return self.metrics.dump(os.path.join(self.local_cache, 'metrics'), name)
+        except IOError as e:
+            logging.error(f'Error writing metrics report for {name}: {e}')
+            return None
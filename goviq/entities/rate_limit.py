@@ -0,0 +1,310 @@
+import asyncio
+import collections
+import datetime
+import email.utils
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+
+class HostLimiter:
+    """
+    Adaptive concurrency limit for a single host using AIMD with slow start.
+    The limit grows by one per success until the first throttle (slow start), then by one per window of successes,
+    and is cut multiplicatively when the host signals overload. Requests already in flight when the limit is cut
+    were sent under the old limit, so their throttled responses do not cut it again: a burst of 429s halves the
+    limit once rather than once per response. Retry-After pauses the host entirely.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 50, decrease: float = 0.5):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.threshold = float(max_limit)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        # Responses still due from requests sent before the last cut
+        self._stale = 0
+        self._loop = None
+        self._changed = None
+
+    def _condition(self) -> asyncio.Condition:
+        # A crawler may run several event loops in turn (one asyncio.run per crawl step)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    async def acquire(self) -> None:
+        changed = self._condition()
+        async with changed:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if delay > 0:
+                    # Sleep out the pause, then re-check: it may have been extended meanwhile
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                await changed.wait()
+
+    async def release(self) -> None:
+        changed = self._condition()
+        async with changed:
+            self.in_flight -= 1
+            changed.notify_all()
+
+    def on_success(self) -> None:
+        self._stale = max(self._stale - 1, 0)
+        if self.limit < self.threshold:
+            self.limit = min(self.limit + 1, self.max_limit)
+        else:
+            self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+
+    def on_throttle(self) -> None:
+        if self._stale:
+            self._stale -= 1
+            return
+        self.limit = max(self.limit * self.decrease, self.min_limit)
+        self.threshold = self.limit
+        # Called while the throttled request still holds its slot
+        self._stale = max(self.in_flight - 1, 0)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a host after failure_threshold consecutive failures. After reset_timeout seconds a
+    single trial request is let through (half-open); its success closes the circuit and its failure re-opens it.
+    A trial that never reports back (it was cancelled, or failed in a way that is not recorded) is abandoned, and
+    expires after reset_timeout in any case, so the host is tried again.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+
+    def retry_in(self) -> float:
+        """
+        Returns 0 if a request may be sent now, otherwise the seconds until the circuit lets a trial through.
+        Calling it when the reset timeout has elapsed moves the circuit to half-open and claims the trial.
+        """
+        if self.state == self.CLOSED:
+            return 0.0
+        now = time.monotonic()
+        started = self.opened_at if self.state == self.OPEN else self.trial_started
+        remaining = started + self.reset_timeout - now
+        if remaining <= 0:
+            self.state = self.HALF_OPEN
+            self.trial_started = now
+            return 0.0
+        if self.state == self.HALF_OPEN:
+            # A trial is in flight: check back for its outcome
+            return min(remaining, 1.0)
+        return remaining
+
+    def abandon_trial(self) -> None:
+        """
+        Gives up the claimed trial without an outcome, so that the next request becomes the trial.
+        """
+        if self.state == self.HALF_OPEN:
+            self.trial_started = -self.reset_timeout
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logging.warning(f'Circuit opened after {self.failures} consecutive failures')
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Per-host AIMD concurrency limits and circuit breakers, created on first use of each host.
+    """
+
+    def __init__(self, initial_limit: int = 4, max_limit: int = 50, failure_threshold: int = 10,
+                 reset_timeout: float = 30.0):
+        """
+        :param initial_limit: Concurrent requests allowed to a host before any feedback.
+        :param max_limit: Upper bound on concurrent requests to a host.
+        :param failure_threshold: Consecutive failures that open a host's circuit.
+        :param reset_timeout: Seconds an open circuit waits before letting a trial request through.
+        """
+        self.initial_limit = initial_limit
+        self.max_limit = max_limit
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hosts: Dict[str, HostLimiter] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def host(self, host: str) -> HostLimiter:
+        if host not in self.hosts:
+            self.hosts[host] = HostLimiter(initial_limit=min(self.initial_limit, self.max_limit),
+                                           max_limit=self.max_limit)
+        return self.hosts[host]
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[HostLimiter]:
+        """
+        Waits until the host's circuit lets requests through and a concurrency slot is free, then holds the slot.
+        """
+        breaker = self.breaker(host)
+        while True:
+            delay = breaker.retry_in()
+            if not delay:
+                break
+            await asyncio.sleep(delay)
+        trial = breaker.state == breaker.HALF_OPEN
+        limiter = self.host(host)
+        acquired = False
+        try:
+            await limiter.acquire()
+            acquired = True
+            yield limiter
+        except BaseException:
+            # Errors the caller records come back as failures after this, and re-open the circuit
+            if trial:
+                breaker.abandon_trial()
+            raise
+        finally:
+            if acquired:
+                await limiter.release()
+
+    def success(self, host: str) -> None:
+        self.host(host).on_success()
+        self.breaker(host).record_success()
+
+    def throttled(self, host: str, retry_after: float = None) -> None:
+        """
+        Records an overload response (429/503): cuts the host's limit and honours Retry-After.
+        """
+        self.host(host).on_throttle()
+        if retry_after:
+            self.host(host).pause(retry_after)
+        self.breaker(host).record_failure()
+
+    def failure(self, host: str) -> None:
+        """
+        Records a server error or connection failure.
+        """
+        self.host(host).on_throttle()
+        self.breaker(host).record_failure()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {host: {'limit': round(limiter.limit, 2), 'circuit': self.breaker(host).state}
+                for host, limiter in self.hosts.items()}
+
+
+class ConcurrencyBudget:
+    """
+    A global cap on concurrent requests, shared by every crawler given the same budget. When the budget is spent,
+    freed slots go to the waiting hosts in turn (round-robin) rather than first come, first served, so a source with
+    a long queue of links cannot starve the others of their share while they all run on one event loop.
+    """
+
+    def __init__(self, max_concurrent: int = 100):
+        """
+        :param max_concurrent: Requests in flight across all hosts and crawlers sharing the budget.
+        """
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.granted: Dict[str, int] = collections.Counter()
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        # Hosts with waiters, in the order they are next served
+        self._turns: Deque[str] = collections.deque()
+
+    def _grant(self, host: str) -> None:
+        self.in_flight += 1
+        self.granted[host] += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self.in_flight < self.max_concurrent and self._turns:
+            host = self._turns.popleft()
+            waiters = self._waiters[host]
+            waiter = waiters.popleft()
+            if waiters:
+                self._turns.append(host)
+            else:
+                del self._waiters[host]
+            # Skip waiters cancelled since they queued
+            if not waiter.done():
+                self._grant(host)
+                waiter.set_result(None)
+
+    async def acquire(self, host: str) -> None:
+        if self.in_flight < self.max_concurrent and not self._turns:
+            self._grant(host)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        if host not in self._waiters:
+            self._waiters[host] = collections.deque()
+            self._turns.append(host)
+        self._waiters[host].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if not waiter.cancelled():
+                # Cancelled after being handed a slot: pass it on
+                self._release()
+            elif waiter in self._waiters.get(host, ()):
+                self._waiters[host].remove(waiter)
+                if not self._waiters[host]:
+                    del self._waiters[host]
+                    self._turns.remove(host)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        await self.acquire(host)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.granted)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parses a Retry-After header given either as delay-seconds or as an HTTP date. Returns seconds from now.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max((when - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
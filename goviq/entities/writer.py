@@ -0,0 +1,92 @@
+import logging
+import os
+from typing import Any
+
+from goviq.utils import dumps, open_compressed
+
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+class JsonlWriter:
+    """
+    Append-only JSON Lines writer used to stream crawler and preprocessor output to disk record by record.
+    Records are written to <path>.part and the file is atomically renamed to <path> on close, so a finished
+    file is never partially written and a crashed run leaves its completed records readable in the .part file.
+    """
+
+    def __init__(self, path: str, compression: str = None, flush_every: int = 100, offset: int = None,
+                 count: int = 0):
+        """
+        :param path: Output path, without compression suffix (e.g. act_text_20240101000000.jsonl).
+        :param compression: None, 'gzip' or 'zstd'. Appends .gz / .zst to the path.
+        :param flush_every: Flush the underlying file after this many records.
+        :param offset: Resume an unfinished file: truncate the existing .part file to this size, as returned by
+            checkpoint(), and append to it.
+        :param count: Number of records the resumed .part file holds up to offset.
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f'Unsupported compression {compression}. Expected one of {list(COMPRESSION_SUFFIXES)}')
+        self.path = path + COMPRESSION_SUFFIXES[compression]
+        self.tmp_path = self.path + '.part'
+        self.flush_every = flush_every
+        self.count = count
+        if offset is None:
+            self._file = open_compressed(self.tmp_path, 'wt')
+        else:
+            with open(self.tmp_path, 'r+b') as f:
+                f.truncate(offset)
+            self._file = open_compressed(self.tmp_path, 'at')
+
+    @classmethod
+    def for_path(cls, path: str, **kwargs) -> 'JsonlWriter':
+        """
+        Opens a writer for a path that may already carry a .gz / .zst suffix, inferring the compression from it.
+        """
+        for compression, suffix in COMPRESSION_SUFFIXES.items():
+            if suffix and path.endswith(suffix):
+                return cls(path[:-len(suffix)], compression=compression, **kwargs)
+        return cls(path, **kwargs)
+
+    def write(self, record: Any) -> None:
+        self._file.write(dumps(record))
+        self._file.write('\n')
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+
+    def checkpoint(self) -> int:
+        """
+        Makes the records written so far durable in the .part file and returns its size. For compressed output this
+        ends the current gzip member / zstd frame; readers see the concatenated members as one stream.
+        """
+        self._file.close()
+        offset = os.path.getsize(self.tmp_path)
+        self._file = open_compressed(self.tmp_path, 'at')
+        return offset
+
+    def close(self) -> str:
+        """
+        Closes the file and atomically moves it into place. Returns the final path.
+        """
+        if not self._file.closed:
+            self._file.close()
+            os.replace(self.tmp_path, self.path)
+            logging.info(f'Wrote {self.count} records to {self.path}')
+        return self.path
+
+    def abort(self) -> None:
+        """
+        Closes the file without finalizing it, leaving the records written so far in the .part file.
+        """
+        if not self._file.closed:
+            self._file.close()
+            logging.warning(f'Left {self.count} records in unfinished file {self.tmp_path}')
+
+    def __enter__(self) -> 'JsonlWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
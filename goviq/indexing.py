@@ -0,0 +1,203 @@
+"""
+On-disk search index over preprocessed acts and bills, so consumers can query the corpus without loading the
+processed_*.json files or re-running act matching. Backed by SQLite's FTS5 extension (bundled with Python's sqlite3):
+an inverted index over titles and bodies, plus a table of the act mentions found by ParlCAPreprocessor.
+
+    python -m goviq.indexing search.db --acts processed_act_text_<date>.json --bills processed_bill_text_<date>.json
+"""
+import argparse
+import json
+import logging
+import sqlite3
+from typing import Dict, Iterable, List, Tuple
+
+from goviq.utils import content_hash, iter_json_docs
+
+ACT = 'act'
+BILL = 'bill'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    title TEXT,
+    status TEXT,
+    hash TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(title, body, tokenize='unicode61 remove_diacritics 2');
+CREATE TABLE IF NOT EXISTS mentions (
+    act TEXT NOT NULL,
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    count INTEGER NOT NULL,
+    PRIMARY KEY (act, document_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS mentions_document ON mentions(document_id);
+"""
+
+
+def quote(text: str) -> str:
+    """Return text as a single FTS5 phrase, so it is matched literally rather than parsed as query syntax"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """
+    Inverted index over acts (ActCAPreprocessor output) and bills (ParlCAPreprocessor output), keyed by URL.
+    Adding documents is incremental: a document whose content is unchanged since it was last indexed is skipped,
+    and a changed one replaces its previous version, so newly landed bills can be added to an existing index.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: SQLite database file. Created if it does not exist; ':memory:' for a throwaway index.
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def _upsert(self, url: str, kind: str, title: str | None, body: str, status: str | None = None,
+                mentions: Dict[str, int] = None) -> bool:
+        digest = content_hash(json.dumps([kind, title, body, status, mentions], sort_keys=True))
+        row = self._conn.execute('SELECT id, hash FROM documents WHERE url = ?', (url,)).fetchone()
+        if row is not None and row[1] == digest:
+            return False
+        if row is None:
+            doc_id = self._conn.execute(
+                'INSERT INTO documents (url, kind, title, status, hash) VALUES (?, ?, ?, ?, ?)',
+                (url, kind, title, status, digest)).lastrowid
+        else:
+            doc_id = row[0]
+            self._conn.execute('UPDATE documents SET kind = ?, title = ?, status = ?, hash = ? WHERE id = ?',
+                               (kind, title, status, digest, doc_id))
+            self._conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (doc_id,))
+            self._conn.execute('DELETE FROM mentions WHERE document_id = ?', (doc_id,))
+        self._conn.execute('INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)', (doc_id, title, body))
+        if mentions:
+            self._conn.executemany('INSERT OR REPLACE INTO mentions (act, document_id, count) VALUES (?, ?, ?)',
+                                   [(act.lower(), doc_id, count) for act, count in mentions.items()])
+        return True
+
+    def add_acts(self, acts: Iterable[dict]) -> int:
+        """
+        Indexes preprocessed acts ({'url', 'title', 'body', ...}) in a single transaction.
+        Returns the number of acts that were new or changed.
+        """
+        with self._conn:
+            return sum(self._upsert(act['url'], ACT, act.get('title'), act.get('body', '')) for act in acts)
+
+    def add_bills(self, bills: Iterable[dict]) -> int:
+        """
+        Indexes preprocessed bills ({'link', 'body', 'status', 'act_mentions', ...}) in a single transaction.
+        Returns the number of bills that were new or changed.
+        """
+        with self._conn:
+            return sum(self._upsert(bill['link'], BILL, None, bill.get('body', ''), bill.get('status'),
+                                    bill.get('act_mentions')) for bill in bills)
+
+    def remove(self, url: str) -> bool:
+        with self._conn:
+            row = self._conn.execute('SELECT id FROM documents WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute('DELETE FROM documents_fts WHERE rowid = ?', row)
+            self._conn.execute('DELETE FROM mentions WHERE document_id = ?', row)
+            self._conn.execute('DELETE FROM documents WHERE id = ?', row)
+            return True
+
+    def optimize(self) -> None:
+        """
+        Merges the index segments written by incremental updates. Worth running after a large batch of additions.
+        """
+        with self._conn:
+            self._conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+    def search(self, query: str, kind: str = None, limit: int = 20) -> List[dict]:
+        """
+        Runs an FTS5 query over titles and bodies, best matches first. Terms are ANDed; the full FTS5 syntax is
+        available: "quoted phrases", OR, NOT, prefix*, NEAR(a b, 5) and column filters such as title : bank.
+        Matching is case and accent insensitive.
+        :param query: FTS5 query string. Use search_phrase for untrusted or literal text.
+        :param kind: Restrict results to 'act' or 'bill' documents.
+        :param limit: Maximum number of results.
+        :return: [{'url', 'kind', 'title', 'status', 'snippet'}, ...]
+        """
+        sql = ("SELECT d.url, d.kind, d.title, d.status, snippet(documents_fts, 1, '[', ']', '...', 16) "
+               "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid WHERE documents_fts MATCH ?")
+        params = [query]
+        if kind is not None:
+            sql += ' AND d.kind = ?'
+            params.append(kind)
+        sql += ' ORDER BY bm25(documents_fts) LIMIT ?'
+        params.append(limit)
+        return [{'url': url, 'kind': doc_kind, 'title': title, 'status': status, 'snippet': snippet}
+                for url, doc_kind, title, status, snippet in self._conn.execute(sql, params)]
+
+    def search_phrase(self, phrase: str, kind: str = None, limit: int = 20) -> List[dict]:
+        """
+        Returns the documents containing the exact phrase (modulo case, accents and punctuation).
+        """
+        return self.search(quote(phrase), kind=kind, limit=limit)
+
+    def search_titles(self, text: str, kind: str = ACT, limit: int = 20) -> List[dict]:
+        """
+        Returns the documents whose title contains every word of text, e.g. search_titles('income tax').
+        """
+        words = text.split()
+        if not words:
+            return []
+        return self.search('title : (' + ' '.join(quote(word) for word in words) + ')', kind=kind, limit=limit)
+
+    def bills_mentioning(self, act: str) -> List[Tuple[str, int]]:
+        """
+        Returns [(bill url, mention count), ...] for the bills mentioning an act, most mentions first.
+        :param act: Act title, as matched by ParlCAPreprocessor (case-insensitive), or the URL of an indexed act.
+        """
+        row = self._conn.execute('SELECT title FROM documents WHERE url = ? AND kind = ?', (act, ACT)).fetchone()
+        if row is not None and row[0]:
+            act = row[0]
+        rows = self._conn.execute('SELECT d.url, m.count FROM mentions m JOIN documents d ON d.id = m.document_id '
+                                  'WHERE m.act = ? ORDER BY m.count DESC, d.url', (act.lower(),))
+        return rows.fetchall()
+
+    def acts_mentioned_by(self, bill_url: str) -> Dict[str, int]:
+        """
+        Returns {lowercased act title: mention count} for a bill.
+        """
+        rows = self._conn.execute('SELECT m.act, m.count FROM mentions m JOIN documents d ON d.id = m.document_id '
+                                  'WHERE d.url = ?', (bill_url,))
+        return dict(rows.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or update the search index over preprocessed documents.')
+    parser.add_argument('index', help='SQLite index file to create or update.')
+    parser.add_argument('--acts', nargs='*', default=[], help='processed_act_* files written by ActCAPreprocessor.')
+    parser.add_argument('--bills', nargs='*', default=[], help='processed_bill_* files written by ParlCAPreprocessor.')
+    args = parser.parse_args()
+    with SearchIndex(args.index) as index:
+        for path in args.acts:
+            logging.info(f'Indexed {index.add_acts(iter_json_docs(path))} new or changed acts from {path}')
+        for path in args.bills:
+            logging.info(f'Indexed {index.add_bills(iter_json_docs(path))} new or changed bills from {path}')
+        index.optimize()
+        logging.info(f'{len(index)} documents in {args.index}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
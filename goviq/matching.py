@@ -0,0 +1,106 @@
+"""
+Multi-pattern matching of act titles in bill text.
+"""
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class ActMatcher:
+    """
+    Aho-Corasick automaton over lowercased act titles. Built once and reused for every bill, it finds all
+    mentions of every act in a single linear pass over the text instead of one str.count scan per act.
+    Plain lists and dicts only, so it pickles cheaply into worker processes.
+    """
+
+    def __init__(self, acts: Iterable[str]):
+        """
+        :param acts: Act titles to match. Matching is case-insensitive; empty titles are ignored.
+        """
+        self.acts = []
+        # Per pattern: the act titles sharing that lowercased pattern, and its length
+        self._names: List[List[str]] = []
+        self._lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        patterns = {}
+        for act in acts:
+            self.acts.append(act)
+            key = act.lower()
+            if not key:
+                continue
+            if key in patterns:
+                self._names[patterns[key]].append(act)
+                continue
+            patterns[key] = len(self._names)
+            self._names.append([act])
+            self._lengths.append(len(key))
+            self._insert(key, patterns[key])
+        self._build()
+
+    def _insert(self, key: str, pattern: int) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Flatten suffix outputs so the search loop never walks failure links to report matches
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yields (start, end, pattern) for every occurrence of every pattern, including overlapping ones,
+        ordered by end offset. Offsets index into text.lower(), which matches text for all but a handful of
+        characters whose lowercase form has a different length.
+        """
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        state = 0
+        for i, ch in enumerate(text.lower()):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                for pattern in out[state]:
+                    yield end - lengths[pattern], end, pattern
+
+    def find(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        Returns {act: [(start, end), ...]} for every act mentioned in the text. Occurrences of the same act are
+        non-overlapping and leftmost-first, i.e. exactly the ones str.count would count.
+        """
+        spans = {}
+        last_end = {}
+        for start, end, pattern in self.finditer(text):
+            if start >= last_end.get(pattern, 0):
+                spans.setdefault(pattern, []).append((start, end))
+                last_end[pattern] = end
+        found = {}
+        for pattern in sorted(spans):
+            for act in self._names[pattern]:
+                found[act] = spans[pattern]
+        return found
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        Returns {act: count} for every act mentioned in the text. Same result as act_reference_count.
+        """
+        return {act: len(spans) for act, spans in self.find(text).items()}
@@ -0,0 +1,220 @@
+"""
+Pluggable HTML parser backends. On well-formed markup every backend returns text identical to the BeautifulSoup
+html.parser code it replaces, so a crawler or preprocessor can switch to a faster C-backed parser without changing its
+output. Badly broken markup can still differ, since each tree builder recovers from errors in its own way.
+Backends are selected by name so the choice can be passed to worker processes.
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Tuple
+
+# Text directly inside these elements is never visible on the page
+INVISIBLE_PARENTS = frozenset(['style', 'script', 'head', 'title', 'meta', '[document]'])
+# Strings directly inside these are not text to bs4's get_text (they are Script, Stylesheet, ... strings)
+NON_TEXT_CONTAINERS = frozenset(['style', 'script', 'template', 'rt', 'rp'])
+
+# Event kinds yielded by HtmlParser.events_by_class
+START, TEXT, END = 'start', 'text', 'end'
+# (kind, tag or text, class tokens, id). Text events carry the raw string, classes and id are set on start events only.
+Event = Tuple[str, str, Tuple[str, ...], str | None]
+
+
+class HtmlParser(ABC):
+    """
+    The handful of extraction operations goviq performs on a page.
+    A class_ containing spaces matches the whole class attribute, otherwise it matches any one class, as in bs4.
+    """
+    name = None
+
+    @abstractmethod
+    def texts_by_class(self, html: str, tag: str, class_: str) -> List[str]:
+        """
+        Returns the text of every matching element, with each descendant string stripped and concatenated
+        (BeautifulSoup's get_text(strip=True)).
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def attrs_by_class(self, html: str, tag: str, class_: str, attr: str) -> List[str]:
+        """
+        Returns the value of attr on every matching element that has it, in document order.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def events_by_class(self, html: str, tag: str, class_: str) -> Iterator[Iterator[Event]]:
+        """
+        Yields, for every matching element, an iterator over the start/text/end events of the element and its
+        descendants in document order. Text events are exactly the strings texts_by_class concatenates, unstripped,
+        so a consumer that strips and joins them reproduces texts_by_class while knowing where each element begins.
+        Each element's events must be consumed before moving on to the next.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def visible_text(self, html: str) -> str:
+        """
+        Returns every stripped, non-empty string outside INVISIBLE_PARENTS, joined by single spaces.
+        """
+        raise NotImplementedError()
+
+
+class BS4Parser(HtmlParser):
+    """
+    Pure-Python BeautifulSoup with the html.parser tree builder. The reference implementation.
+    """
+    name = 'html.parser'
+
+    @staticmethod
+    def _soup(html: str):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
+
+    def texts_by_class(self, html: str, tag: str, class_: str) -> List[str]:
+        return [element.get_text(strip=True) for element in self._soup(html).find_all(tag, class_=class_)]
+
+    def attrs_by_class(self, html: str, tag: str, class_: str, attr: str) -> List[str]:
+        elements = self._soup(html).find_all(tag, class_=class_)
+        return [element[attr] for element in elements if attr in element.attrs]
+
+    @staticmethod
+    def _events(element) -> Iterator[Event]:
+        from bs4 import Tag
+        # get_text only counts strings of the exact types the outer element treats as text, e.g. not comments
+        types = element.interesting_string_types
+        stack = [(START, element)]
+        while stack:
+            kind, node = stack.pop()
+            if kind is TEXT:
+                yield TEXT, str(node), (), None
+            elif kind is END:
+                yield END, node.name, (), None
+            else:
+                yield START, node.name, tuple(node.get('class') or ()), node.get('id')
+                stack.append((END, node))
+                for child in reversed(node.contents):
+                    if isinstance(child, Tag):
+                        stack.append((START, child))
+                    elif type(child) in types:
+                        stack.append((TEXT, child))
+
+    def events_by_class(self, html: str, tag: str, class_: str) -> Iterator[Iterator[Event]]:
+        for element in self._soup(html).find_all(tag, class_=class_):
+            yield self._events(element)
+
+    def visible_text(self, html: str) -> str:
+        texts = self._soup(html).find_all(string=True)
+        visible_texts = filter(lambda text: text.parent.name not in INVISIBLE_PARENTS, texts)
+        return " ".join(t.strip() for t in visible_texts if t.strip())
+
+
+class LxmlParser(HtmlParser):
+    """
+    libxml2-backed parsing through lxml. Roughly an order of magnitude faster than html.parser.
+    """
+    name = 'lxml'
+
+    @staticmethod
+    def _root(html: str):
+        import lxml.etree
+        import lxml.html
+        try:
+            return lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration must be handed to libxml2 as bytes
+            return lxml.html.document_fromstring(html.encode('utf-8'))
+        except lxml.etree.ParserError:
+            # Empty or whitespace-only document
+            return None
+
+    @staticmethod
+    def _xpath(tag: str, class_: str) -> str:
+        if ' ' in class_.strip():
+            return f'//{tag}[normalize-space(@class)="{" ".join(class_.split())}"]'
+        return f'//{tag}[contains(concat(" ", normalize-space(@class), " "), " {class_} ")]'
+
+    @staticmethod
+    def _strings(element) -> Iterator[Tuple[str, object, bool]]:
+        """
+        Yields (string, parent element, is_comment) for every string below element in document order. Comments and
+        processing instructions are yielded as strings of their parent, as bs4 does.
+        """
+        stack = [(element, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                if node.tail and node is not element:
+                    yield node.tail, node.getparent(), False
+                continue
+            is_element = isinstance(node.tag, str)
+            if node.text:
+                yield node.text, (node if is_element else node.getparent()), not is_element
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node))
+
+    @staticmethod
+    def _events(element) -> Iterator[Event]:
+        stack = [(element, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                yield END, node.tag, (), None
+                if node.tail and node is not element:
+                    yield TEXT, node.tail, (), None
+                continue
+            if not isinstance(node.tag, str):
+                # Comments and processing instructions: skipped like in get_text, but their tail is text
+                if node.tail:
+                    yield TEXT, node.tail, (), None
+                continue
+            yield START, node.tag, tuple((node.get('class') or '').split()), node.get('id')
+            if node.text and node.tag not in NON_TEXT_CONTAINERS:
+                yield TEXT, node.text, (), None
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node))
+
+    def _get_text(self, element) -> str:
+        # get_text skips comments, processing instructions and script-like strings
+        return ''.join(text.strip() for text, parent, is_comment in self._strings(element)
+                       if not is_comment and parent.tag not in NON_TEXT_CONTAINERS)
+
+    def texts_by_class(self, html: str, tag: str, class_: str) -> List[str]:
+        root = self._root(html)
+        if root is None:
+            return []
+        return [self._get_text(element) for element in root.xpath(self._xpath(tag, class_))]
+
+    def attrs_by_class(self, html: str, tag: str, class_: str, attr: str) -> List[str]:
+        root = self._root(html)
+        if root is None:
+            return []
+        return [element.get(attr) for element in root.xpath(self._xpath(tag, class_)) if element.get(attr) is not None]
+
+    def events_by_class(self, html: str, tag: str, class_: str) -> Iterator[Iterator[Event]]:
+        root = self._root(html)
+        if root is None:
+            return
+        for element in root.xpath(self._xpath(tag, class_)):
+            yield self._events(element)
+
+    def visible_text(self, html: str) -> str:
+        root = self._root(html)
+        if root is None:
+            return ''
+        texts = (text.strip() for text, parent, _ in self._strings(root)
+                 if parent is not None and parent.tag not in INVISIBLE_PARENTS)
+        return " ".join(text for text in texts if text)
+
+
+PARSERS = {parser.name: parser for parser in (BS4Parser, LxmlParser)}
+_instances: Dict[str, HtmlParser] = {}
+
+
+def get_parser(name: str = 'html.parser') -> HtmlParser:
+    """
+    Returns the parser backend registered under name ('html.parser' or 'lxml').
+    """
+    if name not in _instances:
+        if name not in PARSERS:
+            raise ValueError(f'Unknown HTML parser {name}. Expected one of {list(PARSERS)}')
+        _instances[name] = PARSERS[name]()
+    return _instances[name]
@@ -0,0 +1,70 @@
+"""
+Compiled pattern sets for the rule-based extraction done per document: a bill's status, an act's title.
+A PatternSet joins named rules into a single alternation so a document is scanned once however many rules there
+are, and can bound the scan to the head of the document where the text it looks for lives. Compiled sets are
+cached by their rules, so every caller and every worker process compiles a given set once.
+"""
+from functools import lru_cache
+from typing import NamedTuple, Sequence, Tuple
+
+import regex as re
+
+
+class RuleMatch(NamedTuple):
+    # Name of the rule that matched
+    rule: str
+    match: 're.Match'
+    # Whether the match was found in the bounded prefix or needed a scan of the whole text
+    in_prefix: bool
+
+
+class PatternSet:
+    """
+    Named rules in priority order, compiled into one pattern of named groups (rule names must be valid group names).
+    search returns the highest priority rule matching anywhere in the text, as checking the rules one after another
+    would, in a single pass that stops early once the top rule matches. The pass tries every position (overlapped),
+    so a match of one rule cannot hide a match of another starting inside it.
+
+    With prefix set, the first prefix characters are scanned first and the whole text only if the top rule does not
+    match there (for a single rule, if nothing matches there). margin must be at least the number of characters a
+    match can look ahead past its end: a match ending closer than that to the cut could differ from the one in the
+    whole text, so the whole text is scanned instead.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str]], flags: int = 0, prefix: int = None, margin: int = 0):
+        """
+        :param rules: (name, regex) pairs, highest priority first.
+        :param flags: regex flags applied to every rule.
+        :param prefix: Number of leading characters to scan first. None scans the whole text.
+        :param margin: Lookahead past the end of a match, in characters. See above.
+        """
+        self.rules = tuple(name for name, _ in rules)
+        self.prefix = prefix
+        self.margin = margin
+        self.pattern = re.compile('|'.join(f'(?P<{name}>{regex})' for name, regex in rules), flags)
+
+    def _search(self, text: str) -> Tuple[str, 're.Match'] | None:
+        best = None
+        for match in self.pattern.finditer(text, overlapped=True):
+            if best is None or self.rules.index(match.lastgroup) < self.rules.index(best[0]):
+                best = match.lastgroup, match
+                if best[0] == self.rules[0]:
+                    break
+        return best
+
+    def search(self, text: str) -> RuleMatch | None:
+        if self.prefix is not None and len(text) > self.prefix:
+            found = self._search(text[:self.prefix])
+            if found is not None and found[0] == self.rules[0] and found[1].end() + self.margin <= self.prefix:
+                return RuleMatch(found[0], found[1], True)
+        found = self._search(text)
+        return RuleMatch(found[0], found[1], False) if found is not None else None
+
+
+@lru_cache(maxsize=None)
+def compile_rules(rules: Tuple[Tuple[str, str], ...], flags: int = 0, prefix: int = None,
+                  margin: int = 0) -> PatternSet:
+    """
+    Returns the PatternSet for the given rules, compiling it on first use.
+    """
+    return PatternSet(rules, flags, prefix, margin)
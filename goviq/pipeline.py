@@ -0,0 +1,477 @@
+"""
+Streaming crawl -> preprocess -> index pipeline. The act and bill crawls run concurrently on one event loop, and each
+record flows to the next stage as soon as it is produced, so preprocessing and indexing overlap the crawls and the
+wall-clock of a run is bounded by its slowest stage rather than the sum of them:
+
+    crawl_acts  --> preprocess_acts --> index
+                          | act titles
+    crawl_bills --> preprocess_bills -> index
+
+Crawls are incremental, so only new or changed documents flow downstream, and they are merged into the
+processed_*_latest.jsonl outputs. A stage whose inputs did not change does no work; a stage whose own logic or
+upstream dependency changed (a new preprocessor version, a different set of act titles to match bills against)
+reprocesses every document, from the crawlers' *_latest.jsonl views.
+
+Further sources from the registry in goviq.scrapers (other jurisdictions) are crawled on the same loop, to their own
+*_latest.jsonl views. All crawls share one budget of concurrent requests, handed out to the hosts in turn, and one
+per-host rate limiter.
+
+    python -m goviq.pipeline --output_dir data
+    python -m goviq.pipeline --output_dir data --sources my_source --max_concurrent 200
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from goviq.config.local_cache import settings
+from goviq.entities.document import Document
+from goviq.entities.http_cache import HttpCache
+from goviq.entities.crawler import Crawler
+from goviq.entities.metrics import Metrics
+from goviq.entities.rate_limit import ConcurrencyBudget, RateLimiter
+from goviq.entities.writer import COMPRESSION_SUFFIXES, JsonlWriter
+from goviq.indexing import SearchIndex
+from goviq.preprocessing.acts_ca import ActCAPreprocessor
+from goviq.preprocessing.parl_ca import ParlCAPreprocessor
+from goviq.scrapers import get_crawler
+from goviq.scrapers.acts_ca import ActCrawler
+from goviq.scrapers.parl_ca import BillCrawler
+from goviq.utils import content_hash, iter_json_docs, load_json_docs
+
+logging.getLogger().setLevel(logging.INFO)
+
+
+class Channel:
+    """
+    Bounded stream of records from one stage to the next. put never blocks, so a crawler can feed it from the event
+    loop; a consumer iterates it from a worker thread until the producer closes it. Records put while maxsize records
+    are waiting are not queued but counted in spilled, so a crawl cannot run arbitrarily far ahead of its consumer;
+    the consumer reads them back from the producer's output file. If the producer failed, iteration raises once the
+    records it produced are drained, so the consumer does not commit partial output.
+    """
+    _closed = object()
+
+    def __init__(self, name: str, maxsize: int = 0):
+        """
+        :param maxsize: Records the channel holds before spilling. 0 holds every record, for producers whose
+            output the consumer cannot read back.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.count = 0
+        self.spilled = 0
+        self.error = None
+        self._queue = queue.Queue()
+
+    def put(self, item: Any) -> bool:
+        """
+        Queues the record, returning False if the channel is full and it was spilled instead.
+        """
+        self.count += 1
+        if self.maxsize and self._queue.qsize() >= self.maxsize:
+            self.spilled += 1
+            return False
+        self._queue.put(item)
+        return True
+
+    def close(self, error: BaseException = None) -> None:
+        self.error = error
+        self._queue.put(self._closed)
+
+    def __iter__(self) -> Iterator[Any]:
+        while True:
+            item = self._queue.get()
+            if item is self._closed:
+                # Leave the marker for any other reader
+                self._queue.put(item)
+                if self.error is not None:
+                    raise RuntimeError(f'Producer of {self.name} failed: {self.error!r}')
+                return
+            yield item
+
+
+class Pipeline:
+    """
+    Runs named async stages concurrently. A stage starts once the stages it runs after have finished and is called
+    with their results as keyword arguments; stages exchanging records through Channels instead run side by side.
+    When a stage ends, successfully or not, its output channels are closed. Stages must be added after the stages
+    they depend on, so the graph is acyclic by construction.
+    """
+
+    def __init__(self, metrics: Metrics = None):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._stages = {}
+
+    def add(self, name: str, func: Callable[..., Any], after: Iterable[str] = (),
+            outputs: Iterable[Channel] = ()) -> None:
+        """
+        :param func: Coroutine function running the stage.
+        :param after: Stages whose results the stage needs.
+        :param outputs: Channels the stage produces.
+        """
+        after = tuple(after)
+        for dependency in after:
+            if dependency not in self._stages:
+                raise ValueError(f'Stage {name} depends on unknown stage {dependency}')
+        self._stages[name] = (func, after, tuple(outputs))
+
+    async def _run_stage(self, name: str, tasks: Dict[str, asyncio.Task]) -> Any:
+        func, after, outputs = self._stages[name]
+        error = None
+        try:
+            upstream = {dependency: await tasks[dependency] for dependency in after}
+            start = time.perf_counter()
+            result = await func(**upstream)
+            seconds = time.perf_counter() - start
+            self.metrics.observe('stage_seconds', seconds, stage=name)
+            logging.info(f'Pipeline stage {name} finished in {seconds:.1f}s')
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            for channel in outputs:
+                channel.close(error)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Runs every stage and returns {stage: result}. If any stage failed, raises its error once all stages ended.
+        """
+        tasks = {}
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(self._run_stage(name, tasks))
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        failed = [(name, result) for name, result in zip(tasks, results) if isinstance(result, BaseException)]
+        for name, error in failed:
+            logging.error(f'Pipeline stage {name} failed: {error!r}')
+        if failed:
+            raise failed[0][1]
+        return dict(zip(tasks, results))
+
+
+class LegislationPipeline:
+    """
+    Crawls, preprocesses and indexes federal acts and bills into local_cache:
+    processed_act_text_latest.jsonl, processed_bill_text_latest.jsonl, the act section index and search.db.
+    Stage state (the version and inputs each output was built from) is kept in pipeline_state.json.
+    """
+    state_filename = 'pipeline_state.json'
+    index_filename = 'search.db'
+
+    def __init__(self, local_cache: str = None, act_crawler: ActCrawler = None, bill_crawler: BillCrawler = None,
+                 num_processes: int = None, html_parser: str = 'html.parser', compression: str = None,
+                 resume: bool = False, index: bool = True, force: bool = False, sources: Iterable[Crawler] = (),
+                 max_concurrent: int = 100, channel_size: int = 256):
+        """
+        :param local_cache: Directory all outputs are written to.
+        :param act_crawler: Configured act crawler. Defaults to an ActCrawler writing to local_cache.
+        :param bill_crawler: Configured bill crawler. Defaults to a BillCrawler writing to local_cache.
+        :param num_processes: Worker processes of each preprocessing stage. Defaults to one per CPU.
+        :param html_parser: Parser backend used to extract bill text.
+        :param compression: None, 'gzip' or 'zstd' for the crawl output.
+        :param resume: Continue crawls that did not finish from their checkpoints.
+        :param index: Build the search index.
+        :param force: Reprocess and reindex every document even if its inputs are unchanged.
+        :param sources: Configured crawlers of further sources, crawled alongside but not preprocessed or indexed.
+        :param max_concurrent: Requests in flight across all crawls.
+        :param channel_size: Crawled records held in memory for a preprocessing stage that has not caught up. Further
+            records are read back from the crawl's delta file once the crawl ends.
+        """
+        self.local_cache = local_cache if local_cache else settings.local_cache
+        self.act_crawler = act_crawler if act_crawler is not None else ActCrawler(local_cache=self.local_cache)
+        self.bill_crawler = bill_crawler if bill_crawler is not None else BillCrawler(local_cache=self.local_cache)
+        self.num_processes = num_processes
+        self.html_parser = html_parser
+        self.compression = compression
+        self.resume = resume
+        self.index = index
+        self.force = force
+        self.sources = list(sources)
+        self.channel_size = channel_size
+        output_names = [crawler.output_name for crawler in self.crawlers]
+        if len(set(output_names)) != len(output_names):
+            raise ValueError(f'Sources must write to distinct outputs, got {output_names}')
+        self.budget = ConcurrencyBudget(max_concurrent)
+        self.rate_limiter = RateLimiter(max_limit=max(crawler.limit_per_host for crawler in self.crawlers))
+        for crawler in self.crawlers:
+            crawler.budget = self.budget
+            crawler.rate_limiter = self.rate_limiter
+        self.metrics = Metrics()
+        self.state_path = os.path.join(self.local_cache, self.state_filename)
+        self.state = self._load_state()
+        # Delta files written by this run's crawls
+        self.deltas = {}
+
+    @property
+    def crawlers(self) -> List[Crawler]:
+        return [self.act_crawler, self.bill_crawler] + self.sources
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            logging.warning(f'Could not read pipeline state {self.state_path}, reprocessing everything: {e}')
+            return {}
+
+    def _save_state(self, stage: str, entry: Dict[str, Any]) -> None:
+        self.state[stage] = entry
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.local_cache, name)
+
+    def crawl_output(self, filename: str) -> str:
+        """
+        Path of the merged view of every crawled document, maintained by incremental crawls.
+        """
+        return self._path(f'{filename}_latest.jsonl' + COMPRESSION_SUFFIXES[self.compression])
+
+    def _with_backlog(self, channel: Channel, backlog: str | Callable[[], str | None] | None,
+                      key: Callable[[dict], str]) -> Iterator[dict]:
+        """
+        Yields the records streamed through the channel, then those of the backlog file that were not streamed.
+        backlog may be a callable, called once the channel is drained, for a file only known when its producer ends.
+        """
+        seen = set()
+        for record in channel:
+            seen.add(key(record))
+            yield record
+        if channel.spilled:
+            logging.info(f'{channel.spilled} {channel.name} arrived faster than they were consumed')
+            self.metrics.inc('records_spilled_total', channel.spilled, channel=channel.name)
+        if callable(backlog):
+            backlog = backlog()
+        if backlog is None or not os.path.exists(backlog):
+            return
+        logging.info(f'Catching up on {backlog}')
+        for record in iter_json_docs(backlog):
+            if key(record) not in seen:
+                yield record
+
+    def _backlog(self, filename: str, full: bool, records: Channel) -> Callable[[], str | None]:
+        """
+        Crawl output the consumer of a crawl has to read besides the streamed records: every document if it
+        reprocesses everything, otherwise the crawl's delta file if the records channel spilled or, when resuming,
+        for the records the interrupted crawl had written. Returned as a callable for _with_backlog, since the delta
+        file is only known once the crawl returns.
+        """
+        def backlog() -> str | None:
+            if full:
+                return self.crawl_output(filename)
+            if self.resume or records.spilled:
+                return self.deltas.get(filename)
+            return None
+        return backlog
+
+    @staticmethod
+    def _merge(docs: Iterable[dict], path: str, key: str, output: Channel | None) -> int:
+        """
+        Writes the processed docs to path followed by the documents of the previous version of path they do not
+        replace, passing each processed doc on to output if given. Leaves path untouched if there are no docs.
+        Returns their number.
+        """
+        seen = set()
+        writer = None
+        try:
+            for doc in docs:
+                if writer is None:
+                    writer = JsonlWriter.for_path(path)
+                writer.write(doc)
+                seen.add(doc[key])
+                if output is not None:
+                    output.put(doc)
+            if writer is None:
+                return 0
+            if os.path.exists(path):
+                for doc in iter_json_docs(path):
+                    if doc[key] not in seen:
+                        writer.write(doc)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        writer.close()
+        return len(seen)
+
+    async def _crawl(self, crawler: Crawler, records: Channel = None) -> str:
+        if records is not None:
+            crawler.on_record = records.put
+        delta = await crawler.crawl_async(incremental=True, compression=self.compression, resume=self.resume)
+        self.deltas[crawler.output_name] = delta
+        return delta
+
+    def _processed_output(self, preprocessor_class: type, filename: str) -> str:
+        return self._path(preprocessor_class(local_cache=self.local_cache).output_path(self.crawl_output(filename)))
+
+    def _preprocess_acts(self, records: Channel, processed: Channel | None) -> Dict[str, Any]:
+        preprocessor = ActCAPreprocessor(local_cache=self.local_cache, num_processes=self.num_processes)
+        out_path = self._processed_output(ActCAPreprocessor, 'act_text')
+        previous = self.state.get('preprocess_acts', {})
+        full = self.force or previous.get('version') != preprocessor._version or not os.path.exists(out_path)
+        with preprocessor:
+            docs = preprocessor.process(self._with_backlog(records, self._backlog('act_text', full, records), Document.url_of))
+            changed = self._merge(docs, out_path, 'url', processed)
+        if changed:
+            preprocessor.section_index(load_json_docs(out_path)).save(
+                self._path(preprocessor.section_index_filename(out_path)))
+            titles = sorted(set(preprocessor.load_column(out_path, 'title')))
+        else:
+            titles = previous.get('titles', [])
+        return {'version': preprocessor._version, 'output': out_path, 'titles': titles, 'changed': changed}
+
+    def _preprocess_bills(self, records: Channel, processed: Channel | None, titles: List[str]) -> Dict[str, Any]:
+        preprocessor = ParlCAPreprocessor(local_cache=self.local_cache, num_processes=self.num_processes,
+                                          html_parser=self.html_parser)
+        out_path = self._processed_output(ParlCAPreprocessor, 'bill_text')
+        titles_hash = content_hash('\n'.join(titles))
+        previous = self.state.get('preprocess_bills', {})
+        # Mentions depend on the act titles, so new or renamed acts mean rematching every bill
+        full = (self.force or previous.get('version') != preprocessor._version
+                or previous.get('act_titles') != titles_hash or not os.path.exists(out_path))
+        with preprocessor:
+            docs = preprocessor.process(self._with_backlog(records, self._backlog('bill_text', full, records), Document.url_of),
+                                        titles)
+            changed = self._merge(docs, out_path, 'link', processed)
+        return {'version': preprocessor._version, 'act_titles': titles_hash, 'output': out_path, 'changed': changed}
+
+    def _index(self, acts: Channel, bills: Channel) -> Dict[str, int]:
+        path = self._path(self.index_filename)
+        full = self.force or not os.path.exists(path)
+        act_backlog = self._processed_output(ActCAPreprocessor, 'act_text') if full else None
+        bill_backlog = self._processed_output(ParlCAPreprocessor, 'bill_text') if full else None
+        with SearchIndex(path) as index:
+            counts = {'acts': index.add_acts(self._with_backlog(acts, act_backlog, lambda doc: doc['url'])),
+                      'bills': index.add_bills(self._with_backlog(bills, bill_backlog, lambda doc: doc['link']))}
+            if counts['acts'] or counts['bills']:
+                index.optimize()
+        return counts
+
+    def _skipped(self, stage: str, changed: int) -> None:
+        if not changed:
+            logging.info(f'{stage}: inputs unchanged, nothing to do')
+            self.metrics.inc('stages_skipped_total', stage=stage)
+
+    def build(self) -> Pipeline:
+        act_records = Channel('act records', self.channel_size)
+        bill_records = Channel('bill records', self.channel_size)
+        # Nothing would drain the processed records without the index stage
+        processed_acts = Channel('processed acts') if self.index else None
+        processed_bills = Channel('processed bills') if self.index else None
+        pipeline = Pipeline(self.metrics)
+
+        async def crawl_acts():
+            return await self._crawl(self.act_crawler, act_records)
+
+        async def crawl_bills():
+            return await self._crawl(self.bill_crawler, bill_records)
+
+        async def preprocess_acts():
+            entry = await asyncio.to_thread(self._preprocess_acts, act_records, processed_acts)
+            self._skipped('preprocess_acts', entry.pop('changed'))
+            self._save_state('preprocess_acts', entry)
+            return entry['titles']
+
+        async def preprocess_bills(preprocess_acts):
+            # Bills crawled before the act titles are known wait in bill_records, or in the crawl's delta file once
+            # channel_size of them are waiting
+            entry = await asyncio.to_thread(self._preprocess_bills, bill_records, processed_bills, preprocess_acts)
+            self._skipped('preprocess_bills', entry.pop('changed'))
+            self._save_state('preprocess_bills', entry)
+            return entry['output']
+
+        async def index():
+            counts = await asyncio.to_thread(self._index, processed_acts, processed_bills)
+            self._skipped('index', counts['acts'] + counts['bills'])
+            return counts
+
+        pipeline.add('crawl_acts', crawl_acts, outputs=[act_records])
+        pipeline.add('crawl_bills', crawl_bills, outputs=[bill_records])
+        pipeline.add('preprocess_acts', preprocess_acts, outputs=[processed_acts] if self.index else [])
+        pipeline.add('preprocess_bills', preprocess_bills, after=['preprocess_acts'],
+                     outputs=[processed_bills] if self.index else [])
+        if self.index:
+            pipeline.add('index', index)
+        for crawler in self.sources:
+            pipeline.add(f'crawl_{crawler.name or crawler.output_name}', functools.partial(self._crawl, crawler))
+        return pipeline
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Runs the whole pipeline. Returns {stage: result}: the crawl delta files, the act titles, the processed bills
+        file and the number of newly indexed documents.
+        """
+        try:
+            return asyncio.run(self.build().run())
+        finally:
+            try:
+                self.metrics.dump(self._path('metrics'), 'pipeline')
+            except IOError as e:
+                logging.error(f'Error writing metrics report for pipeline: {e}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crawl, preprocess and index Canadian legislation.')
+    parser.add_argument('--output_dir', help='Directory to write output to.')
+    parser.add_argument('--http_cache_dir',
+                        help='Directory for the HTTP response cache. Defaults to <output_dir>/http_cache.')
+    parser.add_argument('--http_cache_mb', type=int, default=2048,
+                        help='Maximum size of the HTTP response cache in MB.')
+    parser.add_argument('--no_http_cache', action='store_true', help='Disable the HTTP response cache.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Accepted for compatibility; the pipeline always crawls incrementally.')
+    parser.add_argument('--parse_workers', type=int, default=0,
+                        help='Processes each crawler parses pages in, on top of the preprocessing workers. Every '
+                             'crawler (acts, bills and each of --sources) opens its own pool of this size while the '
+                             'preprocessing stages run theirs, so keep it small. 0, the default, parses on the event '
+                             'loop.')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='Worker processes of each preprocessing stage. Defaults to one per CPU.')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], help='Compress the JSONL crawl output files.')
+    parser.add_argument('--html_parser', choices=['html.parser', 'lxml'], default='html.parser',
+                        help='HTML parser backend. lxml is much faster and produces the same text.')
+    parser.add_argument('--sessions',
+                        help="Parliament sessions to crawl bills from, e.g. '43-2,44-1' or '42-1:44-1'. "
+                             "Defaults to the current session.")
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue crawls that did not finish from their last checkpoint instead of starting over.')
+    parser.add_argument('--no_index', action='store_true', help='Do not build the search index.')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess and reindex every document, even if its inputs are unchanged.')
+    parser.add_argument('--sources', default='',
+                        help="Further registered sources to crawl alongside federal acts and bills, e.g. 'a,b'.")
+    parser.add_argument('--max_concurrent', type=int, default=100, help='Requests in flight across all crawls.')
+    args = parser.parse_args()
+    output_dir = args.output_dir or settings.local_cache
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    http_cache = None
+    if not args.no_http_cache:
+        cache_dir = args.http_cache_dir or os.path.join(output_dir, 'http_cache')
+        http_cache = HttpCache(cache_dir, max_bytes=args.http_cache_mb * 1024 ** 2)
+    options = dict(local_cache=output_dir, http_cache=http_cache, parse_workers=args.parse_workers,
+                   html_parser=args.html_parser)
+    pipeline = LegislationPipeline(local_cache=output_dir, act_crawler=ActCrawler(**options),
+                                   bill_crawler=BillCrawler(sessions=args.sessions, **options),
+                                   num_processes=args.processes, html_parser=args.html_parser,
+                                   compression=args.compression, resume=args.resume, index=not args.no_index,
+                                   force=args.force, max_concurrent=args.max_concurrent,
+                                   sources=[get_crawler(name)(**options) for name in args.sources.split(',') if name])
+    start = time.perf_counter()
+    pipeline.run()
+    logging.info(f'Pipeline finished in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,45 @@
 import os
 import regex as re
-import requests
-import tqdm
-from typing import List
+from typing import Iterable, Iterator, List
 
+from goviq.entities.document import Document
 from goviq.entities.preprocessor import Preprocessor
-from goviq.config.local_cache import LOCAL_CACHE
-from goviq.utils import split_document_at_language_transition
+from goviq.config.local_cache import settings
+from goviq.patterns import PatternSet, compile_rules
+from goviq.sections import SectionIndex, clip_sections
+from goviq.utils import progress, split_document_at_language_transition
+
+# Per-process state set up once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(title_regex: str, prefix: int, margin: int) -> None:
+    _worker_state['title_rules'] = compile_rules((('title', title_regex),), re.MULTILINE, prefix, margin)
+
+
+def parse_title(html_body: str, rules: PatternSet) -> str | None:
+    """Return the title of an act from its English body, or None if the title rules do not match."""
+    matched = rules.search(html_body)
+    return matched.match.group(matched.rule).strip() if matched is not None else None
+
+
+def _process_act(doc: Document | dict) -> dict:
+    json_doc = {}
+    act = Document.from_record(doc)
+    # Acts crawled before the provision structure was captured have no sections
+    url, sections = act.url, act.metadata.get('sections')
+    text = act.segments[0]
+    html_body, french = split_document_at_language_transition(text)
+    title = parse_title(html_body, _worker_state['title_rules'])
+    if title:
+        json_doc['title'] = title
+    json_doc['url'] = url
+    json_doc['body'] = html_body
+    if sections:
+        # The English half is either a prefix or, for French-first acts, a suffix of the segment
+        start = 0 if french is None or text.startswith(html_body) else len(french)
+        json_doc['sections'] = clip_sections(sections[0], start, start + len(html_body))
+    return json_doc
 
 
 class ActCAPreprocessor(Preprocessor):
@@ -14,32 +47,58 @@ class ActCAPreprocessor(Preprocessor):
     # Note: This regex seems to work for all acts except for 4 out of the ~900ish total federal acts.
     # I have not checked for false positives yet
     act_title_regex = r'^([A-Z][a-z].+?)(?=\s?(?:R\.S\.C\.|S\.C\.|Agreements and ConventionsAssented))'
+    # The title opens the act, so only this many leading characters are searched unless no title is found there
+    title_prefix = 4096
+    # How far act_title_regex looks past the end of a title: a space and 'Agreements and ConventionsAssented'
+    title_margin = 40
+
+    def __init__(self, local_cache: str = None, num_processes: int = None, columnar: bool = False):
+        """
+        :param local_cache: Directory path for cached output.
+        :param num_processes: Worker processes to preprocess acts in. Defaults to one per CPU.
+        :param columnar: Write the output as a memory-mapped columnar corpus instead of JSON.
+        """
+        self.local_cache = local_cache if local_cache else settings.local_cache
+        self.num_processes = num_processes
+        self.columnar = columnar
 
-    def __init__(self, local_cache: str = None):
-        self.local_cache = local_cache if local_cache else LOCAL_CACHE
+    def title_rules(self) -> PatternSet:
+        return compile_rules((('title', self.act_title_regex),), re.MULTILINE, self.title_prefix, self.title_margin)
 
     def _parse_title(self, html_body: str) -> str:
-        title = re.findall(self.act_title_regex, html_body, re.MULTILINE)
-        return title[0].strip() if title else None
+        return parse_title(html_body, self.title_rules())
+
+    def process(self, docs: Iterable[dict]) -> Iterator[dict]:
+        """
+        Preprocesses crawled acts (Documents or their serialized records) as the iterable yields them, which may be
+        while they are still being crawled. Yields in completion order.
+        """
+        return self.parallel_map(_process_act, docs, initializer=_init_worker,
+                                 initargs=(self.act_title_regex, self.title_prefix, self.title_margin))
 
     def preprocess(self, acts_path: str, cache: bool = True) -> List[dict]:
-        docs = self.load(acts_path)
-        processed_docs = []
-        for doc in tqdm.tqdm(docs):  # TODO: Add multiprocessing
-            json_doc = {}
-            url = list(doc.keys())[0]
-            html_body = list(doc.values())[0][0]
-            # TODO: Fix this, langdetect not playing nicely with multiprocessing.
-            # html_body, _ = split_document_at_language_transition(html_body)
-            title = self._parse_title(html_body)
-            if title:
-                json_doc['title'] = title
-            json_doc['url'] = url
-            json_doc['body'] = html_body
-            processed_docs.append(json_doc)
+        with self._pool_scope(), self.metrics.timer('stage_seconds', stage='process'):
+            processed_docs = list(progress(self.process(self.iter_load(acts_path))))
+        self.metrics.inc('documents_total', len(processed_docs))
         if cache:
-            out_path = os.path.join(self.local_cache, 'processed_' + acts_path)
-            self.cache(processed_docs, path=out_path)
+            out_path = self.output_path(acts_path)
+            with self.metrics.timer('stage_seconds', stage='write'):
+                self.cache(processed_docs, path=out_path)
+                self.section_index(processed_docs).save(
+                    os.path.join(self.local_cache, self.section_index_filename(acts_path)))
+        self._report_metrics('act_preprocessing')
         return processed_docs
 
-    # TODO: Figure out how to parse sections and subsections from the HTML. We need to map amendments from bills onto sections of the acts for context.
\ No newline at end of file
+    @staticmethod
+    def section_index_filename(acts_path: str) -> str:
+        """
+        Name of the section index written next to the preprocessed acts, e.g. section_index_act_text_<date>.json.
+        """
+        return 'section_index_' + os.path.basename(acts_path).split('.')[0] + '.json'
+
+    @staticmethod
+    def section_index(processed_docs: List[dict]) -> SectionIndex:
+        """
+        Builds the citation index ("Bank Act, s. 12(3)" -> span of the act body) over preprocessed acts.
+        """
+        return SectionIndex.from_acts(processed_docs)
\ No newline at end of file
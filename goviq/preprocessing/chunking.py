@@ -0,0 +1,234 @@
+import bisect
+import logging
+import os
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+from goviq.config.local_cache import settings
+from goviq.dedup import NearDuplicateIndex, minhash, normalize
+from goviq.entities.manifest import CrawlManifest
+from goviq.entities.preprocessor import Preprocessor
+from goviq.sections import LEVELS, section_refs, walk_sections
+from goviq.utils import content_hash, detect_language, progress
+
+# Words and single punctuation marks. Subword tokenizers of embedding models produce somewhat more tokens than this,
+# so leave headroom under the model's limit when choosing max_tokens.
+_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?;:])\s+(?=\S)')
+# Metadata copied from the document onto each of its chunks
+CHUNK_FIELDS = ('title', 'status')
+
+# Per-process state set up once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(max_tokens: int, language: str | None, num_perm: int, shingle_size: int) -> None:
+    _worker_state.update(max_tokens=max_tokens, language=language, num_perm=num_perm, shingle_size=shingle_size)
+
+
+def _boundaries(text: str, sections: List[dict] | None) -> List[List[int]]:
+    """
+    Candidate split offsets, coarsest first: the starts of parts, sections, subsections and paragraphs when the
+    provision tree is known, then sentence ends.
+    """
+    levels = [[] for _ in LEVELS]
+    for node in walk_sections(sections or []):
+        levels[LEVELS[node['kind']]].append(node['start'])
+    levels.append([match.end() for match in _SENTENCE_END_RE.finditer(text)])
+    return [sorted(set(level)) for level in levels if level]
+
+
+def _split(tokens: List[int], levels: List[List[int]], level: int, start: int, end: int,
+           max_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Splits text[start:end] into spans of at most max_tokens, cutting at the coarsest boundaries that get there.
+    Adjacent pieces are packed back together as long as they fit, so small provisions share a chunk.
+    """
+    if bisect.bisect_left(tokens, end) - bisect.bisect_left(tokens, start) <= max_tokens:
+        return [(start, end)]
+    cuts = []
+    while level < len(levels) and not cuts:
+        boundaries = levels[level]
+        cuts = boundaries[bisect.bisect_right(boundaries, start):bisect.bisect_left(boundaries, end)]
+        level += 1
+    if not cuts:
+        # No boundary left, cut between tokens
+        first = bisect.bisect_left(tokens, start)
+        last = bisect.bisect_left(tokens, end)
+        cuts = tokens[first + max_tokens:last:max_tokens]
+        return list(zip([start] + cuts, cuts + [end]))
+    pieces = []
+    for piece_start, piece_end in zip([start] + cuts, cuts + [end]):
+        pieces.extend(_split(tokens, levels, level, piece_start, piece_end, max_tokens))
+    packed = [pieces[0]]
+    for piece_start, piece_end in pieces[1:]:
+        packed_start = packed[-1][0]
+        if bisect.bisect_left(tokens, piece_end) - bisect.bisect_left(tokens, packed_start) <= max_tokens:
+            packed[-1] = (packed_start, piece_end)
+        else:
+            packed.append((piece_start, piece_end))
+    return packed
+
+
+def _containing_ref(refs: List[Tuple[int, int, str]], starts: List[int], offset: int) -> str | None:
+    # Provisions nest, so the latest starting provision that still contains the offset is the innermost one
+    i = bisect.bisect_right(starts, offset) - 1
+    while i >= 0:
+        start, end, ref = refs[i]
+        if end > offset:
+            return ref
+        i -= 1
+    return None
+
+
+def chunk_text(text: str, sections: List[dict] = None, max_tokens: int = 256) -> List[Tuple[int, int]]:
+    """
+    Splits a document body into (start, end) spans of at most max_tokens tokens. With the act's provision tree
+    (see goviq.sections) chunks break at provision boundaries, otherwise at sentence ends.
+    Leading and trailing whitespace is trimmed from every span; empty spans are dropped.
+    """
+    tokens = [match.start() for match in _TOKEN_RE.finditer(text)]
+    if not tokens:
+        return []
+    spans = []
+    for start, end in _split(tokens, _boundaries(text, sections), 0, 0, len(text), max_tokens):
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def _chunk_document(item: Tuple[int, dict]) -> Tuple[int, List[dict]]:
+    index, doc = item
+    doc_id = doc.get('url') or doc.get('link')
+    body = doc.get('body') or ''
+    sections = doc.get('sections')
+    refs = sorted((start, end, ref) for ref, (start, end) in section_refs(sections).items()) if sections else []
+    starts = [start for start, _, _ in refs]
+    chunks = []
+    for start, end in chunk_text(body, sections, _worker_state['max_tokens']):
+        text = body[start:end]
+        language = detect_language(text)
+        if _worker_state['language'] and language not in (None, _worker_state['language']):
+            continue
+        ref = _containing_ref(refs, starts, start)
+        digest = content_hash(text)
+        # Ids depend on the document and the text, not on the chunk's position, so inserting a paragraph only adds
+        # chunks around it instead of shifting the ids of every later chunk. An edited chunk gets a new id and the
+        # old one is deleted.
+        chunk = {'id': content_hash(f'{doc_id}#{digest}')[:16], 'doc_id': doc_id, 'section': ref,
+                 'start': start, 'end': end, 'text': text, 'hash': digest, 'tokens': len(_TOKEN_RE.findall(text))}
+        chunk.update((field, doc[field]) for field in CHUNK_FIELDS if field in doc)
+        chunk['_signature'] = minhash(text, _worker_state['num_perm'], _worker_state['shingle_size'])
+        chunks.append(chunk)
+    return index, chunks
+
+
+class ChunkPreprocessor(Preprocessor):
+    """
+    Splits preprocessed acts or bills into token-bounded chunks for embedding, drops exact and near-duplicate chunks,
+    and emits only the chunks that are new or changed since the previous run, followed by deletion markers
+    ({'id', 'deleted': True}) for chunks that no longer exist.
+    """
+
+    def __init__(self, local_cache: str = None, num_processes: int = None, max_tokens: int = 256,
+                 language: str | None = 'en', near_duplicate_threshold: float = 0.8, num_perm: int = 64,
+                 shingle_size: int = 5):
+        """
+        :param local_cache: Directory path for cached output and the chunk manifest.
+        :param num_processes: Worker processes to chunk documents in. Defaults to one per CPU.
+        :param max_tokens: Maximum tokens per chunk (words and punctuation marks).
+        :param language: Keep only chunks in this language ('en' or 'fr'), dropping the other half of bilingual
+            documents. None keeps both.
+        :param near_duplicate_threshold: Estimated Jaccard similarity of word shingles above which a chunk is a
+            duplicate of an earlier one. None disables near-duplicate detection; exact duplicates are always dropped.
+        :param num_perm: MinHash signature length.
+        :param shingle_size: Words per shingle.
+        """
+        self.local_cache = local_cache if local_cache else settings.local_cache
+        self.num_processes = num_processes
+        self.max_tokens = max_tokens
+        self.language = language
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    @staticmethod
+    def _in_order(results: Iterable[Tuple[int, List[dict]]]) -> Iterator[dict]:
+        # parallel_map yields in completion order. Restore input order so the same chunk wins every dedup decision
+        # on every run, whatever the number of workers.
+        pending = {}
+        expected = 0
+        for index, chunks in results:
+            pending[index] = chunks
+            while expected in pending:
+                yield from pending.pop(expected)
+                expected += 1
+
+    def _unique(self, chunks: Iterable[dict]) -> Iterator[dict]:
+        exact = set()
+        near = NearDuplicateIndex(self.num_perm, threshold=self.near_duplicate_threshold) \
+            if self.near_duplicate_threshold is not None else None
+        for chunk in chunks:
+            signature = chunk.pop('_signature')
+            key = content_hash(normalize(chunk['text']))
+            if key in exact:
+                self.metrics.inc('chunks_dropped_total', reason='exact_duplicate')
+                continue
+            exact.add(key)
+            if near is not None and near.add(chunk['id'], signature) is not None:
+                self.metrics.inc('chunks_dropped_total', reason='near_duplicate')
+                continue
+            yield chunk
+
+    def _changed(self, chunks: Iterable[dict], manifest: CrawlManifest, output: str,
+                 incremental: bool) -> Iterator[dict]:
+        seen = set()
+        for chunk in chunks:
+            seen.add(chunk['id'])
+            self.metrics.inc('chunks_total')
+            if incremental and manifest.is_unchanged(chunk['id'], chunk['hash']):
+                continue
+            manifest.record(chunk['id'], chunk['hash'], output)
+            self.metrics.inc('chunks_emitted_total')
+            yield chunk
+        for chunk_id in manifest:
+            if chunk_id not in seen:
+                manifest.remove(chunk_id)
+                self.metrics.inc('chunks_deleted_total')
+                yield {'id': chunk_id, 'deleted': True}
+
+    @staticmethod
+    def collection_name(docs_path: str) -> str:
+        """
+        Name the chunk manifest of a document collection is kept under: the input name without the processed_
+        prefix, extensions and datestamp, so successive runs over newer preprocessor output share one manifest.
+        """
+        name = os.path.basename(docs_path.rstrip('/\\')).split('.')[0]
+        return re.sub(r'_\d{14}$', '', name[len('processed_'):] if name.startswith('processed_') else name)
+
+    def preprocess(self, docs_path: str, incremental: bool = True) -> str:
+        """
+        Chunks the documents of a processed_* file, streaming them through the worker pool and out to
+        chunks_<input name>.jsonl under local_cache.
+        :param docs_path: Output of ActCAPreprocessor or ParlCAPreprocessor.
+        :param incremental: Emit only chunks whose content changed since the last run over the same collection.
+            Otherwise every chunk is emitted.
+        :return: Path of the chunk file.
+        """
+        name = self.collection_name(docs_path)
+        manifest = CrawlManifest(os.path.join(self.local_cache, f'{name}_chunk_manifest.json'))
+        out_path = 'chunks_' + os.path.basename(docs_path.rstrip('/\\')).split('.')[0] + '.jsonl'
+        results = self.parallel_map(_chunk_document, enumerate(self.iter_load(docs_path)), initializer=_init_worker,
+                                    initargs=(self.max_tokens, self.language, self.num_perm, self.shingle_size))
+        chunks = self._changed(self._unique(self._in_order(progress(results))), manifest, out_path, incremental)
+        with self._pool_scope(), self.metrics.timer('stage_seconds', stage='chunk'):
+            self.cache(chunks, out_path)
+        manifest.save()
+        logging.info(f"Emitted {self.metrics.total('chunks_emitted_total')} of {self.metrics.total('chunks_total')} "
+                     f"chunks, {self.metrics.total('chunks_deleted_total')} deleted")
+        self._report_metrics('chunking')
+        return os.path.join(self.local_cache, out_path)
@@ -1,69 +1,93 @@
 import logging
-import multiprocessing
-import regex as re
-import requests
-import tqdm
-from typing import List
+from typing import Iterable, Iterator, List
 
-from goviq.config.local_cache import LOCAL_CACHE
+from goviq.config.local_cache import settings
+from goviq.entities.document import Document
+from goviq.entities.http_cache import HttpCache
 from goviq.entities.preprocessor import Preprocessor
-from goviq.utils import extract_html_text, act_reference_count
+from goviq.matching import ActMatcher
+from goviq.scrapers.parl_ca import BillStatusCrawler
+from goviq.utils import extract_html_text, progress
 
 logging.getLogger().setLevel(logging.INFO)
 
 
+# Per-process state set up once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(act_names: Iterable[str], html_parser: str) -> None:
+    _worker_state['matcher'] = ActMatcher(act_names)
+    _worker_state['html_parser'] = html_parser
+
+
+def _process_bill(record: Document | dict) -> dict:
+    document = Document.from_record(record)
+    # Bills crawled before statuses were captured at crawl time have none
+    bill = {'link': document.url, 'body': extract_html_text(document.body or '', _worker_state['html_parser']),
+            'status': document.metadata.get('status')}
+    mentions = _worker_state['matcher'].find(bill['body'])
+    bill['act_mentions'] = {act: len(spans) for act, spans in mentions.items()}
+    bill['act_mention_offsets'] = mentions
+    return bill
+
+
 class ParlCAPreprocessor(Preprocessor):
     """
     Preprocesses the raw data from the Parliament of Canada.
     """
     _version = 1
-    dropped_pattern = r'This bill was not proceeded with on | This bill was dropped from the'
-    defeated_pattern = r'This bill was defeated on'
-    royal_assent_pattern = r'This bill received royal assent on'
-
-    def __init__(self, local_cache: str = None):
-        self.local_cache = local_cache if local_cache else LOCAL_CACHE
 
-    def _parse_final_status(self, url: str) -> str:
-        r = requests.get(url)
-        if r.status_code != 200:
-            raise Exception(f'Could not retrieve {url} with status code {r.status_code}')
-        body = r.text
-        if re.search(self.dropped_pattern, body):
-            return 'dropped'
-        elif re.search(self.defeated_pattern, body):
-            return 'defeated'
-        elif re.search(self.royal_assent_pattern, body):
-            return 'royal_assent'
-        else:
-            return 'in_progress'
+    def __init__(self, local_cache: str = None, http_cache: HttpCache = None, num_processes: int = None,
+                 html_parser: str = 'html.parser', columnar: bool = False):
+        """
+        :param local_cache: Directory path for cached output.
+        :param http_cache: Optional HTTP response cache used when bill statuses have to be fetched.
+        :param num_processes: Worker processes to preprocess bills in. Defaults to one per CPU.
+        :param html_parser: Parser backend used to extract bill text, 'html.parser' or 'lxml'.
+        :param columnar: Write the output as a memory-mapped columnar corpus instead of JSON.
+        """
+        self.local_cache = local_cache if local_cache else settings.local_cache
+        self.http_cache = http_cache
+        self.num_processes = num_processes
+        self.html_parser = html_parser
+        self.columnar = columnar
 
-    @staticmethod
-    def _mpreprocess(documents: List[dict], num_processes) -> List[dict]:
-        html_texts = [list(i.values())[0] for i in documents]
-        urls = [list(i.keys())[0] for i in documents]
+    def _resolve_statuses(self, bills: List[dict]) -> None:
+        """
+        Fills in the status of bills crawled without one, fetching their pages concurrently in a single batch.
+        """
+        missing = [bill['link'] for bill in bills if bill['status'] is None]
+        if not missing:
+            return
+        logging.info(f'Resolving status of {len(missing)} bills')
+        # Status fetches are recorded in this run's metrics
+        statuses = BillStatusCrawler(http_cache=self.http_cache, metrics=self.metrics).crawl(missing)
+        for bill in bills:
+            if bill['status'] is None:
+                bill['status'] = statuses.get(bill['link'])
+                if bill['status'] is None:
+                    logging.warning(f"Could not resolve status of {bill['link']}")
 
-        # Create a pool of worker processes
-        with multiprocessing.Pool(processes=num_processes) as pool:
-            # Use map to apply the extract_text function to each chunk of HTML texts
-            # The results will be stored in a list
-            extracted_texts = pool.map(extract_html_text, html_texts)
-        # extracted_texts = [text for sublist in extracted_texts for text in sublist]
-        return [{'link': k, 'body': v} for k, v in dict(zip(urls, extracted_texts)).items()]
+    def process(self, docs: Iterable[dict], act_names: Iterable[str]) -> Iterator[dict]:
+        """
+        Extracts the text of crawled bills (Documents or their serialized records) and finds their mentions of the
+        given act titles, as the iterable yields them. Yields in completion order. Statuses are not resolved.
+        """
+        return self.parallel_map(_process_bill, docs, initializer=_init_worker,
+                                 initargs=(tuple(act_names), self.html_parser))
 
-    def preprocess(self, bills_path: str, preprocessed_acts_path: str, num_processes=4) -> List[dict]:
-        preprocessed_bills = []
-        bills = self.load(bills_path)
-        act_docs = self.load(preprocessed_acts_path)
-        act_names = []
-        for i in act_docs:
-            if 'title' in i:
-                act_names.append(i['title'])
-        bills = self._mpreprocess(bills, num_processes)
-        for bill in tqdm.tqdm(bills):  # TODO: Add multiprocessing, currently a bottleneck... ~2 minutes to run.
-            bill.update({'status': self._parse_final_status(bill['link'])})
-            bill.update({'act_mentions': act_reference_count(bill['body'], act_names)})
-            preprocessed_bills.append(bill)
-        out_path = 'processed_' + bills_path.split('/')[-1]
-        self.cache(docs=preprocessed_bills, path=out_path)
+    def preprocess(self, bills_path: str, preprocessed_acts_path: str, num_processes: int = None) -> List[dict]:
+        if num_processes is not None:
+            self.num_processes = num_processes
+        act_names = self.load_column(preprocessed_acts_path, 'title')
+        with self._pool_scope(), self.metrics.timer('stage_seconds', stage='process'):
+            preprocessed_bills = list(progress(self.process(self.iter_load(bills_path), act_names)))
+        self.metrics.inc('documents_total', len(preprocessed_bills))
+        with self.metrics.timer('stage_seconds', stage='resolve_statuses'):
+            self._resolve_statuses(preprocessed_bills)
+        out_path = self.output_path(bills_path)
+        with self.metrics.timer('stage_seconds', stage='write'):
+            self.cache(docs=preprocessed_bills, path=out_path)
+        self._report_metrics('bill_preprocessing')
         return preprocessed_bills
@@ -0,0 +1,57 @@
+"""
+Registry of the sources goviq can crawl. A source is a Crawler subclass that sets name and output_name and implements
+_parse, _document and discover (see goviq.entities.crawler.Crawler). Built-in sources are listed by import path, so
+looking one up imports only its own module. Other packages add sources with register, or under the goviq.crawlers
+entry point group ("name = package.module:CrawlerClass").
+"""
+from importlib import import_module
+from typing import Dict, List
+
+CRAWLERS: Dict[str, str | type] = {
+    'acts_ca': 'goviq.scrapers.acts_ca:ActCrawler',
+    'parl_ca': 'goviq.scrapers.parl_ca:BillCrawler',
+}
+ENTRY_POINT_GROUP = 'goviq.crawlers'
+_entry_points_loaded = False
+
+
+def register(crawler_class: type) -> type:
+    """
+    Registers a crawler class under its name. Usable as a class decorator.
+    """
+    if not crawler_class.name or not crawler_class.output_name:
+        raise ValueError(f'{crawler_class.__name__} needs a name and an output_name to be registered')
+    CRAWLERS[crawler_class.name] = crawler_class
+    return crawler_class
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    from importlib.metadata import entry_points
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        CRAWLERS.setdefault(entry_point.name, entry_point.value)
+    _entry_points_loaded = True
+
+
+def available() -> List[str]:
+    """
+    Names of the registered sources.
+    """
+    _load_entry_points()
+    return sorted(CRAWLERS)
+
+
+def get_crawler(name: str) -> type:
+    """
+    Returns the crawler class registered under name, importing it on first use.
+    """
+    _load_entry_points()
+    if name not in CRAWLERS:
+        raise ValueError(f'Unknown crawler source {name}. Expected one of {available()}')
+    crawler_class = CRAWLERS[name]
+    if isinstance(crawler_class, str):
+        module, _, attr = crawler_class.partition(':')
+        crawler_class = CRAWLERS[name] = getattr(import_module(module), attr)
+    return crawler_class
@@ -1,18 +1,44 @@
 # act_crawler.py
 import asyncio
 import logging
-import json
-from bs4 import BeautifulSoup
-import aiohttp
 
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Dict, List
 
-from goviq.config.local_cache import LOCAL_CACHE
+from goviq.config.local_cache import settings
 from goviq.entities.crawler import Crawler
-from goviq.utils import datestamp
+from goviq.entities.document import ACT, Document
+from goviq.entities.http_cache import HttpCache
+from goviq.parsing import get_parser
+from goviq.sections import parse_sections
 
 logging.getLogger().setLevel(logging.INFO)
 
+
+def parse_act_text(html: str, parser: str = "html.parser") -> Dict[str, List[Any]]:
+    """
+    Extracts the text of the Act from a FullText.html page, one segment per <div class="docContents">, together with
+    the part/section/subsection tree of each segment (see goviq.sections) with offsets into the segment text.
+    Module-level so that it can be run in the crawler's parse process pool.
+    """
+    segments, sections = [], []
+    for events in get_parser(parser).events_by_class(html, "div", "docContents"):
+        text, tree = parse_sections(events)
+        segments.append(text)
+        sections.append(tree)
+    return {"segments": segments, "sections": sections}
+
+
+def parse_act_index(html: str, root_url: str, parser: str = "html.parser") -> List[str]:
+    """
+    Parses an alphabetical index page to find each Act's "FullText.html" link.
+    Returns absolute URLs for each Act's full text. Module-level so that it can be run in the crawler's parse process
+    pool.
+    """
+    hrefs = get_parser(parser).attrs_by_class(html, "a", "TocTitle", "href")
+    # Convert relative URLs to absolute "FullText.html" links
+    return [root_url + href.replace("index.html", "FullText.html") for href in hrefs if href.endswith("index.html")]
+
+
 class ActCrawler(Crawler):
     """
     Fetches links to acts from laws.justice.gc.ca. Federal-level Canadian acts.
@@ -20,49 +46,43 @@ class ActCrawler(Crawler):
     ROOT_URL = "https://laws-lois.justice.gc.ca/eng/acts/"
     ALPHABET = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
     ACT_URLS = [f"https://laws-lois.justice.gc.ca/eng/acts/{a}.html" for a in ALPHABET]
+    # 2: acts are parsed into {'segments', 'sections'} rather than a list of segments
+    parse_version = 2
+    source = ACT
+    name = "acts_ca"
+    output_name = "act_text"
 
-    def __init__(self, local_cache: str = None, max_concurrent_tasks: int = 50):
+    def __init__(self, local_cache: str = None, max_concurrent_tasks: int = 50, http_cache: HttpCache = None,
+                 parse_workers: int = 0, html_parser: str = "html.parser"):
         """
         :param local_cache: Directory path for cached output.
         :param max_concurrent_tasks: How many pages to fetch concurrently.
+        :param http_cache: Optional on-disk HTTP response cache shared across runs.
+        :param parse_workers: How many processes to parse acts in. 0 parses on the event loop.
+        :param html_parser: Parser backend, "html.parser" or "lxml".
         """
-        super().__init__(max_concurrent_tasks=max_concurrent_tasks)
-        self.local_cache = local_cache if local_cache else LOCAL_CACHE
+        super().__init__(max_concurrent_tasks=max_concurrent_tasks, http_cache=http_cache,
+                         parse_workers=parse_workers, html_parser=html_parser)
+        self.local_cache = local_cache if local_cache else settings.local_cache
 
-    def _parse_index(self, html: str) -> List[str]:
+    async def _parse(self, html: str) -> Dict[str, List[Any]]:
         """
-        Parses the alphabetical index page to find each Act's "FullText.html" link.
-        Returns absolute URLs for each Act's full text.
-        """
-        soup = BeautifulSoup(html, "html.parser")
-        link_elements = soup.find_all("a", {"class": "TocTitle"})
-        # Convert relative URLs to absolute "FullText.html" links
-        fulltext_links = []
-        for link in link_elements:
-            href = link.get("href", "")
-            if href.endswith("index.html"):
-                full_url = self.ROOT_URL + href.replace("index.html", "FullText.html")
-                fulltext_links.append(full_url)
-        return fulltext_links
-
-    async def _parse(self, html: str) -> List[str]:
-        """
-        Asynchronously parses the final FullText.html page to extract the text of the Act.
-        Returns a list of text segments (one per <div class="docContents">).
+        Asynchronously parses the final FullText.html page to extract the text and provision structure of the Act.
+        Returns {'segments': [text per <div class="docContents">], 'sections': [provision tree per segment]}.
         """
         if html is None:
-            return []
-        soup = BeautifulSoup(html, "html.parser")
-        div_elements = soup.find_all("div", {"class": "docContents"})
-        return [div_element.get_text(strip=True) for div_element in div_elements]
+            return {"segments": [], "sections": []}
+        return await self._offload(parse_act_text, html, self.html_parser)
+
+    def _document(self, url: str, parsed_data: Dict[str, List[Any]]) -> Document:
+        return Document(url, ACT, segments=parsed_data["segments"], metadata={"sections": parsed_data["sections"]})
 
     async def _fetch_act_urls(self) -> List[str]:
         """
         Asynchronously fetches all index pages and compiles a list of final FullText.html links.
         """
         act_urls = []
-        connector = aiohttp.TCPConnector(limit=50)
-        async with aiohttp.ClientSession(connector=connector) as session:
+        async with self._session_scope() as session:
             tasks = [self._fetch(url, session) for url in self.ACT_URLS]
             # Each item is either the HTML or None
             index_pages = await asyncio.gather(*tasks, return_exceptions=True)
@@ -71,36 +91,32 @@ class ActCrawler(Crawler):
             if isinstance(result, Exception):
                 logging.error(f"Index fetch for {self.ACT_URLS[idx]} failed: {result}")
             elif result is not None:
-                # Parse the index page to get final act links
-                final_links = self._parse_index(result)
+                # Parse the index page to get final act links, off the event loop if a parse pool is open
+                final_links = await self._offload(parse_act_index, result, self.ROOT_URL, self.html_parser)
                 act_urls.extend(final_links)
 
         return act_urls
 
-    def _cache(self, data: List[Dict[str, Any]], filename: str = "act_text") -> None:
+    async def discover(self) -> AsyncIterator[str]:
         """
-        Caches the results to a JSON file with a datestamp.
-        """
-        filepath = f"{self.local_cache}/{filename}_{datestamp()}.json"
-        try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logging.info(f"Cached {len(data)} items to {filepath}")
-        except IOError as e:
-            logging.error(f"Error writing cache file {filepath}: {e}")
-
-    def crawl(self) -> None:
-        """
-        Main entry point: fetches index pages, extracts final Act URLs, then crawls them for text.
+        Fetches the index pages, then yields the final FullText.html link of every Act.
         """
         logging.info("Fetching Act index pages...")
-        loop = asyncio.get_event_loop()
-        act_urls = loop.run_until_complete(self._fetch_act_urls())
+        act_urls = await self._fetch_act_urls()
         logging.info(f"Found {len(act_urls)} final Act links. Beginning crawl...")
+        for url in act_urls:
+            yield url
 
-        # Now fetch + parse the actual FullText.html pages
-        results = loop.run_until_complete(self._crawl(act_urls))
+    def crawl(self, incremental: bool = False, compression: str = None, resume: bool = False) -> str:
+        """
+        Main entry point: fetches index pages, extracts final Act URLs, then crawls them for text.
+        Each act is appended to act_text_<datestamp>.jsonl as a Document, with its segments and
+        metadata['sections'], as soon as it is parsed.
 
-        # results is a list of dicts: [{url: [list_of_text_segments]}, ...]
-        self._cache(results)
-        logging.info("ActCrawler crawl complete.")
+        :param incremental: Only parse and write acts that are new or changed since the last incremental crawl.
+            Writes an act_text_delta_<datestamp>.jsonl file and updates act_text_latest.jsonl.
+        :param compression: None, 'gzip' or 'zstd'.
+        :param resume: Continue the last crawl if it did not finish, fetching only the acts it had not completed.
+        :return: Path of the output file.
+        """
+        return asyncio.run(self.crawl_async(incremental=incremental, compression=compression, resume=resume))
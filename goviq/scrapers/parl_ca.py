@@ -1,95 +1,209 @@
-import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
 import logging
-import json
-import requests
-from typing import Iterable, List, Dict, Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List
 
-from goviq.config.local_cache import LOCAL_CACHE
+from goviq.config.local_cache import settings
+from goviq.config.scrapers.parl_ca import (BILL_LIST_PATH, CURRENT_BILL_LIST_PATH, get_bill_links, parse_bill_status,
+                                           parse_sessions)
 from goviq.entities.crawler import Crawler
-from goviq.utils import datestamp
+from goviq.entities.document import BILL, Document
+from goviq.entities.http_cache import HttpCache
+from goviq.entities.metrics import Metrics
+from goviq.parsing import get_parser
+from goviq.utils import content_hash
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logging.getLogger().setLevel(logging.INFO)
 
+
+def parse_document_links(html: str, parser: str = 'html.parser') -> List[str]:
+    """
+    Extracts the DocumentViewer links from a bill page.
+    Module-level so that it can be run in the crawler's parse process pool.
+    """
+    links = get_parser(parser).attrs_by_class(html, 'a', 'publication btn btn-primary', 'href')
+    return [link for link in links if link.startswith('/DocumentViewer/en')]
+
+
+def parse_bill_page(html: str, parser: str = 'html.parser') -> Dict[str, Any]:
+    """
+    Extracts the DocumentViewer links and the final status from a bill page.
+    """
+    return {'links': parse_document_links(html, parser), 'status': parse_bill_status(html)}
+
+
 class BillCrawler(Crawler):
     """
     Fetches links to bills from parl.ca. Federal level Canadian bills.
     """
     ROOT_URL = "https://www.parl.ca"
-    BILL_URL = "https://www.parl.ca/legisinfo/en/legislation-at-a-glance"
     _version = 1
+    source = BILL
+    name = 'parl_ca'
+    output_name = 'bill_text'
+    # The bill text is fetched from DocumentViewer by _parse, and can be revised while the LegisInfo page stays the same
+    parse_fetches_pages = True
 
-    def __init__(self, local_cache: str = None, max_concurrent_tasks: int = 100):
-        super().__init__(max_concurrent_tasks)
-        self.local_cache = local_cache if local_cache else LOCAL_CACHE
-        self.bill_links = self.fetch_bills()
+    def __init__(self, local_cache: str = None, max_concurrent_tasks: int = 100, http_cache: HttpCache = None,
+                 parse_workers: int = 0, html_parser: str = 'html.parser', sessions: str | Iterable[str] = None,
+                 max_pages: int = 100):
+        """
+        :param sessions: Parliament sessions to crawl, e.g. ['43-2', '44-1'], '43-2,44-1' or the range '42-1:44-1'.
+            Defaults to the current session.
+        :param max_pages: Maximum number of listing pages walked per session.
+        """
+        super().__init__(max_concurrent_tasks, http_cache=http_cache, parse_workers=parse_workers,
+                         html_parser=html_parser)
+        self.local_cache = local_cache if local_cache else settings.local_cache
+        self.sessions = parse_sessions(sessions) if sessions else [None]
+        self.max_pages = max_pages
 
-    def fetch_bills(self) -> Iterable[str]:
+    def listing_url(self, session: str | None, page: int) -> str:
+        if session is None:
+            return self.ROOT_URL + CURRENT_BILL_LIST_PATH.format(page=page)
+        return self.ROOT_URL + BILL_LIST_PATH.format(session=session, page=page)
+
+    async def _discover_session(self, session: str | None, http_session: 'aiohttp.ClientSession',
+                                found: asyncio.Queue, seen: set) -> None:
         """
-        Fetches links to bills from parl.ca. Federal level Canadian bills.
-        :return: list of bill links
+        Walks the listing pages of one session until a page adds no new bills, putting each new bill URL on found.
         """
+        count = 0
+        page = 0
         try:
-            response = requests.get(self.BILL_URL, headers={'User-Agent': self.user_agent})
-            response.raise_for_status()
-            text = response.text
-            soup = BeautifulSoup(text, 'html.parser')
-            links = set(soup.find_all('a', class_='bill-tile-popup interactive-popup'))
-            return [self.ROOT_URL + link['href'] for link in links if 'href' in link.attrs]
-        except requests.RequestException as e:
-            logging.error(f"Error fetching bill links: {e}")
-            return []
+            for page in range(1, self.max_pages + 1):
+                html = await self._fetch(self.listing_url(session, page), http_session)
+                if html is None:
+                    logging.error(f"Error fetching page {page} of the bill listing of session {session or 'current'}")
+                    break
+                self.metrics.inc('listing_pages_total')
+                new = 0
+                for href in await self._offload(get_bill_links, html, self.html_parser):
+                    url = self.ROOT_URL + href
+                    if url not in seen:
+                        seen.add(url)
+                        new += 1
+                        await found.put(url)
+                # Past the last page LegisInfo serves an empty or repeated page
+                if not new:
+                    break
+                count += new
+        finally:
+            logging.info(f"Discovered {count} bills in session {session or 'current'} over {page} listing pages")
+            await found.put(None)
 
-    async def _parse(self, html: str) -> str:
+    async def discover_bills(self) -> AsyncIterator[str]:
+        """
+        Yields the URL of every bill of the crawler's sessions, without repeats, as listing pages arrive. Sessions
+        are walked concurrently and, when this feeds _crawl, bills are fetched while discovery is still running.
+        """
+        found = asyncio.Queue()
+        seen = set()
+        async with self._session_scope() as http_session:
+            tasks = [asyncio.create_task(self._discover_session(session, http_session, found, seen))
+                     for session in self.sessions]
+            try:
+                remaining = len(tasks)
+                while remaining:
+                    url = await found.get()
+                    if url is None:
+                        remaining -= 1
+                        continue
+                    self.metrics.inc('bills_discovered_total')
+                    yield url
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _parse(self, html: str) -> Dict[str, Any] | None:
         """
         Asynchronously parses bill HTML content to extract detailed information.
-        
+        The bill's final status is read from the bill page here, while it is in hand, so preprocessing needs no
+        network access.
+
         :param html: The HTML content of the bill page.
-        :return: The detailed bill HTML content or None.
+        :return: {'html': detailed bill HTML content, 'status': final status} or None.
         """
         if html is None:
             return None
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            links = soup.find_all('a', class_='publication btn btn-primary')
-            links = [link['href'] for link in links if link.get('href', '').startswith('/DocumentViewer/en')]
+            page = await self._offload(parse_bill_page, html, self.html_parser)
+            links = page['links']
             # Assert that there is only one link, and then make a request to that link and pull the entire HTML body
             if len(links) != 1:
                 raise ValueError(f"Expected 1 link, got {len(links)}")
             link = links[0]
             detailed_url = self.ROOT_URL + link
-            async with aiohttp.ClientSession() as session:
+            # Reuse the crawler's pooled session rather than paying connection setup per bill
+            async with self._session_scope() as session:
                 detailed_html = await self._fetch(detailed_url, session)
-            return detailed_html
+            if detailed_html is None:
+                return None
+            return {'html': detailed_html, 'status': page['status']}
         except Exception as e:
             logging.error(f"Error parsing HTML: {e}")
             return None
 
-    def _cache(self, data: List[Dict[str, Any]], filename: str = 'bill_text') -> None:
+    def _document_digest(self, url: str, html: str, parsed_data: Dict[str, Any] | None) -> str:
         """
-        Caches the list of bill details to a JSON file.
-
-        :param data: List of dictionaries containing bill details.
-        :param filename: Base filename to cache to.
+        Hashes the LegisInfo page together with the bill text, so a revised text is picked up by incremental crawls.
         """
-        try:
-            filepath = f"{self.local_cache}/{filename}_{datestamp()}.json"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            logging.info(f'Cached {len(data)} bill details to {filepath}')
-        except IOError as e:
-            logging.error(f"Error writing to cache file {filepath}: {e}")
-
-    def crawl(self, local_cache: str = None) -> None:
+        text = parsed_data['html'] if parsed_data is not None else ''
+        return content_hash(self._digest(url, html) + text)
+
+    def _document(self, url: str, parsed_data: Dict[str, Any] | None) -> Document:
+        if parsed_data is None:
+            return Document(url, BILL)
+        return Document(url, BILL, body=parsed_data['html'], metadata={'status': parsed_data['status']})
+
+    def discover(self) -> AsyncIterator[str]:
+        return self.discover_bills()
+
+    def crawl(self, local_cache: str = None, incremental: bool = False, compression: str = None,
+              resume: bool = False) -> str | None:
         """
         Initiates the crawling process to fetch and cache bill details.
+        Each bill is appended to bill_text_<datestamp>.jsonl as a Document, with its status in metadata['status'],
+        as soon as it is parsed.
+
+        :param incremental: Only write bills whose LegisInfo page or text is new or changed since the last
+            incremental crawl. Writes a bill_text_delta_<datestamp>.jsonl file and updates bill_text_latest.jsonl.
+        :param compression: None, 'gzip' or 'zstd'.
+        :param resume: Continue the last crawl if it did not finish, fetching only the bills it had not completed.
+            Listing pages are walked again.
+        :return: Path of the output file, or None if the crawl failed.
         """
-        loop = asyncio.get_event_loop()
-        logging.info('Beginning crawl of parl.ca')
         try:
-            links = loop.run_until_complete(self._crawl(links=self.bill_links))
-            logging.info('Completed crawl of parl.ca. Caching results to disk.')
-            self._cache(links)
+            return asyncio.run(self.crawl_async(incremental=incremental, compression=compression, resume=resume))
         except Exception as e:
             logging.error(f"Error during crawl: {e}")
+            return None
+
+
+class BillStatusCrawler(Crawler):
+    """
+    Resolves the final status of bills from their LegisInfo pages concurrently.
+    Used for bills crawled before BillCrawler recorded statuses.
+    """
+    source = BILL
+
+    def __init__(self, max_concurrent_tasks: int = 20, http_cache: HttpCache = None, max_retries: int = 3,
+                 metrics: Metrics = None):
+        super().__init__(max_concurrent_tasks, http_cache=http_cache, max_retries=max_retries, metrics=metrics)
+
+    async def _parse(self, html: str) -> str:
+        return await self._offload(parse_bill_status, html)
+
+    def _document(self, url: str, parsed_data: str) -> Document:
+        return Document(url, BILL, metadata={'status': parsed_data})
+
+    def crawl(self, urls: Iterable[str]) -> Dict[str, str]:
+        """
+        Fetches each bill page and returns {url: status}. URLs that could not be fetched are omitted.
+        """
+        results = asyncio.run(self._crawl(urls))
+        self._save_http_cache()
+        return {document.url: document.metadata['status'] for document in results}
@@ -0,0 +1,266 @@
+"""
+Provision structure of acts. The parts, sections, subsections and paragraphs of a FullText page are recovered as a
+tree of character spans over the act text, in the same pass that extracts the text, and persisted as a flat
+SectionIndex so a citation such as "Bank Act, s. 12(3)" resolves to its span with two dict lookups.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from goviq.config.scrapers.acts_ca import (BOUNDARY_CLASSES, CITATION_PATTERN, LABEL_CLASSES, MARGINAL_NOTE_CLASS,
+                                           PART_LABEL_PATTERN, STRUCTURE_CLASSES)
+from goviq.parsing import END, START, TEXT, Event
+
+LEVELS = {'part': 0, 'section': 1, 'subsection': 2, 'paragraph': 3}
+
+
+class _TreeBuilder:
+    """
+    Consumes the events of one docContents element, accumulating its text and the provisions found in it.
+    Every node is {'kind', 'label', 'id', 'start', 'end', 'children'} with start/end offsets into the text.
+    """
+
+    def __init__(self):
+        self.pieces: List[str] = []
+        self.offset = 0
+        self.roots: List[dict] = []
+        # Open provisions, outermost first. A provision stays open until one of the same or a higher level starts.
+        self.open: List[dict] = []
+        # Per open element: (is marginal note, label context or None)
+        self.elements: List[Tuple[bool, list | None]] = []
+        # Label contexts of the open label elements: [label kind, node being labelled]
+        self.labels: List[list] = []
+        # Start of a marginal note waiting for the provision it describes
+        self.pending = None
+        self.marginal_depth = 0
+
+    def _close(self, level: int, end: int) -> None:
+        while self.open and LEVELS[self.open[-1]['kind']] >= level:
+            self.open.pop()['end'] = end
+
+    def _open(self, kind: str, element_id: str | None, start: int) -> dict:
+        self._close(LEVELS[kind], start)
+        node = {'kind': kind, 'label': None, 'id': element_id, 'start': start, 'end': None, 'children': []}
+        (self.open[-1]['children'] if self.open else self.roots).append(node)
+        self.open.append(node)
+        return node
+
+    def _new_section(self) -> dict:
+        """
+        Opens a section for a section label found outside any unlabelled section, as when the first subsection of
+        a section carries the section number. The section starts where its outermost open subsection does.
+        """
+        inner = [i for i, node in enumerate(self.open) if LEVELS[node['kind']] > LEVELS['section']]
+        if not inner:
+            return self._open('section', None, self.offset)
+        moved = self.open[inner[0]:]
+        del self.open[inner[0]:]
+        first = moved[0]
+        (self.open[-1]['children'] if self.open else self.roots).remove(first)
+        section = self._open('section', None, first['start'])
+        section['children'].append(first)
+        self.open.extend(moved)
+        return section
+
+    def _label_target(self, kind: str | None) -> dict | None:
+        if kind == 'section':
+            for node in reversed(self.open):
+                if node['kind'] == 'section':
+                    return node if node['label'] is None else self._new_section()
+            return self._new_section()
+        kinds = ('subsection', 'paragraph') if kind is None else (kind,)
+        for node in reversed(self.open):
+            if node['kind'] in kinds:
+                return node if node['label'] is None else None
+        return None
+
+    def _text(self, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        if self.labels:
+            context = self.labels[-1]
+            if context[1] is None:
+                context[1] = self._label_target(context[0])
+                if context[1] is not None:
+                    context[1]['label'] = ''
+            if context[1] is not None:
+                context[1]['label'] += text
+        if not self.marginal_depth:
+            self.pending = None
+        self.pieces.append(text)
+        self.offset += len(text)
+
+    def _start(self, classes: Tuple[str, ...], element_id: str | None) -> None:
+        lowered = [c.lower() for c in classes]
+        marginal = MARGINAL_NOTE_CLASS in lowered
+        if marginal:
+            self.marginal_depth += 1
+            if self.pending is None:
+                self.pending = self.offset
+        kind = next((STRUCTURE_CLASSES[c] for c in lowered if c in STRUCTURE_CLASSES), None)
+        if kind is not None:
+            self._open(kind, element_id, self.offset if self.pending is None else self.pending)
+            self.pending = None
+        elif BOUNDARY_CLASSES.intersection(lowered):
+            self._close(LEVELS['section'], self.offset)
+        label = next(([LABEL_CLASSES[c], None] for c in lowered if c in LABEL_CLASSES), None)
+        if label is not None:
+            self.labels.append(label)
+        self.elements.append((marginal, label))
+
+    def _end(self) -> None:
+        marginal, label = self.elements.pop()
+        if marginal:
+            self.marginal_depth -= 1
+        if label is not None:
+            self.labels.pop()
+
+    def feed(self, events: Iterable[Event]) -> Tuple[str, List[dict]]:
+        for kind, value, classes, element_id in events:
+            if kind == TEXT:
+                self._text(value)
+            elif kind == START:
+                self._start(classes, element_id)
+            elif kind == END:
+                self._end()
+        self._close(0, self.offset)
+        for node in walk_sections(self.roots):
+            if node['kind'] == 'part' and node['label']:
+                node['label'] = PART_LABEL_PATTERN.sub('', node['label']).strip()
+        return ''.join(self.pieces), self.roots
+
+
+def walk_sections(nodes: List[dict]) -> Iterable[dict]:
+    """
+    Yields every provision of a tree, depth first in document order.
+    """
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node['children']))
+
+
+def parse_sections(events: Iterable[Event]) -> Tuple[str, List[dict]]:
+    """
+    Builds the provision tree of one element from its parser events (see HtmlParser.events_by_class).
+    Returns (text, tree) where text is identical to the element's texts_by_class text and the node offsets index
+    into it.
+    """
+    return _TreeBuilder().feed(events)
+
+
+def clip_sections(nodes: List[dict], start: int, end: int) -> List[dict]:
+    """
+    Returns the provisions overlapping text[start:end], with offsets relative to start and clipped to the range.
+    Used to carry the tree over to one language half of a bilingual act.
+    """
+    clipped = []
+    for node in nodes:
+        if node['end'] <= start or node['start'] >= end:
+            continue
+        clipped.append(dict(node, start=max(node['start'], start) - start, end=min(node['end'], end) - start,
+                            children=clip_sections(node['children'], start, end)))
+    return clipped
+
+
+def section_refs(nodes: List[dict]) -> Dict[str, Tuple[int, int]]:
+    """
+    Flattens a provision tree into {reference: (start, end)}, e.g. 'Part I', '12', '12(3)', '12(3)(a)'.
+    Section numbers run through the whole act, so parts do not prefix them. The first occurrence of a repeated
+    reference wins.
+    """
+    refs = {}
+    stack = [(node, '') for node in reversed(nodes)]
+    while stack:
+        node, prefix = stack.pop()
+        ref = prefix
+        if node['label']:
+            if node['kind'] == 'part':
+                refs.setdefault(f"Part {node['label']}", (node['start'], node['end']))
+            else:
+                ref = normalize_ref(prefix + node['label'])
+                refs.setdefault(ref, (node['start'], node['end']))
+        stack.extend((child, ref) for child in reversed(node['children']))
+    return refs
+
+
+def normalize_ref(ref: str) -> str:
+    return ''.join(ref.split())
+
+
+class SectionIndex:
+    """
+    Persistent citation index over preprocessed acts: act title -> act URL -> reference -> (start, end) in the act
+    body. Only offsets are stored, so the index stays small and the text is sliced from the body on demand.
+    """
+
+    def __init__(self, titles: Dict[str, str] = None, refs: Dict[str, Dict[str, List[int]]] = None):
+        self.titles = titles or {}
+        self.refs = refs or {}
+
+    @classmethod
+    def from_acts(cls, acts: Iterable[dict]) -> 'SectionIndex':
+        """
+        Builds the index from preprocessed acts ({'url', 'title', 'sections', ...}).
+        """
+        index = cls()
+        for act in acts:
+            if act.get('sections'):
+                index.add(act['url'], act.get('title'), act['sections'])
+        return index
+
+    def add(self, url: str, title: str | None, sections: List[dict]) -> None:
+        self.refs[url] = {ref: list(span) for ref, span in section_refs(sections).items()}
+        if title:
+            self.titles[title.lower()] = url
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def _url(self, act: str) -> str | None:
+        if act in self.refs:
+            return act
+        return self.titles.get(act.strip().lower())
+
+    def lookup(self, act: str, ref: str) -> Tuple[int, int] | None:
+        """
+        Returns the (start, end) span of a provision of an act, given the act's URL or title and a reference such
+        as '12(3)' or 'Part I'.
+        """
+        url = self._url(act)
+        if url is None:
+            return None
+        if ref.lower().startswith('part'):
+            ref = 'Part ' + ref[4:].strip()
+        else:
+            ref = normalize_ref(ref)
+        span = self.refs[url].get(ref)
+        return tuple(span) if span is not None else None
+
+    def resolve(self, citation: str) -> Tuple[str, int, int] | None:
+        """
+        Resolves a citation such as "Bank Act, s. 12(3)" or "Bank Act, Part I" to (act URL, start, end).
+        """
+        match = CITATION_PATTERN.match(citation)
+        if match is None:
+            return None
+        url = self._url(match['act'])
+        if url is None:
+            return None
+        ref = match['section'] if match['section'] else f"Part {match['part']}"
+        span = self.lookup(url, ref)
+        return (url, *span) if span is not None else None
+
+    def save(self, path: str) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'titles': self.titles, 'refs': self.refs}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'SectionIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(titles=data['titles'], refs=data['refs'])
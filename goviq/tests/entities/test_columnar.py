@@ -0,0 +1,70 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from goviq.entities.columnar import ColumnarCorpus, ColumnarWriter
+from goviq.entities.preprocessor import Preprocessor
+from goviq.utils import iter_json_docs, load_json_docs
+
+DOCS = [
+    {'url': 'http://a', 'title': 'Bank Act', 'body': 'Loi sur les banques é', 'sections': [{'kind': 'part'}]},
+    {'url': 'http://b', 'body': ''},
+    {'url': 'http://c', 'title': None, 'body': 'Third'},
+]
+
+
+class TestColumnarCorpus(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'processed_act_text.corpus')
+        with ColumnarWriter(self.path) as writer:
+            for doc in DOCS:
+                writer.write(doc)
+            self.assertFalse(os.path.exists(self.path))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        with ColumnarCorpus(self.path) as corpus:
+            self.assertEqual(len(corpus), 3)
+            self.assertEqual(list(corpus), DOCS)
+            self.assertEqual(corpus[-1], DOCS[2])
+            self.assertEqual(corpus.body(0), DOCS[0]['body'])
+            view = corpus.body_bytes(0)
+            self.assertEqual(bytes(view).decode('utf-8'), DOCS[0]['body'])
+            view.release()
+            self.assertEqual(corpus.column('title'), ['Bank Act', None, None])
+            with self.assertRaises(IndexError):
+                corpus[3]
+        self.assertEqual(load_json_docs(self.path), DOCS)
+        self.assertEqual(list(iter_json_docs(self.path)), DOCS)
+        self.assertEqual(Preprocessor.load_column(self.path, 'title'), ['Bank Act', None])
+
+    def test_missing_body(self):
+        docs = [{'url': 'http://d', 'title': 'No body'}, {'url': 'http://e', 'body': None},
+                {'url': 'http://f', 'body': 'f'}]
+        with ColumnarWriter(self.path) as writer:
+            for doc in docs:
+                writer.write(doc)
+        with ColumnarCorpus(self.path) as corpus:
+            self.assertEqual(list(corpus), docs)
+            self.assertEqual(corpus.absent('body'), {0})
+        self.assertEqual(load_json_docs(self.path), docs)
+
+    def test_pickle(self):
+        with ColumnarCorpus(self.path) as corpus:
+            copy = pickle.loads(pickle.dumps(corpus))
+            self.assertEqual(list(copy), DOCS)
+            copy.close()
+
+    def test_overwrite_and_empty(self):
+        with ColumnarWriter(self.path) as writer:
+            writer.write({'url': 'http://d', 'body': 'd'})
+        self.assertEqual(load_json_docs(self.path), [{'url': 'http://d', 'body': 'd'}])
+        with ColumnarWriter(self.path):
+            pass
+        with ColumnarCorpus(self.path) as corpus:
+            self.assertEqual(len(corpus), 0)
+            self.assertEqual(list(corpus), [])
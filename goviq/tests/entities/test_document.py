@@ -0,0 +1,36 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from goviq.entities.document import ACT, BILL, Document
+from goviq.entities.writer import JsonlWriter
+from goviq.utils import iter_json_docs
+
+
+class TestDocument(unittest.TestCase):
+    def test_round_trip(self):
+        documents = [
+            Document('http://a', ACT, segments=['é', 'b'], fetched_at=1.5, content_hash='ab',
+                     metadata={'sections': [[{'kind': 'part', 'start': 0, 'end': 1}]]}),
+            Document('http://b', BILL, body='<p>c</p>', metadata={'status': 'defeated'}),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.jsonl')
+            with JsonlWriter(path) as writer:
+                for document in documents:
+                    writer.write(document)
+            records = list(iter_json_docs(path))
+        self.assertEqual(records[1], documents[1].to_dict())
+        self.assertEqual([Document.from_record(record) for record in records], documents)
+        self.assertEqual(pickle.loads(pickle.dumps(documents[0])), documents[0])
+
+    def test_legacy_records(self):
+        self.assertEqual(Document.from_record({'http://a': ['x']}), Document('http://a', ACT, segments=['x']))
+        self.assertEqual(Document.from_record({'http://a': {'segments': ['x'], 'sections': [[]]}}),
+                         Document('http://a', ACT, segments=['x'], metadata={'sections': [[]]}))
+        self.assertEqual(Document.from_record({'http://b': '<p>c</p>'}), Document('http://b', BILL, body='<p>c</p>'))
+        self.assertEqual(Document.from_record({'http://b': {'html': '<p>c</p>', 'status': 'dropped'}}),
+                         Document('http://b', BILL, body='<p>c</p>', metadata={'status': 'dropped'}))
+        self.assertEqual(Document.url_of({'http://b': None}), 'http://b')
+        self.assertEqual(Document.url_of(Document('http://b', BILL).to_dict()), 'http://b')
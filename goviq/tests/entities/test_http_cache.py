@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from goviq.entities.http_cache import HttpCache
+from goviq.scrapers.parl_ca import BillStatusCrawler
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.tests.mock_server import MockGovServer
+
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_validators(self):
+        self.assertEqual(self.cache.validators('http://a'), {})
+        self.cache.store('http://a', 'body', {'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        self.assertEqual(self.cache.validators('http://a'), {
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+        })
+
+    def test_not_modified_counts_hit(self):
+        self.cache.store('http://a', 'body', {})
+        self.assertEqual(self.cache.not_modified('http://a'), 'body')
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['bytes_saved'], 4)
+
+    def test_parsed_invalidated_on_change(self):
+        self.cache.store('http://a', 'body', {})
+        self.cache.store_parsed('http://a', ['parsed'])
+        self.assertEqual(self.cache.get_parsed('http://a'), ['parsed'])
+        self.cache.store('http://a', 'body', {})
+        self.assertEqual(self.cache.get_parsed('http://a'), ['parsed'])
+        self.cache.store('http://a', 'new body', {})
+        self.assertIsNone(self.cache.get_parsed('http://a'))
+
+    def test_eviction(self):
+        cache = HttpCache(self.tmp.name, max_bytes=10)
+        cache.store('http://a', 'aaaaaa', {})
+        cache.store('http://b', 'bbbbbb', {})
+        self.assertNotIn('http://a', cache)
+        self.assertIn('http://b', cache)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_persistence(self):
+        self.cache.store('http://a', 'body', {'ETag': '"abc"'})
+        self.cache.save()
+        reloaded = HttpCache(self.tmp.name)
+        self.assertEqual(reloaded.get('http://a'), 'body')
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, HttpCache.index_filename)))
+
+
+class TestConditionalFetch(unittest.TestCase):
+    def test_missing_body_refetched(self):
+        corpus = SyntheticCorpus(acts=0, bills=1)
+        with tempfile.TemporaryDirectory() as tmp, MockGovServer(corpus) as base_url:
+            cache = HttpCache(tmp)
+            url = base_url + corpus.bill_path(next(iter(corpus.bills)))
+            BillStatusCrawler(http_cache=cache).crawl([url])
+            os.remove(cache._body_path(url))
+            # The server answers 304 to the cached validators; the full page is requested again, not as a retry
+            crawler = BillStatusCrawler(http_cache=cache, max_retries=0)
+            self.assertEqual(crawler.crawl([url]), {url: next(iter(corpus.bills.values()))['status']})
+            self.assertEqual(crawler.metrics.total('fetch_retries_total'), 0)
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import unittest
+
+from goviq.entities.manifest import CrawlManifest
+
+
+class TestCrawlManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'manifest.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged(self):
+        manifest = CrawlManifest(self.path)
+        self.assertFalse(manifest.is_unchanged('http://a', 'h1'))
+        manifest.record('http://a', 'h1', 'out.json')
+        self.assertTrue(manifest.is_unchanged('http://a', 'h1'))
+        self.assertFalse(manifest.is_unchanged('http://a', 'h2'))
+
+    def test_round_trip(self):
+        manifest = CrawlManifest(self.path)
+        manifest.record_all({'http://a': 'h1', 'http://b': 'h2'}, ['http://a'], 'delta.json')
+        manifest.save()
+        reloaded = CrawlManifest(self.path)
+        self.assertIn('http://a', reloaded)
+        self.assertNotIn('http://b', reloaded)
+        self.assertEqual(reloaded.get('http://a')['output'], 'delta.json')
@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import unittest
+
+from goviq.entities.metrics import Histogram, Metrics
+
+
+class TestHistogram(unittest.TestCase):
+    def test_quantiles_within_observed_range(self):
+        histogram = Histogram((1, 2, 5, 10))
+        for value in (0.5, 1.5, 1.5, 3, 8):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.sum, 14.5)
+        self.assertTrue(1 <= histogram.quantile(0.5) <= 2)
+        self.assertTrue(5 <= histogram.quantile(0.99) <= 8)
+        self.assertIsNone(Histogram((1,)).quantile(0.5))
+
+
+class TestMetrics(unittest.TestCase):
+    def test_report(self):
+        metrics = Metrics()
+        metrics.inc('http_responses_total', status=200)
+        metrics.inc('http_responses_total', status=200)
+        metrics.inc('http_responses_total', status=503)
+        metrics.observe('response_bytes', 2000)
+        with metrics.timer('parse_seconds'):
+            pass
+        report = metrics.to_dict()
+        self.assertEqual(report['counters']['http_responses_total{status="200"}'], 2)
+        self.assertEqual(report['histograms']['response_bytes']['count'], 1)
+        self.assertEqual(metrics.total('http_responses_total'), 3)
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE goviq_http_responses_total counter', text)
+        self.assertIn('goviq_response_bytes_bucket{le="4096"} 1', text)
+        self.assertIn('goviq_parse_seconds_count 1', text)
+
+    def test_dump(self):
+        metrics = Metrics()
+        metrics.observe('fetch_seconds', 0.2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = metrics.dump(os.path.join(tmp, 'metrics'), 'act_text')
+            with open(path) as f:
+                self.assertEqual(json.load(f)['histograms']['fetch_seconds']['count'], 1)
+            self.assertTrue(os.path.exists(path[:-len('.json')] + '.prom'))
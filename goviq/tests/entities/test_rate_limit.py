@@ -0,0 +1,146 @@
+import asyncio
+import time
+import unittest
+
+from goviq.entities.rate_limit import CircuitBreaker, ConcurrencyBudget, HostLimiter, RateLimiter, parse_retry_after
+
+
+class TestHostLimiter(unittest.TestCase):
+    def test_slow_start_then_multiplicative_decrease(self):
+        limiter = HostLimiter(initial_limit=4, max_limit=10)
+        for _ in range(3):
+            limiter.on_success()
+        self.assertEqual(limiter.limit, 7)
+        limiter.on_throttle()
+        self.assertEqual(limiter.limit, 3.5)
+        # Past the threshold growth is additive: about one per window of successes
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.limit, 3.5 + 1 / 3.5)
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.limit, 10)
+
+    def test_never_below_min_limit(self):
+        limiter = HostLimiter(initial_limit=2)
+        for _ in range(5):
+            limiter.on_throttle()
+        self.assertEqual(limiter.limit, 1)
+
+    def test_burst_of_throttles_cuts_once(self):
+        limiter = HostLimiter(initial_limit=8, max_limit=8)
+        limiter.in_flight = 8
+        # Every request in flight comes back throttled
+        for _ in range(8):
+            limiter.on_throttle()
+        self.assertEqual(limiter.limit, 4)
+        # A request sent under the new limit is throttled too
+        limiter.on_throttle()
+        self.assertEqual(limiter.limit, 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertEqual(breaker.retry_in(), 0)
+        breaker.record_failure()
+        self.assertGreater(breaker.retry_in(), 0)
+        time.sleep(0.06)
+        # The first caller after the timeout gets the trial, others keep waiting
+        self.assertEqual(breaker.retry_in(), 0)
+        self.assertGreater(breaker.retry_in(), 0)
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_unreported_trial_expires(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        self.assertEqual(breaker.retry_in(), 0)
+        self.assertGreater(breaker.retry_in(), 0)
+        time.sleep(0.06)
+        self.assertEqual(breaker.retry_in(), 0)
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_bounded_by_host_limit(self):
+        limiter = RateLimiter(initial_limit=2)
+        in_flight = []
+
+        async def request():
+            async with limiter.slot('example.com'):
+                in_flight.append(limiter.host('example.com').in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(request() for _ in range(6)))
+        self.assertEqual(max(in_flight), 2)
+        self.assertEqual(limiter.host('example.com').in_flight, 0)
+
+    async def test_retry_after_pauses_host(self):
+        limiter = RateLimiter()
+        limiter.throttled('example.com', retry_after=0.1)
+        start = time.monotonic()
+        async with limiter.slot('example.com'):
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    async def test_cancelled_trial_is_abandoned(self):
+        limiter = RateLimiter(failure_threshold=1, reset_timeout=0.05)
+        limiter.failure('example.com')
+        await asyncio.sleep(0.06)
+
+        async def trial():
+            async with limiter.slot('example.com'):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(trial())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The next request becomes the trial instead of waiting on one that will never report back
+        slot = limiter.slot('example.com')
+        await asyncio.wait_for(slot.__aenter__(), timeout=0.5)
+        self.assertEqual(limiter.host('example.com').in_flight, 1)
+        await slot.__aexit__(None, None, None)
+
+
+class TestConcurrencyBudget(unittest.IsolatedAsyncioTestCase):
+    async def test_hosts_served_in_turn(self):
+        budget = ConcurrencyBudget(max_concurrent=1)
+        order = []
+
+        async def fetch(host):
+            async with budget.slot(host):
+                order.append(host)
+                await asyncio.sleep(0)
+
+        await budget.acquire('a')
+        # A host with a long queue does not get the freed slots ahead of one that queued later
+        tasks = [asyncio.create_task(fetch(host)) for host in ['a', 'a', 'a', 'b', 'c']]
+        await asyncio.sleep(0)
+        self.assertEqual(budget.in_flight, 1)
+        budget._release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ['a', 'b', 'c', 'a', 'a'])
+        self.assertEqual(budget.stats(), {'a': 4, 'b': 1, 'c': 1})
+        self.assertEqual(budget.in_flight, 0)
+
+    async def test_cancelled_waiter(self):
+        budget = ConcurrencyBudget(max_concurrent=1)
+        await budget.acquire('a')
+        waiter = asyncio.create_task(budget.acquire('b'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        budget._release()
+        # The cancelled waiter neither holds a slot nor blocks the next request
+        await asyncio.wait_for(budget.acquire('c'), timeout=1)
+        self.assertEqual(budget.in_flight, 1)
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(parse_retry_after('3'), 3.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from goviq.entities.writer import JsonlWriter
+from goviq.utils import iter_json_docs, load_json_docs
+
+
+class TestJsonlWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'out.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        records = [{'http://a': ['é', 'b']}, {'http://b': 'c'}]
+        with JsonlWriter(self.path) as writer:
+            for record in records:
+                writer.write(record)
+            self.assertFalse(os.path.exists(self.path))
+        self.assertTrue(os.path.exists(self.path))
+        self.assertEqual(list(iter_json_docs(self.path)), records)
+        self.assertEqual(load_json_docs(self.path), records)
+
+    def test_gzip(self):
+        with JsonlWriter(self.path, compression='gzip') as writer:
+            writer.write({'http://a': 'x'})
+        self.assertEqual(writer.path, self.path + '.gz')
+        self.assertEqual(list(iter_json_docs(writer.path)), [{'http://a': 'x'}])
+
+    def test_crash_leaves_part_file(self):
+        with self.assertRaises(RuntimeError):
+            with JsonlWriter(self.path) as writer:
+                writer.write({'http://a': 'x'})
+                raise RuntimeError()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(list(iter_json_docs(writer.tmp_path)), [{'http://a': 'x'}])
+
+    def test_resume_from_checkpoint(self):
+        for compression in (None, 'gzip', 'zstd'):
+            with self.assertRaises(RuntimeError):
+                with JsonlWriter(self.path, compression=compression) as writer:
+                    writer.write({'http://a': 'x'})
+                    offset = writer.checkpoint()
+                    writer.write({'http://b': 'lost'})
+                    raise RuntimeError()
+            with JsonlWriter(self.path, compression=compression, offset=offset, count=writer.count - 1) as resumed:
+                resumed.write({'http://c': 'y'})
+            self.assertEqual(resumed.count, 2)
+            self.assertEqual(list(iter_json_docs(resumed.path)), [{'http://a': 'x'}, {'http://c': 'y'}])
@@ -0,0 +1,168 @@
+"""
+Deterministic synthetic documents shaped like the pages goviq crawls: act index and FullText pages from
+laws-lois.justice.gc.ca, and the bill listing, bill and DocumentViewer pages from parl.ca. Also the crawled JSONL
+records the preprocessors read. The same seed always produces the same corpus, so timings are comparable across runs.
+"""
+import random
+from typing import Dict, List, Tuple
+
+from goviq.entities.document import ACT, BILL, Document
+from goviq.utils import dumps
+
+ENGLISH = ('The Minister may, by order, amend the schedule to this Act. Any person who contravenes section 5 is '
+           'guilty of an offence and liable on summary conviction to a fine. ')
+FRENCH = ("Le ministre peut, par arrêté, modifier l'annexe de la présente loi. Quiconque contrevient à l'article 5 "
+          "commet une infraction et encourt, sur déclaration de culpabilité, une amende. ")
+TITLE_WORDS = ['Bank', 'Fisheries', 'Income Tax', 'Canada', 'Pension', 'Customs', 'Trade']
+STATUS_SENTENCES = {
+    'royal_assent': 'This bill received royal assent on June 22, 2023.',
+    'defeated': 'This bill was defeated on May 1, 2023.',
+    'dropped': 'Status: This bill was dropped from the Order Paper.',
+    'in_progress': 'This bill is at second reading in the House of Commons.',
+}
+
+
+def synthetic_acts(n: int, rng: random.Random) -> Tuple[List[str], List[dict]]:
+    """
+    Returns n act titles and the crawled Document records for them, as ActCrawler writes them (without sections).
+    """
+    titles = [f"{' '.join(rng.choice(TITLE_WORDS) for _ in range(3))} Act {i}" for i in range(n)]
+    docs = [Document(f'https://laws-lois.justice.gc.ca/eng/acts/A-{i}/FullText.html', ACT,
+                     segments=[f'{title}S.C. 1991, c. {i}' + ENGLISH * rng.randint(50, 300)
+                               + FRENCH * rng.randint(50, 300)]).to_dict()
+            for i, title in enumerate(titles)]
+    return titles, docs
+
+
+def synthetic_bills(n: int, titles: List[str], rng: random.Random) -> List[dict]:
+    """
+    Returns n crawled bill Document records mentioning some of the given act titles.
+    """
+    docs = []
+    for i in range(n):
+        paragraphs = [f'<p>{ENGLISH}</p>' for _ in range(rng.randint(50, 200))]
+        paragraphs += [f'<p>An Act to amend the {rng.choice(titles)}.</p>' for _ in range(5)]
+        rng.shuffle(paragraphs)
+        html = f"<html><head><title>C-{i}</title></head><body>{''.join(paragraphs)}</body></html>"
+        docs.append(Document(f'https://www.parl.ca/legisinfo/en/bill/44-1/c-{i}', BILL, body=html,
+                             metadata={'status': 'in_progress'}).to_dict())
+    return docs
+
+
+def write_jsonl(path: str, docs: List[dict]) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for doc in docs:
+            f.write(dumps(doc) + '\n')
+
+
+class SyntheticCorpus:
+    """
+    A fixed set of acts and bills rendered as the HTML pages the crawlers fetch.
+    Act bodies are English followed by French, as on FullText pages; bills mention a few act titles.
+    """
+    def __init__(self, acts: int = 50, bills: int = 50, seed: int = 0, act_paragraphs: Tuple[int, int] = (50, 300),
+                 bill_paragraphs: Tuple[int, int] = (50, 200), sessions: Tuple[str, ...] = ('44-1',),
+                 page_size: int = 20):
+        """
+        :param sessions: Parliament sessions the bills are spread over, round robin. The last one is the current one.
+        :param page_size: Bills per LegisInfo listing page.
+        """
+        self.sessions = sessions
+        self.page_size = page_size
+        rng = random.Random(seed)
+        self.acts: Dict[str, dict] = {}
+        for i in range(acts):
+            title = f"{' '.join(rng.choice(TITLE_WORDS) for _ in range(3))} Act {i}"
+            act_id = f'{title[0]}-{i}'
+            self.acts[act_id] = {
+                'title': title,
+                'citation': f'S.C. 1991, c. {i}',
+                'english': rng.randint(*act_paragraphs),
+                'french': rng.randint(*act_paragraphs),
+            }
+        titles = [act['title'] for act in self.acts.values()]
+        self.bills: Dict[str, dict] = {}
+        for i in range(bills):
+            self.bills[f'c-{i}'] = {
+                'session': sessions[i % len(sessions)],
+                'status': rng.choice(sorted(STATUS_SENTENCES)),
+                'paragraphs': rng.randint(*bill_paragraphs),
+                'mentions': [rng.choice(titles) for _ in range(5)] if titles else [],
+            }
+
+    def act_index_page(self, letter: str) -> str:
+        links = ''.join(f'<li><a class="TocTitle" href="{act_id}/index.html">{act["title"]}</a></li>'
+                        for act_id, act in self.acts.items() if act_id.startswith(letter))
+        return f'<html><head><title>Acts: {letter}</title></head><body><ul>{links}</ul></body></html>'
+
+    @staticmethod
+    def act_provisions(paragraphs: int) -> str:
+        """
+        English act body marked up like laws-lois.justice.gc.ca: a part every ten sections, each section a marginal
+        note and up to three subsections, every fourth one a single provision with lettered paragraphs.
+        """
+        html = []
+        section = 0
+        remaining = paragraphs
+        while remaining > 0:
+            section += 1
+            if section % 10 == 1:
+                html.append(f'<h2 class="Part" id="h-{section}"><span class="HPartLabel">PART {section // 10 + 1}</span>'
+                            f'<span class="HPartTitle">General</span></h2>')
+            html.append(f'<p class="MarginalNote"><span class="wb-invisible">Marginal note:</span>Rule {section}</p>')
+            label = (f'<strong><a class="sectionLabel" id="s-{section}"><span class="sectionLabel">{section}</span>'
+                     f'</a></strong>')
+            count = min(3, remaining)
+            remaining -= count
+            if section % 4 == 0:
+                items = ''.join(f'<li><p class="Paragraph"><span class="lawlabel">({chr(97 + i)})</span> {ENGLISH}</p>'
+                                f'</li>' for i in range(count))
+                html.append(f'<p class="Section" id="se-{section}">{label} {ENGLISH}</p>'
+                            f'<ul class="ProvisionList">{items}</ul>')
+                continue
+            for i in range(count):
+                html.append(f'<p class="Subsection">{label if i == 0 else ""}<span class="lawlabel">({i + 1})</span> '
+                            f'{ENGLISH}</p>')
+        return ''.join(html)
+
+    def act_fulltext_page(self, act_id: str) -> str:
+        act = self.acts[act_id]
+        english = self.act_provisions(act['english'])
+        french = f'<p>{FRENCH}</p>' * act['french']
+        return (f'<html><head><title>{act["title"]}</title></head><body>'
+                f'<div class="docContents"><h2 class="Title-of-Act">{act["title"]}</h2><p>{act["citation"]}</p>'
+                f'{english}{french}</div></body></html>')
+
+    def bill_path(self, bill_id: str) -> str:
+        return f"/legisinfo/en/bill/{self.bills[bill_id]['session']}/{bill_id}"
+
+    def document_path(self, bill_id: str) -> str:
+        return f"/DocumentViewer/en/{self.bills[bill_id]['session']}/bill/{bill_id.upper()}/first-reading"
+
+    def bill_list_page(self, session: str | None, page: int) -> str:
+        """
+        Page of the LegisInfo bill listing of a session, or of the current session if None. Pages past the end list
+        no bills.
+        """
+        session = session or self.sessions[-1]
+        bill_ids = [bill_id for bill_id, bill in self.bills.items() if bill['session'] == session]
+        tiles = ''.join(f'<a class="title" href="{self.bill_path(bill_id)}">{bill_id.upper()}</a>'
+                        for bill_id in bill_ids[(page - 1) * self.page_size:page * self.page_size])
+        return f'<html><head><title>Bills - page {page}</title></head><body>{tiles}</body></html>'
+
+    def bill_page(self, bill_id: str) -> str:
+        bill = self.bills[bill_id]
+        return (f'<html><head><title>{bill_id.upper()}</title></head><body>'
+                f'<p>{STATUS_SENTENCES[bill["status"]]}</p>'
+                f'<a class="publication btn btn-primary" href="{self.document_path(bill_id)}">Text</a>'
+                f'<a class="publication btn btn-primary" href="/Content/Bills/441/{bill_id}.pdf">PDF</a>'
+                f'</body></html>')
+
+    def document_page(self, bill_id: str) -> str:
+        bill = self.bills[bill_id]
+        paragraphs = [f'<p>{ENGLISH}</p>'] * bill['paragraphs']
+        step = max(len(paragraphs) // (len(bill['mentions']) + 1), 1)
+        for i, title in enumerate(bill['mentions']):
+            paragraphs.insert((i + 1) * step, f'<p>An Act to amend the {title}.</p>')
+        return (f'<html><head><title>{bill_id.upper()}</title><script>var x = 1;</script></head>'
+                f'<body>{"".join(paragraphs)}</body></html>')
@@ -0,0 +1,137 @@
+"""
+Local stand-in for laws-lois.justice.gc.ca and parl.ca serving a SyntheticCorpus, with configurable latency and error
+rate. It runs its own event loop in a background thread, so both the blocking and the asyncio parts of the crawlers
+can talk to it unchanged:
+
+    with MockGovServer(SyntheticCorpus(acts=100, bills=100), latency=0.05, error_rate=0.1) as base_url:
+        ActCrawler = local_crawler(ActCrawler, base_url)
+"""
+import asyncio
+import hashlib
+import random
+import socket
+import threading
+from typing import Type
+
+from aiohttp import web
+
+from goviq.tests.fixtures import SyntheticCorpus
+
+
+class MockGovServer:
+    def __init__(self, corpus: SyntheticCorpus, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: int = 0, host: str = '127.0.0.1'):
+        """
+        :param corpus: Documents to serve.
+        :param latency: Seconds each response is delayed by, with +-50% uniform jitter.
+        :param error_rate: Fraction of requests answered with error_status instead of the page.
+        :param error_status: Status of injected errors. 503 responses carry Retry-After: 0.
+        :param seed: Seed of the jitter and error injection.
+        """
+        self.corpus = corpus
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.host = host
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._rng = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self.base_url = None
+
+    def _app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        app.router.add_get('/eng/acts/{act_id}/FullText.html', self._act_fulltext)
+        app.router.add_get('/eng/acts/{letter}.html', self._act_index)
+        app.router.add_get('/legisinfo/en/bills', self._bill_listing)
+        app.router.add_get('/legisinfo/en/bill/{session}/{bill_id}', self._bill)
+        app.router.add_get('/DocumentViewer/en/{session}/bill/{bill_id}/{stage}', self._document)
+        return app
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self._rng.uniform(0.5, 1.5))
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            headers = {'Retry-After': '0'} if self.error_status == 503 else None
+            return web.Response(status=self.error_status, headers=headers)
+        return await handler(request)
+
+    def _page(self, request: web.Request, html: str) -> web.Response:
+        etag = '"' + hashlib.sha1(html.encode('utf-8')).hexdigest() + '"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        return web.Response(text=html, content_type='text/html', headers={'ETag': etag})
+
+    async def _act_index(self, request: web.Request) -> web.Response:
+        return self._page(request, self.corpus.act_index_page(request.match_info['letter']))
+
+    async def _act_fulltext(self, request: web.Request) -> web.Response:
+        act_id = request.match_info['act_id']
+        if act_id not in self.corpus.acts:
+            raise web.HTTPNotFound()
+        return self._page(request, self.corpus.act_fulltext_page(act_id))
+
+    async def _bill_listing(self, request: web.Request) -> web.Response:
+        page = int(request.query.get('page', '1'))
+        return self._page(request, self.corpus.bill_list_page(request.query.get('parlsession'), page))
+
+    async def _bill(self, request: web.Request) -> web.Response:
+        bill_id = request.match_info['bill_id']
+        if bill_id not in self.corpus.bills or self.corpus.bills[bill_id]['session'] != request.match_info['session']:
+            raise web.HTTPNotFound()
+        return self._page(request, self.corpus.bill_page(bill_id))
+
+    async def _document(self, request: web.Request) -> web.Response:
+        bill_id = request.match_info['bill_id'].lower()
+        if bill_id not in self.corpus.bills:
+            raise web.HTTPNotFound()
+        return self._page(request, self.corpus.document_page(bill_id))
+
+    def start(self) -> str:
+        """
+        Starts serving on a free port in a background thread. Returns the base URL.
+        """
+        sock = socket.socket()
+        sock.bind((self.host, 0))
+        self.base_url = f'http://{self.host}:{sock.getsockname()[1]}'
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        self._loop.run_until_complete(web.SockSite(self._runner, sock).start())
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def local_crawler(crawler_class: Type, base_url: str) -> Type:
+    """
+    Returns a subclass of ActCrawler or BillCrawler whose URLs point at a MockGovServer instead of the live sites.
+    """
+    if hasattr(crawler_class, 'ACT_URLS'):
+        root = f'{base_url}/eng/acts/'
+        attrs = {'ROOT_URL': root, 'ACT_URLS': [f'{root}{letter}.html' for letter in crawler_class.ALPHABET]}
+    else:
+        attrs = {'ROOT_URL': base_url}
+    return type(f'Local{crawler_class.__name__}', (crawler_class,), attrs)
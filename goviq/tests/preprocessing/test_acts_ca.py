@@ -0,0 +1,35 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import unittest
+
+from goviq.preprocessing.acts_ca import ActCAPreprocessor
+from goviq.tests.fixtures import synthetic_acts, write_jsonl
+
+
+class TestActCAPreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.titles, acts = synthetic_acts(4, random.Random(0))
+        self.acts_path = os.path.join(self.tmp.name, 'act_text_20240101000000.jsonl')
+        write_jsonl(self.acts_path, acts)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_one_shot_preprocess_shuts_pool_down(self):
+        preprocessor = ActCAPreprocessor(local_cache=self.tmp.name, num_processes=2)
+        docs = preprocessor.preprocess(self.acts_path)
+        self.assertCountEqual([doc['title'] for doc in docs], self.titles)
+        self.assertIsNone(preprocessor._pool)
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_context_manager_keeps_pool(self):
+        with ActCAPreprocessor(local_cache=self.tmp.name, num_processes=2) as preprocessor:
+            preprocessor.preprocess(self.acts_path, cache=False)
+            pool = preprocessor._pool
+            self.assertIsNotNone(pool)
+            preprocessor.preprocess(self.acts_path, cache=False)
+            self.assertIs(preprocessor._pool, pool)
+        self.assertIsNone(preprocessor._pool)
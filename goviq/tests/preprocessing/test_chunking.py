@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+
+from goviq.preprocessing.chunking import _TOKEN_RE, ChunkPreprocessor, chunk_text
+from goviq.scrapers.acts_ca import parse_act_text
+from goviq.sections import walk_sections
+from goviq.tests.fixtures import ENGLISH, FRENCH, SyntheticCorpus, write_jsonl
+from goviq.utils import iter_json_docs
+
+
+def bill(i, body):
+    return {'link': f'https://www.parl.ca/legisinfo/en/bill/44-1/c-{i}', 'body': body, 'status': 'in_progress'}
+
+
+class TestChunkText(unittest.TestCase):
+    def test_section_aware(self):
+        corpus = SyntheticCorpus(acts=1, bills=0, act_paragraphs=(40, 40))
+        parsed = parse_act_text(corpus.act_fulltext_page(next(iter(corpus.acts))), 'html.parser')
+        text, sections = parsed['segments'][0], parsed['sections'][0]
+        spans = chunk_text(text, sections, max_tokens=120)
+        provision_starts = {node['start'] for node in walk_sections(sections)}
+        self.assertGreater(len(spans), 5)
+        for (start, end), (next_start, _) in zip(spans, spans[1:] + [(len(text), None)]):
+            self.assertLessEqual(len(_TOKEN_RE.findall(text[start:end])), 120)
+            self.assertEqual(text[end:next_start].strip(), '')
+        # Every chunk of the provisions starts at a provision
+        english_spans = [span for span in spans if span[0] < text.index(FRENCH.strip())]
+        self.assertTrue(all(start in provision_starts for start, _ in english_spans[1:]))
+
+    def test_long_sentence(self):
+        text = ' '.join(['word'] * 25)
+        self.assertEqual([len(text[s:e].split()) for s, e in chunk_text(text, max_tokens=10)], [10, 10, 5])
+        self.assertEqual(chunk_text('  '), [])
+
+
+class TestChunkPreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'processed_bill_text_20240101000000.jsonl')
+        self.bills = [
+            bill(0, ENGLISH * 6 + FRENCH * 6),
+            # Differs from bill 0 by one word per sentence
+            bill(1, ENGLISH.replace('fine', 'penalty') * 6),
+            # Same words as bill 0
+            bill(2, ENGLISH.upper() * 6),
+            bill(3, 'Some entirely different provisions about fisheries and oceans.'),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_chunker(self, bills, path=None):
+        path = path or self.path
+        write_jsonl(path, bills)
+        chunker = ChunkPreprocessor(local_cache=self.tmp.name, num_processes=1, max_tokens=40)
+        return list(iter_json_docs(chunker.preprocess(path)))
+
+    def test_dedup_and_incremental(self):
+        chunks = self.run_chunker(self.bills)
+        self.assertEqual({chunk['doc_id'] for chunk in chunks}, {self.bills[0]['link'], self.bills[3]['link']})
+        self.assertFalse(any('ministre' in chunk['text'] for chunk in chunks))
+        self.assertTrue(all(chunk['tokens'] <= 40 for chunk in chunks))
+
+        newer = os.path.join(self.tmp.name, 'processed_bill_text_20240201000000.jsonl')
+        self.assertEqual(self.run_chunker(self.bills, newer), [])
+        changed = self.bills[:3] + [bill(3, self.bills[3]['body'].replace('fisheries', 'forestry'))]
+        emitted = self.run_chunker(changed, newer)
+        # The edited chunk replaces the old one under a new id
+        old_id = next(chunk['id'] for chunk in chunks if chunk['doc_id'] == self.bills[3]['link'])
+        self.assertEqual([chunk.get('doc_id') for chunk in emitted], [self.bills[3]['link'], None])
+        self.assertNotEqual(emitted[0]['id'], old_id)
+        self.assertEqual(emitted[1], {'id': old_id, 'deleted': True})
+        deleted = self.run_chunker(changed[:3], newer)
+        self.assertEqual(deleted, [{'id': emitted[0]['id'], 'deleted': True}])
+        with open(os.path.join(self.tmp.name, 'bill_text_chunk_manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertNotIn(old_id, manifest)
+        self.assertNotIn(emitted[0]['id'], manifest)
+
+    def test_inserted_paragraph_keeps_ids(self):
+        # Sentences of 25 tokens with no words in common, so each is its own chunk
+        sentences = [' '.join(f'term{i}n{j}' for j in range(24)) + '.' for i in range(6)]
+        chunks = self.run_chunker([bill(5, ' '.join(sentences[:5]))])
+        self.assertEqual(len(chunks), 5)
+        newer = os.path.join(self.tmp.name, 'processed_bill_text_20240201000000.jsonl')
+        emitted = self.run_chunker([bill(5, ' '.join(sentences[:2] + sentences[5:] + sentences[2:5]))], newer)
+        # Only the inserted chunk is new; the chunks after it keep their ids
+        self.assertEqual([chunk['text'] for chunk in emitted], [sentences[5]])
@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+
+from goviq.entities.document import ACT, Document
+from goviq.scrapers.acts_ca import ActCrawler
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.tests.mock_server import MockGovServer, local_crawler
+from goviq.utils import iter_json_docs
+
+
+class TestActCrawler(unittest.TestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus(acts=8, bills=0, act_paragraphs=(5, 10))
+        self.server = MockGovServer(self.corpus)
+        self.base_url = self.server.start()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def test_crawl(self):
+        crawler = local_crawler(ActCrawler, self.base_url)(local_cache=self.tmp.name)
+        acts = {doc.url: doc for doc in map(Document.from_record, iter_json_docs(crawler.crawl()))}
+        self.assertEqual(len(acts), len(self.corpus.acts))
+        for act_id, act in self.corpus.acts.items():
+            parsed = acts[f'{self.base_url}/eng/acts/{act_id}/FullText.html']
+            self.assertEqual(parsed.source, ACT)
+            self.assertEqual(len(parsed.segments), 1)
+            self.assertTrue(parsed.segments[0].startswith(act['title'] + act['citation']))
+            self.assertEqual(parsed.metadata['sections'][0][0]['kind'], 'part')
+            self.assertIsNotNone(parsed.content_hash)
+
+    def test_crawl_parse_workers(self):
+        crawler = local_crawler(ActCrawler, self.base_url)(local_cache=self.tmp.name, parse_workers=2)
+        acts = [Document.url_of(doc) for doc in iter_json_docs(crawler.crawl())]
+        self.assertCountEqual(acts, [f'{self.base_url}/eng/acts/{act_id}/FullText.html' for act_id in self.corpus.acts])
+        # The index pages are parsed in the pool too, not on the event loop
+        self.assertEqual(crawler.metrics.to_dict()['histograms']['parse_seconds']['count'],
+                         len(ActCrawler.ALPHABET) + len(self.corpus.acts))
@@ -1,33 +1,180 @@
+import asyncio
+import json
+import os
+import tempfile
 import unittest
 
-from goviq.scrapers.parl_ca import BillCrawler
+from goviq.config.scrapers.parl_ca import parse_sessions
+from goviq.entities.document import Document
+from goviq.entities.http_cache import HttpCache
+from goviq.scrapers.parl_ca import BillCrawler, BillStatusCrawler, parse_bill_page
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.tests.mock_server import MockGovServer, local_crawler
+from goviq.utils import iter_json_docs
 
 
-class TestBillCrawler(unittest.TestCase):
+class TestBillCrawler(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpus = SyntheticCorpus(acts=5, bills=9, sessions=('43-2', '44-1'), page_size=2)
+        cls.server = MockGovServer(cls.corpus)
+        cls.base_url = cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
     def setUp(self):
-        self.crawler = BillCrawler()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.crawler = local_crawler(BillCrawler, self.base_url)(local_cache=self.tmp.name, sessions='43-2,44-1')
 
-    def test_fetch_bills(self):
-        links = self.crawler.fetch_bills()
-        self.assertIsInstance(links, list)
-        self.assertTrue(len(links) > 0)
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    async def test_discover_bills(self):
+        links = [link async for link in self.crawler.discover_bills()]
+        self.assertCountEqual(links, [self.base_url + self.corpus.bill_path(bill_id) for bill_id in self.corpus.bills])
+        # 5 and 4 bills over 3 and 2 pages, plus the empty page ending each session
+        self.assertEqual(self.crawler.metrics.total('listing_pages_total'), 7)
+        current = local_crawler(BillCrawler, self.base_url)(local_cache=self.tmp.name)
+        links = [link async for link in current.discover_bills()]
+        self.assertEqual(links, [self.base_url + self.corpus.bill_path(bill_id) for bill_id, bill in
+                                 self.corpus.bills.items() if bill['session'] == '44-1'])
 
     async def test_parse(self):
-        mock_html = """
+        mock_html = f"""
         <html>
             <body>
-                <a class="publication btn btn-primary" href="/DocumentViewer/en/44-1/bill/C-1/first-reading/page-1">Link</a>
+                <p>This bill received royal assent on June 22, 2023</p>
+                <a class="publication btn btn-primary" href="{self.corpus.document_path('c-1')}">Link</a>
             </body>
         </html>
         """
-        html = await self.crawler._parse(mock_html)
-        self.assertIsInstance(html, str)
-        self.assertTrue(len(html) > 0)
+        bill = await self.crawler._parse(mock_html)
+        self.assertEqual(bill['html'], self.corpus.document_page('c-1'))
+        self.assertEqual(bill['status'], 'royal_assent')
 
     async def test_parse_empty(self):
         mock_html = None
         html = await self.crawler._parse(mock_html)
         self.assertIsNone(html)
 
-    # TODO: test case where there are multiple links
-    # TODO: test non-200 response
+    async def test_parse_multiple_links(self):
+        link = '<a class="publication btn btn-primary" href="/DocumentViewer/en/44-1/bill/C-{}/first-reading">Link</a>'
+        self.assertIsNone(await self.crawler._parse(link.format(1) + link.format(2)))
+
+    def test_crawl_with_errors(self):
+        self.server.error_rate = 0.2
+        try:
+            self.crawler.retry_backoff = 0.01
+            path = self.crawler.crawl()
+        finally:
+            self.server.error_rate = 0.0
+        bills = {doc.url: doc for doc in map(Document.from_record, iter_json_docs(path))}
+        self.assertEqual(len(bills), len(self.corpus.bills))
+        for bill_id, bill in self.corpus.bills.items():
+            self.assertEqual(bills[self.base_url + self.corpus.bill_path(bill_id)].metadata['status'], bill['status'])
+
+    def test_parse_time_excludes_fetch(self):
+        self.server.latency = 0.1
+        try:
+            self.crawler.crawl()
+        finally:
+            self.server.latency = 0.0
+        # _parse fetches each bill's DocumentViewer page, at least 50ms away; only parsing the bill page is timed
+        self.assertLess(self.crawler.metrics.total('parse_seconds'), 0.05 * len(self.corpus.bills))
+
+    def test_resume(self):
+        class InterruptedCrawler(local_crawler(BillCrawler, self.base_url)):
+            checkpoint_every = 2
+            parsed = 0
+
+            async def _crawl_to_file(self, *args, **kwargs):
+                self.main = asyncio.current_task()
+                return await super()._crawl_to_file(*args, **kwargs)
+
+            async def _parse(self, html):
+                self.parsed += 1
+                if self.parsed == 5:
+                    # Stands in for Ctrl-C, on which asyncio.run cancels the main task
+                    self.main.cancel()
+                return await super()._parse(html)
+
+        interrupted = InterruptedCrawler(local_cache=self.tmp.name, sessions='43-2,44-1', max_concurrent_tasks=1)
+        with self.assertRaises(asyncio.CancelledError):
+            interrupted.crawl()
+        with open(os.path.join(self.tmp.name, 'bill_text_checkpoint.json')) as f:
+            completed = json.load(f)['completed']
+        self.assertGreaterEqual(len(completed), 4)
+        self.assertLess(len(completed), len(self.corpus.bills))
+
+        path = self.crawler.crawl(resume=True)
+        self.assertEqual(self.crawler.metrics.total('resumed_skips_total'), len(completed))
+        urls = [Document.url_of(doc) for doc in iter_json_docs(path)]
+        self.assertCountEqual(urls, [self.base_url + self.corpus.bill_path(bill_id) for bill_id in self.corpus.bills])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'bill_text_checkpoint.json')))
+
+    def test_shared_http_cache(self):
+        http_cache = HttpCache(os.path.join(self.tmp.name, 'http_cache'))
+        crawler = local_crawler(BillCrawler, self.base_url)(local_cache=self.tmp.name, sessions='43-2,44-1',
+                                                           http_cache=http_cache)
+        crawler.crawl()
+        urls = [self.base_url + self.corpus.bill_path(bill_id) for bill_id in self.corpus.bills]
+        # Both crawlers parse the bill pages, into different results
+        statuses = BillStatusCrawler(http_cache=http_cache).crawl(urls)
+        self.assertEqual(statuses, {self.base_url + self.corpus.bill_path(bill_id): bill['status']
+                                    for bill_id, bill in self.corpus.bills.items()})
+        self.assertEqual(crawler.metrics.total('parse_cache_hits_total'), 0)
+
+    def test_incremental_text_revision(self):
+        http_cache = HttpCache(os.path.join(self.tmp.name, 'http_cache'))
+
+        def crawl():
+            crawler = local_crawler(BillCrawler, self.base_url)(local_cache=self.tmp.name, sessions='43-2,44-1',
+                                                               http_cache=http_cache)
+            return crawler, crawler.crawl(incremental=True)
+
+        crawl()
+        # The bill text is revised on DocumentViewer while its LegisInfo page stays the same
+        bill_id = next(iter(self.corpus.bills))
+        self.corpus.bills[bill_id]['paragraphs'] += 1
+        try:
+            crawler, path = crawl()
+            revised = self.corpus.document_page(bill_id)
+        finally:
+            self.corpus.bills[bill_id]['paragraphs'] -= 1
+        bills = list(map(Document.from_record, iter_json_docs(path)))
+        self.assertEqual([bill.url for bill in bills], [self.base_url + self.corpus.bill_path(bill_id)])
+        self.assertEqual(bills[0].body, revised)
+        self.assertEqual(crawler.metrics.total('unchanged_pages_total'), len(self.corpus.bills) - 1)
+
+
+class TestParseBillPage(unittest.TestCase):
+    def test_links_and_status(self):
+        html = """
+        <html>
+            <body>
+                <p>This bill received royal assent on June 22, 2023</p>
+                <a class="publication btn btn-primary" href="/DocumentViewer/en/44-1/bill/C-1/royal-assent">Link</a>
+                <a class="publication btn btn-primary" href="/Content/Bills/441/C-1.pdf">PDF</a>
+            </body>
+        </html>
+        """
+        page = parse_bill_page(html)
+        self.assertEqual(page['links'], ['/DocumentViewer/en/44-1/bill/C-1/royal-assent'])
+        self.assertEqual(page['status'], 'royal_assent')
+
+    def test_status(self):
+        self.assertEqual(parse_bill_page('<p>This bill was defeated on May 1</p>')['status'], 'defeated')
+        self.assertEqual(parse_bill_page('<p>Status: This bill was dropped from the Order Paper</p>')['status'], 'dropped')
+        self.assertEqual(parse_bill_page('<p>Second reading</p>')['status'], 'in_progress')
+
+
+class TestParseSessions(unittest.TestCase):
+    def test_parse_sessions(self):
+        self.assertEqual(parse_sessions('43-2, 44-1,43-2'), ['43-2', '44-1'])
+        self.assertEqual(parse_sessions(['42-2:43-2']), ['42-2', '42-3', '43-1', '43-2'])
+        with self.assertRaises(ValueError):
+            parse_sessions('44')
+        with self.assertRaises(ValueError):
+            parse_sessions('44-1:43-1')
@@ -0,0 +1,34 @@
+import unittest
+
+from goviq import scrapers
+from goviq.entities.crawler import Crawler
+from goviq.scrapers.acts_ca import ActCrawler
+from goviq.scrapers.parl_ca import BillCrawler, BillStatusCrawler
+
+
+class TestRegistry(unittest.TestCase):
+    def test_builtin_sources(self):
+        self.assertIn('acts_ca', scrapers.available())
+        self.assertIs(scrapers.get_crawler('acts_ca'), ActCrawler)
+        self.assertIs(scrapers.get_crawler('parl_ca'), BillCrawler)
+        with self.assertRaises(ValueError):
+            scrapers.get_crawler('missing')
+
+    def test_register(self):
+        @scrapers.register
+        class ProvincialCrawler(Crawler):
+            name = 'provincial'
+            output_name = 'provincial_text'
+
+            async def _parse(self, html):
+                return html
+
+            def crawl(self):
+                pass
+
+        try:
+            self.assertIs(scrapers.get_crawler('provincial'), ProvincialCrawler)
+        finally:
+            del scrapers.CRAWLERS['provincial']
+        with self.assertRaises(ValueError):
+            scrapers.register(BillStatusCrawler)
@@ -0,0 +1,23 @@
+import unittest
+
+from goviq.dedup import NearDuplicateIndex, minhash, similarity
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    text = ('The Minister may, by order, amend the schedule to this Act. Any person who contravenes section 5 is '
+            'guilty of an offence and liable on summary conviction to a fine not exceeding five thousand dollars.')
+
+    def test_similarity(self):
+        self.assertEqual(minhash(self.text), minhash(self.text.upper()))
+        near = self.text.replace('five thousand', 'ten thousand')
+        self.assertGreater(similarity(minhash(self.text), minhash(near)), 0.5)
+        self.assertLess(similarity(minhash(self.text), minhash('Fisheries and oceans are regulated here.')), 0.2)
+
+    def test_index(self):
+        index = NearDuplicateIndex(threshold=0.5)
+        self.assertIsNone(index.add('a', minhash(self.text)))
+        self.assertIsNone(index.add('b', minhash('An entirely unrelated passage about fisheries and oceans.')))
+        self.assertEqual(index.add('c', minhash(self.text + ' It comes into force on assent.')), 'a')
+        self.assertEqual(len(index), 2)
+        with self.assertRaises(ValueError):
+            NearDuplicateIndex(num_perm=64, bands=10)
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from goviq.config.local_cache import Settings
+
+MODULES = ['goviq.scrapers.parl_ca', 'goviq.scrapers.acts_ca', 'goviq.preprocessing.parl_ca',
+           'goviq.preprocessing.acts_ca', 'goviq.preprocessing.chunking', 'goviq.indexing', 'goviq.pipeline']
+HEAVY_MODULES = ['aiohttp', 'requests', 'bs4', 'lxml', 'tqdm']
+
+
+class TestImports(unittest.TestCase):
+    def test_import_is_cheap_and_unconfigured(self):
+        env = {key: value for key, value in os.environ.items() if key != 'GOVIQ_LOCAL_PATH'}
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env['PYTHONPATH'] = root
+        code = (f"import sys\nimport {', '.join(MODULES)}\n"
+                f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_settings(self):
+        settings = Settings()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache')
+            old = os.environ.get('GOVIQ_LOCAL_PATH')
+            os.environ['GOVIQ_LOCAL_PATH'] = path
+            try:
+                self.assertFalse(os.path.exists(path))
+                self.assertEqual(settings.local_cache, path)
+                self.assertTrue(os.path.isdir(path))
+                del os.environ['GOVIQ_LOCAL_PATH']
+                self.assertEqual(settings.local_cache, path)
+                settings.reset()
+                self.assertEqual(settings.local_cache, os.getcwd())
+            finally:
+                if old is not None:
+                    os.environ['GOVIQ_LOCAL_PATH'] = old
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from goviq.indexing import SearchIndex
+
+ACTS = [
+    {'url': 'https://laws-lois.justice.gc.ca/eng/acts/B-1.01/FullText.html', 'title': 'Bank Act',
+     'body': 'Bank ActS.C. 1991, c. 46 The Minister may, by order, amend the schedule.'},
+    {'url': 'https://laws-lois.justice.gc.ca/eng/acts/I-3.3/FullText.html', 'title': 'Income Tax Act',
+     'body': 'Income Tax ActR.S.C. 1985, c. 1 Every person resident in Canada is liable to pay tax.'},
+]
+BILLS = [
+    {'link': 'https://www.parl.ca/legisinfo/en/bill/44-1/c-1', 'status': 'royal_assent',
+     'body': 'An Act to amend the Bank Act and the Income Tax Act. The Bank Act is amended.',
+     'act_mentions': {'Bank Act': 2, 'Income Tax Act': 1}},
+    {'link': 'https://www.parl.ca/legisinfo/en/bill/44-1/c-2', 'status': 'in_progress',
+     'body': "An Act to amend the Income Tax Act. Le ministre peut modifier l'annexe.",
+     'act_mentions': {'Income Tax Act': 1}},
+]
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'search.db')
+        self.index = SearchIndex(self.path)
+        self.assertEqual(self.index.add_acts(ACTS), 2)
+        self.assertEqual(self.index.add_bills(BILLS), 2)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def urls(self, results):
+        return [result['url'] for result in results]
+
+    def test_search(self):
+        self.assertEqual(self.urls(self.index.search('minister amend', kind='act')), [ACTS[0]['url']])
+        self.assertEqual(self.urls(self.index.search('MINISTRE annexe')), [BILLS[1]['link']])
+        self.assertEqual(self.urls(self.index.search_phrase('resident in Canada')), [ACTS[1]['url']])
+        self.assertEqual(self.index.search_phrase('Canada in resident'), [])
+        self.assertEqual(self.urls(self.index.search_titles('income tax')), [ACTS[1]['url']])
+        self.assertIn('[amend]', self.index.search('amend', kind='act')[0]['snippet'])
+
+    def test_bills_mentioning(self):
+        self.assertEqual(self.index.bills_mentioning('income tax act'),
+                         [(BILLS[0]['link'], 1), (BILLS[1]['link'], 1)])
+        self.assertEqual(self.index.bills_mentioning(ACTS[0]['url']), [(BILLS[0]['link'], 2)])
+        self.assertEqual(self.index.acts_mentioned_by(BILLS[1]['link']), {'income tax act': 1})
+
+    def test_incremental_update(self):
+        self.index.close()
+        self.index = SearchIndex(self.path)
+        self.assertEqual(self.index.add_bills(BILLS), 0)
+        amended = dict(BILLS[1], body='An Act to amend the Bank Act.', act_mentions={'Bank Act': 1})
+        new = {'link': 'https://www.parl.ca/legisinfo/en/bill/44-1/c-3', 'status': 'in_progress',
+               'body': 'An Act respecting fisheries.', 'act_mentions': {}}
+        self.assertEqual(self.index.add_bills([BILLS[0], amended, new]), 2)
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.search('annexe'), [])
+        self.assertEqual(self.index.bills_mentioning('Income Tax Act'), [(BILLS[0]['link'], 1)])
+        self.assertEqual(self.index.bills_mentioning('Bank Act'), [(BILLS[0]['link'], 2), (BILLS[1]['link'], 1)])
+        self.assertTrue(self.index.remove(new['link']))
+        self.assertEqual(self.index.search('fisheries'), [])
@@ -0,0 +1,37 @@
+import unittest
+
+from goviq.matching import ActMatcher
+from goviq.utils import act_reference_count
+
+
+def naive_reference_count(bill, acts):
+    counts = {}
+    for act in acts:
+        ct = bill.lower().count(act.lower())
+        if ct > 0:
+            counts[act] = ct
+    return counts
+
+
+class TestActMatcher(unittest.TestCase):
+    acts = ['Criminal Code', 'Income Tax Act', 'Tax Act', 'Excise Tax Act', 'Income Tax Act']
+
+    def test_counts_match_str_count(self):
+        bill = ('An Act to amend the Income Tax Act and the Excise Tax Act. '
+                'The income tax act applies. See also the Criminal Code.')
+        self.assertEqual(ActMatcher(self.acts).count(bill), naive_reference_count(bill, self.acts))
+        self.assertEqual(act_reference_count(bill, self.acts), naive_reference_count(bill, self.acts))
+
+    def test_overlapping_occurrences(self):
+        acts = ['aa', 'aba']
+        for bill in ['aaaa', 'ababab', 'aabaaba']:
+            self.assertEqual(ActMatcher(acts).count(bill), naive_reference_count(bill, acts))
+
+    def test_offsets(self):
+        bill = 'Amends the Criminal Code and the criminal code.'
+        spans = ActMatcher(self.acts).find(bill)['Criminal Code']
+        self.assertEqual([bill[start:end].lower() for start, end in spans], ['criminal code'] * 2)
+
+    def test_no_mentions(self):
+        self.assertEqual(ActMatcher(self.acts).count('Nothing to see here.'), {})
+        self.assertEqual(ActMatcher([]).count('Nothing to see here.'), {})
@@ -0,0 +1,48 @@
+import importlib.util
+import unittest
+
+from goviq.parsing import get_parser
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Bank Act</title><meta charset="utf-8"><script>var x = 1;</script><style>p {}</style></head>
+<body>
+<!-- navigation -->
+<a class="TocTitle" href="B-1.01/index.html">Bank Act</a>
+<a class="TocTitle other" href="B-2/index.html">Bankruptcy Act</a>
+<a class="TocTitle">No link</a>
+<div class="docContents"><p>An Act <b>respecting</b> banks</p>
+<p>Short title &amp; interpretation&nbsp;</p></div>
+<div class="docContents"><span>1</span> text<!-- comment --> more</div>
+<a class="publication btn btn-primary" href="/DocumentViewer/en/44-1/bill/C-1/first-reading">Bill</a>
+<a class="btn publication" href="/DocumentViewer/en/other">Other</a>
+</body>
+</html>
+"""
+
+
+@unittest.skipUnless(importlib.util.find_spec('lxml'), 'lxml is not installed')
+class TestParserBackends(unittest.TestCase):
+    def setUp(self):
+        self.reference = get_parser('html.parser')
+        self.fast = get_parser('lxml')
+
+    def test_texts_by_class(self):
+        expected = ['An ActrespectingbanksShort title & interpretation', '1textmore']
+        self.assertEqual(self.reference.texts_by_class(PAGE, 'div', 'docContents'), expected)
+        self.assertEqual(self.fast.texts_by_class(PAGE, 'div', 'docContents'), expected)
+
+    def test_attrs_by_class(self):
+        for class_ in ['TocTitle', 'publication btn btn-primary']:
+            self.assertEqual(self.fast.attrs_by_class(PAGE, 'a', class_, 'href'),
+                             self.reference.attrs_by_class(PAGE, 'a', class_, 'href'))
+        self.assertEqual(self.fast.attrs_by_class(PAGE, 'a', 'TocTitle', 'href'),
+                         ['B-1.01/index.html', 'B-2/index.html'])
+
+    def test_visible_text(self):
+        self.assertEqual(self.fast.visible_text(PAGE), self.reference.visible_text(PAGE))
+        self.assertEqual(self.fast.visible_text(''), self.reference.visible_text(''))
+
+    def test_unknown_parser(self):
+        with self.assertRaises(ValueError):
+            get_parser('html5lib')
@@ -0,0 +1,39 @@
+import unittest
+
+import regex as re
+
+from goviq.config.scrapers.parl_ca import STATUS_PATTERNS, match_bill_status, parse_bill_status
+from goviq.patterns import PatternSet, compile_rules
+from goviq.preprocessing.acts_ca import ActCAPreprocessor
+
+
+class TestPatternSet(unittest.TestCase):
+    def test_priority_matches_sequential_search(self):
+        pages = ['<p>Second reading</p>',
+                 '<p>This bill received royal assent on May 1. This bill was defeated on May 2</p>',
+                 '<p>Status: This bill was dropped from the Order Paper. This bill was defeated on May 2</p>',
+                 '<p>This bill was not proceeded with on May 3</p>']
+        for page in pages:
+            expected = next((status for status, pattern in STATUS_PATTERNS if re.search(pattern, page)), 'in_progress')
+            self.assertEqual(parse_bill_status(page), expected)
+        self.assertEqual(match_bill_status(pages[1]).match.group(), 'This bill was defeated on')
+
+    def test_overlapping_rules(self):
+        rules = PatternSet([('long', 'bc'), ('short', 'abc?')])
+        self.assertEqual(rules.search('xabcx').rule, 'long')
+
+    def test_prefix(self):
+        rules = PatternSet([('word', r'\bend\b')], prefix=10, margin=2)
+        matched = rules.search('an end' + ' ' * 100)
+        self.assertTrue(matched.in_prefix)
+        # Too close to the cut to trust the prefix, and a match beyond the prefix
+        self.assertFalse(rules.search('12345 end' + ' ' * 100).in_prefix)
+        self.assertEqual(rules.search(' ' * 100 + 'end').match.start(), 100)
+        self.assertIs(compile_rules((('a', 'a'),)), compile_rules((('a', 'a'),)))
+
+    def test_act_title(self):
+        preprocessor = ActCAPreprocessor(local_cache='.')
+        body = 'Bank Act S.C. 1991, c. 46\nBank Act R.S.C. 1985\n' + 'x' * 10000
+        self.assertEqual(preprocessor._parse_title(body), 'Bank Act')
+        self.assertEqual(preprocessor._parse_title('x' * 5000 + '\nCriminal Code R.S.C., 1985'), 'Criminal Code')
+        self.assertIsNone(preprocessor._parse_title('no title here'))
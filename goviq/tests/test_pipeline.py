@@ -0,0 +1,190 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from goviq.entities.crawler import Crawler
+from goviq.entities.document import Document
+from goviq.indexing import SearchIndex
+from goviq.pipeline import Channel, LegislationPipeline, Pipeline
+from goviq.scrapers.acts_ca import ActCrawler
+from goviq.scrapers.parl_ca import BillCrawler
+from goviq.tests.fixtures import SyntheticCorpus
+from goviq.tests.mock_server import MockGovServer, local_crawler
+from goviq.utils import iter_json_docs
+
+
+class ActHeadCrawler(Crawler):
+    """
+    A source as small as one can be: the opening of every act's FullText page.
+    """
+    name = 'act_heads'
+    output_name = 'act_head'
+
+    def __init__(self, act_urls, **kwargs):
+        super().__init__(**kwargs)
+        self.act_urls = act_urls
+
+    def discover(self):
+        return self.act_urls
+
+    async def _parse(self, html):
+        return html[:200]
+
+    def crawl(self):
+        return asyncio.run(self.crawl_async())
+
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_stages_and_channels(self):
+        channel = Channel('numbers')
+        pipeline = Pipeline()
+
+        async def produce():
+            for i in range(3):
+                channel.put(i)
+            return 'produced'
+
+        async def consume(produce):
+            return produce, list(channel)
+
+        pipeline.add('produce', produce, outputs=[channel])
+        pipeline.add('consume', consume, after=['produce'])
+        self.assertEqual(await pipeline.run(), {'produce': 'produced', 'consume': ('produced', [0, 1, 2])})
+        with self.assertRaises(ValueError):
+            pipeline.add('index', consume, after=['missing'])
+
+    async def test_failed_producer(self):
+        channel = Channel('numbers')
+        pipeline = Pipeline()
+
+        async def produce():
+            channel.put(1)
+            raise IOError('disk full')
+
+        async def consume():
+            return list(channel)
+
+        pipeline.add('produce', produce, outputs=[channel])
+        pipeline.add('consume', consume)
+        with self.assertRaises(IOError):
+            await pipeline.run()
+
+    def test_full_channel_spills(self):
+        channel = Channel('numbers', maxsize=2)
+        self.assertEqual([channel.put(i) for i in range(4)], [True, True, False, False])
+        self.assertEqual(channel.spilled, 2)
+        channel.close()
+        self.assertEqual(list(channel), [0, 1])
+
+
+class TestLegislationPipeline(unittest.TestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus(acts=6, bills=6, act_paragraphs=(5, 10), bill_paragraphs=(5, 10))
+        self.server = MockGovServer(self.corpus)
+        self.base_url = self.server.start()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def run_pipeline(self, bill_crawler: BillCrawler = None, **kwargs) -> LegislationPipeline:
+        if bill_crawler is None:
+            bill_crawler = local_crawler(BillCrawler, self.base_url)(local_cache=self.tmp.name)
+        pipeline = LegislationPipeline(
+            local_cache=self.tmp.name, num_processes=1,
+            act_crawler=local_crawler(ActCrawler, self.base_url)(local_cache=self.tmp.name),
+            bill_crawler=bill_crawler, **kwargs)
+        pipeline.run()
+        return pipeline
+
+    def test_incremental_runs(self):
+        pipeline = self.run_pipeline()
+        self.assertEqual(pipeline.metrics.total('stages_skipped_total'), 0)
+        bills_path = os.path.join(self.tmp.name, 'processed_bill_text_latest.jsonl')
+        bills = {bill['link']: bill for bill in iter_json_docs(bills_path)}
+        self.assertEqual(len(bills), len(self.corpus.bills))
+        bill = bills[self.base_url + self.corpus.bill_path('c-1')]
+        self.assertEqual(set(bill['act_mentions']), set(self.corpus.bills['c-1']['mentions']))
+        with SearchIndex(os.path.join(self.tmp.name, 'search.db')) as index:
+            self.assertEqual(len(index), len(self.corpus.acts) + len(self.corpus.bills))
+
+        # Nothing changed upstream: every stage after the crawls is skipped
+        pipeline = self.run_pipeline()
+        self.assertEqual(pipeline.metrics.total('stages_skipped_total'), 3)
+
+        # One changed bill flows through and is merged with the unchanged ones
+        self.corpus.bills['c-1']['status'] = 'defeated' if bill['status'] != 'defeated' else 'dropped'
+        pipeline = self.run_pipeline()
+        self.assertEqual(pipeline.metrics.total('stages_skipped_total'), 1)
+        bills = {bill['link']: bill for bill in iter_json_docs(bills_path)}
+        self.assertEqual(len(bills), len(self.corpus.bills))
+        self.assertEqual(bills[self.base_url + self.corpus.bill_path('c-1')]['status'],
+                         self.corpus.bills['c-1']['status'])
+
+    def test_resume(self):
+        class InterruptedCrawler(local_crawler(BillCrawler, self.base_url)):
+            checkpoint_every = 1
+            parsed = 0
+
+            async def _crawl_to_file(self, *args, **kwargs):
+                self.task = asyncio.current_task()
+                return await super()._crawl_to_file(*args, **kwargs)
+
+            async def _parse(self, html):
+                self.parsed += 1
+                if self.parsed == 3:
+                    self.task.cancel()
+                return await super()._parse(html)
+
+        self.run_pipeline()
+        for bill in self.corpus.bills.values():
+            bill['status'] = 'dropped' if bill['status'] != 'dropped' else 'defeated'
+        with self.assertRaises(asyncio.CancelledError):
+            self.run_pipeline(InterruptedCrawler(local_cache=self.tmp.name, max_concurrent_tasks=1))
+        self.run_pipeline(resume=True)
+        # The bills the interrupted crawl had written are processed along with the rest
+        bills_path = os.path.join(self.tmp.name, 'processed_bill_text_latest.jsonl')
+        statuses = {bill['link']: bill['status'] for bill in iter_json_docs(bills_path)}
+        self.assertEqual(statuses, {self.base_url + self.corpus.bill_path(bill_id): bill['status']
+                                    for bill_id, bill in self.corpus.bills.items()})
+
+    def test_bill_crawl_bounded(self):
+        bills_crawled = asyncio.Event()
+
+        class BillCrawlFirst(local_crawler(BillCrawler, self.base_url)):
+            async def crawl_async(self, *args, **kwargs):
+                try:
+                    return await super().crawl_async(*args, **kwargs)
+                finally:
+                    bills_crawled.set()
+
+        class ActCrawlLast(local_crawler(ActCrawler, self.base_url)):
+            async def crawl_async(self, *args, **kwargs):
+                await bills_crawled.wait()
+                return await super().crawl_async(*args, **kwargs)
+
+        # Every bill is crawled before the act titles are known; only channel_size of them wait in memory
+        pipeline = LegislationPipeline(local_cache=self.tmp.name, num_processes=1, channel_size=2,
+                                       act_crawler=ActCrawlLast(local_cache=self.tmp.name),
+                                       bill_crawler=BillCrawlFirst(local_cache=self.tmp.name))
+        pipeline.run()
+        self.assertEqual(pipeline.metrics.total('records_spilled_total'), len(self.corpus.bills) - 2)
+        bills_path = os.path.join(self.tmp.name, 'processed_bill_text_latest.jsonl')
+        self.assertCountEqual([bill['link'] for bill in iter_json_docs(bills_path)],
+                              [self.base_url + self.corpus.bill_path(bill_id) for bill_id in self.corpus.bills])
+
+    def test_further_sources(self):
+        act_urls = [f'{self.base_url}/eng/acts/{act_id}/FullText.html' for act_id in self.corpus.acts]
+        source = ActHeadCrawler(act_urls, local_cache=self.tmp.name)
+        pipeline = self.run_pipeline(sources=[source], max_concurrent=3, index=False)
+        self.assertIn('act_head', pipeline.deltas)
+        heads = map(Document.from_record, iter_json_docs(os.path.join(self.tmp.name, 'act_head_latest.jsonl')))
+        self.assertCountEqual([head.url for head in heads], act_urls)
+        # Every crawl drew on the one budget, acts and their heads from the same host
+        self.assertTrue(all(crawler.budget is pipeline.budget for crawler in pipeline.crawlers))
+        self.assertEqual(pipeline.budget.in_flight, 0)
+        self.assertGreaterEqual(sum(pipeline.budget.stats().values()), 2 * len(act_urls) + len(self.corpus.bills))
+        with self.assertRaises(ValueError):
+            LegislationPipeline(local_cache=self.tmp.name, sources=[ActCrawler(local_cache=self.tmp.name)])
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+from goviq.parsing import PARSERS, get_parser
+from goviq.scrapers.acts_ca import parse_act_text
+from goviq.sections import SectionIndex, clip_sections, section_refs
+
+ACT = """
+<html><body><div class="docContents">
+  <h1 class="Title-of-Act">Bank Act</h1>
+  <h2 class="Part" id="h-1"><span class="HPartLabel">PART I</span><span class="HPartTitle">Interpretation</span></h2>
+  <p class="MarginalNote"><span class="wb-invisible">Marginal note:</span>Short title</p>
+  <p class="Section" id="s1"><strong><a class="sectionLabel" id="s-1"><span class="sectionLabel">1</span></a></strong>
+     This Act may be cited as the Bank Act.</p>
+  <p class="MarginalNote"><span class="wb-invisible">Marginal note:</span>Definitions</p>
+  <p class="Subsection"><strong><a class="sectionLabel" id="s-2"><span class="sectionLabel">2</span></a></strong>
+     <span class="lawlabel">(1)</span> The following definitions apply.</p>
+  <ul class="ProvisionList">
+    <li><p class="Paragraph"><span class="lawlabel">(a)</span> bank means a bank;</p></li>
+    <li><p class="Paragraph"><span class="lawlabel">(b)</span> Minister means the Minister of Finance.</p></li>
+  </ul>
+  <p class="Subsection"><span class="lawLabel">(2)</span> Other words have their usual meaning.</p>
+  <h3 class="Subheading">Application</h3>
+  <h2 class="Part" id="h-2"><span class="HPartLabel">PART II</span><span class="HPartTitle">Banks</span></h2>
+  <p class="Section"><strong><a class="sectionLabel" id="s-3"><span class="sectionLabel">3</span></a></strong>
+     A bank may carry on business.</p>
+</div></body></html>
+"""
+
+
+class TestSections(unittest.TestCase):
+    def parsers(self):
+        for name in PARSERS:
+            try:
+                get_parser(name).texts_by_class('<div class="a">x</div>', 'div', 'a')
+            except ImportError:
+                continue
+            yield name
+
+    def test_tree(self):
+        for name in self.parsers():
+            with self.subTest(parser=name):
+                parsed = parse_act_text(ACT, name)
+                text = parsed['segments'][0]
+                self.assertEqual(parsed['segments'], get_parser(name).texts_by_class(ACT, 'div', 'docContents'))
+                refs = section_refs(parsed['sections'][0])
+                self.assertEqual(list(refs), ['Part I', '1', '2', '2(1)', '2(1)(a)', '2(1)(b)', '2(2)', 'Part II', '3'])
+                start, end = refs['2(1)(b)']
+                self.assertEqual(text[start:end], '(b)Minister means the Minister of Finance.')
+                start, end = refs['2']
+                self.assertTrue(text[start:end].startswith('Marginal note:Definitions2(1)'))
+                self.assertTrue(text[start:end].endswith('usual meaning.'))
+                start, end = refs['Part II']
+                self.assertEqual(text[start:end], 'PART IIBanks3A bank may carry on business.')
+
+    def test_clip(self):
+        parsed = parse_act_text(ACT)
+        start, end = section_refs(parsed['sections'][0])['Part I']
+        clipped = clip_sections(parsed['sections'][0], start, end)
+        self.assertEqual([node['label'] for node in clipped], ['I'])
+        self.assertEqual(clipped[0]['start'], 0)
+
+    def test_index(self):
+        parsed = parse_act_text(ACT)
+        act = {'url': 'https://laws/B-1', 'title': 'Bank Act', 'body': parsed['segments'][0],
+               'sections': parsed['sections'][0]}
+        index = SectionIndex.from_acts([act])
+        url, start, end = index.resolve('Bank Act, s. 2(1)(a)')
+        self.assertEqual(url, 'https://laws/B-1')
+        self.assertEqual(act['body'][start:end], '(a)bank means a bank;')
+        self.assertEqual(index.lookup('bank act', '2 (2)'), index.resolve('Bank Act section 2(2)')[1:])
+        self.assertIsNotNone(index.resolve('Bank Act, Part II'))
+        self.assertIsNone(index.resolve('Bank Act, s. 99'))
+        self.assertIsNone(index.resolve('Fisheries Act, s. 1'))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'index.json')
+            index.save(path)
+            self.assertEqual(SectionIndex.load(path).lookup('https://laws/B-1', '3'), index.lookup('Bank Act', '3'))
@@ -0,0 +1,28 @@
+import unittest
+
+from goviq.utils import find_language_transition, split_document_at_language_transition
+
+ENGLISH = ('The Minister may, by order, amend the schedule to this Act. Any person who contravenes section 5 is '
+           'guilty of an offence and liable on summary conviction to a fine. ')
+FRENCH = ("Le ministre peut, par arrêté, modifier l'annexe de la présente loi. Quiconque contrevient à l'article 5 "
+          "commet une infraction et encourt, sur déclaration de culpabilité, une amende. ")
+
+
+class TestLanguageTransition(unittest.TestCase):
+    def test_split_english_first(self):
+        document = 'Bank ActS.C. 1991, c. 46' + ENGLISH * 300 + 'Loi sur les banquesL.C. 1991, ch. 46' + FRENCH * 300
+        english, french = split_document_at_language_transition(document)
+        self.assertEqual(english + french, document)
+        self.assertTrue(english.endswith('to a fine.'))
+        self.assertTrue(french.strip().startswith('Loi sur les banques'))
+
+    def test_split_french_first(self):
+        english, french = split_document_at_language_transition(FRENCH * 100 + ENGLISH * 100)
+        self.assertTrue(english.strip().startswith('The Minister'))
+        self.assertTrue(french.startswith('Le ministre'))
+
+    def test_monolingual(self):
+        self.assertIsNone(find_language_transition(ENGLISH * 100))
+        self.assertIsNone(find_language_transition(FRENCH * 100))
+        self.assertEqual(split_document_at_language_transition(ENGLISH * 100), (ENGLISH * 100, None))
+        self.assertIsNone(find_language_transition(''))
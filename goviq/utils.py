@@ -1,9 +1,20 @@
-from concurrent.futures import ProcessPoolExecutor
+import dataclasses
 import datetime
-import bs4
-from langdetect import detect_langs
+import functools
+import gzip
+import hashlib
 import json
-from typing import List
+import re
+from typing import IO, Any, Iterable, Iterator, List, Tuple
+
+from goviq.entities.columnar import ColumnarCorpus, is_columnar
+from goviq.matching import ActMatcher
+from goviq.parsing import get_parser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 def datestamp():
@@ -16,56 +27,203 @@ def dateparse(datestring):
     return datetime.datetime.strptime(datestring, "%Y%m%d%H%M%S")
 
 
-def extract_html_text(html: str):
-    soup = bs4.BeautifulSoup(html, 'html.parser')
-    texts = soup.find_all(string=True)
-    visible_texts = filter(
-        lambda text: text.parent.name not in ['style', 'script', 'head', 'title', 'meta', '[document]'], texts)
-    return " ".join(t.strip() for t in visible_texts if t.strip())
+def content_hash(text: str) -> str:
+    """Return a stable hex digest of a document's text, used to detect changed content between crawls"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
 
-def load_json_docs(path: str):
-    with open(path, 'r') as f:
-        return json.load(f)
+def progress(iterable: Iterable, **kwargs) -> Iterable:
+    """Wrap an iterable in a tqdm progress bar. tqdm takes tens of milliseconds to import, so it is imported here"""
+    import tqdm
+    return tqdm.tqdm(iterable, **kwargs)
+
+
+def extract_html_text(html: str, parser: str = 'html.parser'):
+    """Return the visible text of a page. parser selects the backend, see goviq.parsing"""
+    return get_parser(parser).visible_text(html)
+
+
+def open_compressed(path: str, mode: str = 'rt') -> IO:
+    """Open a text file, transparently (de)compressing gzip (.gz) or zstandard (.zst) by file extension"""
+    base = path[:-len('.part')] if path.endswith('.part') else path
+    if base.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    if base.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstandard is required for .zst files. Install with `pip install goviq[zstd]`.')
+        return zstandard.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def is_jsonl(path: str) -> bool:
+    """Return True if the path is a JSON Lines file, optionally compressed or still being written (.part)"""
+    base = path[:-len('.part')] if path.endswith('.part') else path
+    for suffix in ('.gz', '.zst'):
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    return base.endswith('.jsonl')
 
 
-def find_language_transition(text, window_size=5000, step_size=3000, batch_size=10):
-    num_windows = len(text) - window_size + 1
-    transition_index = None
-    min_diff = float('inf')
+def _to_json(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
 
-    with ProcessPoolExecutor() as executor:
-        for i in range(0, num_windows, step_size):
-            batch_windows = [text[i + j:i + j + window_size] for j in range(0, step_size, batch_size)]
-            lang_probabilities_list = list(executor.map(detect_langs, batch_windows))
 
-            for lang_probabilities in lang_probabilities_list:
-                if len(lang_probabilities) >= 2:
-                    diff = abs(lang_probabilities[0].prob - lang_probabilities[1].prob)
+def dumps(obj: Any) -> str:
+    """Serialize to a single line of JSON, dataclasses (e.g. Document) as objects. Uses orjson if installed
+    (`pip install goviq[orjson]`), several times faster than the json module, which is the fallback"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, default=_to_json)
 
-                    if diff < min_diff:
-                        min_diff = diff
-                        transition_index = i + window_size
 
-    return transition_index
+def loads(line: str | bytes) -> Any:
+    """Parse a line of JSON, with orjson if installed"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
 
 
-def split_document_at_language_transition(document, window_size=1000):
-    transition_index = find_language_transition(document, window_size)
+def iter_json_docs(path: str) -> Iterator[dict]:
+    """Lazily yield documents from a JSON Lines file or columnar corpus one at a time. Plain JSON arrays are loaded
+    and then yielded"""
+    if is_columnar(path):
+        with ColumnarCorpus(path) as corpus:
+            yield from corpus
+        return
+    if not is_jsonl(path):
+        yield from load_json_docs(path)
+        return
+    with open_compressed(path, 'rt') as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
 
-    if transition_index is not None:
-        english_text = document[:transition_index]
-        french_text = document[transition_index:]
-        return english_text, french_text
-    else:
+
+def load_json_docs(path: str):
+    if is_jsonl(path) or is_columnar(path):
+        return list(iter_json_docs(path))
+    with open_compressed(path, 'rt') as f:
+        return json.load(f)
+
+
+# Frequent function words that occur in only one of the two languages. Words shared by both (a, on) are left out
+ENGLISH_STOPWORDS = frozenset("""
+    the of and to in is that for be or by with as this any an are which shall not under from it at has have was
+    been were if its such who other than their there these those may must all into upon within without where when
+    made section act subsection paragraph person minister
+""".split())
+FRENCH_STOPWORDS = frozenset("""
+    le la les de des du et en un une est que qui dans pour par sur au aux ne pas ce cette ces sont ou il elle
+    être doit peut tout toute tous leur leurs selon sous avec entre lorsque dont été fait loi article paragraphe
+    alinéa personne ministre présente
+""".split())
+_WORD_RE = re.compile(r'[^\W\d_]+')
+
+
+def _stopword_score(words: List[str]) -> Tuple[int, int]:
+    return sum(map(ENGLISH_STOPWORDS.__contains__, words)), sum(map(FRENCH_STOPWORDS.__contains__, words))
+
+
+def _language_transition(text: str, block_size: int = 2048, min_words: int = 20,
+                         min_purity: float = 0.7) -> Tuple[int, bool] | None:
+    """Locate an English/French change point by stopword frequency.
+    The best split maximises a running (english - french) stopword score, i.e. the number of stopwords that are on
+    the side of their own language. Blocks of block_size characters are scored first, then the split is refined word
+    by word around the best block boundary. Returns (index, english_first), or None if the text is not bilingual"""
+    lowered = text.lower()
+    n = len(lowered)
+    counts = [_stopword_score(_WORD_RE.findall(lowered, start, start + block_size)) for start in range(0, n, block_size)]
+    total_en = sum(en for en, _ in counts)
+    total_fr = sum(fr for _, fr in counts)
+    if total_en < min_words or total_fr < min_words:
+        return None
+
+    # Coarse pass: block boundary with the highest (english first) or lowest (french first) running score
+    running, highest, lowest, high_block, low_block = 0, 0, 0, 0, 0
+    for block, (en, fr) in enumerate(counts, start=1):
+        running += en - fr
+        if running > highest:
+            highest, high_block = running, block
+        if running < lowest:
+            lowest, low_block = running, block
+    english_first = highest >= -lowest
+    sign = 1 if english_first else -1
+    boundary_block = high_block if english_first else low_block
+
+    # Fine pass: word-level running score over the blocks either side of the coarse boundary
+    window_start = max(0, boundary_block - 1) * block_size
+    window_end = min(n, (boundary_block + 1) * block_size)
+    en = sum(en for en, _ in counts[:max(0, boundary_block - 1)])
+    fr = sum(fr for _, fr in counts[:max(0, boundary_block - 1)])
+    running, best, split, split_counts = 0, 0, window_start, (en, fr)
+    for match in _WORD_RE.finditer(lowered, window_start, window_end):
+        word = match.group()
+        if word in ENGLISH_STOPWORDS:
+            en += 1
+            running += sign
+        elif word in FRENCH_STOPWORDS:
+            fr += 1
+            running -= sign
+        else:
+            continue
+        if running > best:
+            best, split, split_counts = running, match.end(), (en, fr)
+
+    en_before, fr_before = split_counts
+    en_after, fr_after = total_en - en_before, total_fr - fr_before
+    first, first_other = (en_before, fr_before) if english_first else (fr_before, en_before)
+    second, second_other = (fr_after, en_after) if english_first else (en_after, fr_after)
+    if first < min_words or second < min_words:
+        return None
+    if first / (first + first_other) < min_purity or second / (second + second_other) < min_purity:
+        return None
+
+    # Move the split to the last sentence break before the first stopword of the second language
+    gap_end = n
+    for match in _WORD_RE.finditer(lowered, split):
+        if match.group() in ENGLISH_STOPWORDS or match.group() in FRENCH_STOPWORDS:
+            gap_end = match.start()
+            break
+    sentence_break = max(text.rfind(ch, split, gap_end) for ch in '.!?:;\n')
+    return (sentence_break + 1 if sentence_break >= 0 else gap_end), english_first
+
+
+def find_language_transition(text: str, block_size: int = 2048) -> int | None:
+    """Return the character index where a bilingual English/French document switches language, or None if the
+    document is not bilingual. Runs in a single process in one linear pass, so it is safe to call from worker pools"""
+    transition = _language_transition(text, block_size=block_size)
+    return transition[0] if transition else None
+
+
+def split_document_at_language_transition(document: str, block_size: int = 2048):
+    """Split a bilingual document into (english_text, french_text). Returns (document, None) if it is not bilingual"""
+    transition = _language_transition(document, block_size=block_size)
+    if transition is None:
         return document, None
+    index, english_first = transition
+    if english_first:
+        return document[:index], document[index:]
+    return document[index:], document[:index]
+
+
+def detect_language(text: str, min_words: int = 3) -> str | None:
+    """Return 'en' or 'fr' for a short passage by stopword frequency, or None if it has too few stopwords to tell"""
+    en, fr = _stopword_score(_WORD_RE.findall(text.lower()))
+    if en + fr < min_words:
+        return None
+    return 'en' if en >= fr else 'fr'
+
+
+@functools.lru_cache(maxsize=8)
+def _act_matcher(acts: Tuple[str, ...]) -> ActMatcher:
+    return ActMatcher(acts)
 
 
 def act_reference_count(bill: str, acts: List[str]):
-    """Return the number of times each act is referenced in a bill. Return as a dictionary of act: count pairs"""
-    act_cts = {}
-    for act in acts:
-        ct = bill.lower().count(act.lower())
-        if ct > 0:
-            act_cts[act] = ct
-    return act_cts
+    """Return the number of times each act is referenced in a bill. Return as a dictionary of act: count pairs.
+    The matcher for a given list of acts is built once and reused; build an ActMatcher directly to also get offsets"""
+    return _act_matcher(tuple(acts)).count(bill)